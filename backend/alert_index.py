@@ -0,0 +1,172 @@
+SEVERITY_BANDS = ("critical", "warning", "info")
+
+
+def severity_band(severity):
+    """Band an alert severity the way the API and frontend do (critical >= 7, warning >= 4)"""
+    if isinstance(severity, bool) or not isinstance(severity, (int, float)):
+        return None
+    if severity >= 7:
+        return "critical"
+    if severity >= 4:
+        return "warning"
+    return "info"
+
+
+def alert_day(alert):
+    """The YYYY-MM-DD day an alert was raised on"""
+    return str(alert.get("timestamp", ""))[:10]
+
+
+class AlertStatistics:
+    """Running alert counters by severity band, acknowledged state, device and day.
+
+    Updated by AlertIndex on every add/update/remove so the statistics
+    endpoints never have to rescan the alert list.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.resolved = 0
+        self.by_band = {band: 0 for band in SEVERITY_BANDS}
+        self.active_by_band = {band: 0 for band in SEVERITY_BANDS}
+        self.by_device = {}
+        self.by_day = {}
+
+    @staticmethod
+    def _empty_counts():
+        return {"total": 0, "critical": 0, "warning": 0, "info": 0, "resolved": 0}
+
+    def apply(self, state, sign):
+        """Add (sign=1) or remove (sign=-1) one alert in the given (device, band, day, acknowledged) state"""
+        device_id, band, day, acknowledged = state
+        self.total += sign
+        device_counts = self.by_device.setdefault(device_id, self._empty_counts())
+        day_counts = self.by_day.setdefault(day, self._empty_counts())
+        for counts in (device_counts, day_counts):
+            counts["total"] += sign
+            if band is not None:
+                counts[band] += sign
+            if acknowledged:
+                counts["resolved"] += sign
+        if band is not None:
+            self.by_band[band] += sign
+            if not acknowledged:
+                self.active_by_band[band] += sign
+        if acknowledged:
+            self.resolved += sign
+        if device_counts["total"] == 0:
+            del self.by_device[device_id]
+        if day_counts["total"] == 0:
+            del self.by_day[day]
+
+    def day(self, day):
+        return self.by_day.get(day, self._empty_counts())
+
+
+class AlertIndex:
+    """In-memory indexes over the alert list.
+
+    Keeps alerts by id plus insertion-ordered buckets per device, severity band
+    and day, so point lookups are O(1) and filtered listings cost time
+    proportional to the size of the result. Every alert mutation has to go
+    through add/update/remove to keep the buckets current. `version` grows
+    by one on every mutation, so it identifies a state of the alert set.
+    """
+
+    def __init__(self, alerts=()):
+        self.version = 0
+        self.rebuild(alerts)
+
+    def rebuild(self, alerts):
+        self.version += 1
+        self.stats = AlertStatistics()
+        self._by_id = {}
+        self._by_device = {}
+        self._by_band = {band: {} for band in SEVERITY_BANDS}
+        self._by_day = {}
+        for alert in alerts:
+            self.add(alert)
+
+    def _state(self, alert):
+        return (alert.get("device_id"), severity_band(alert.get("severity")), alert_day(alert),
+                bool(alert.get("acknowledged", False)))
+
+    def _bucket(self, alert, state):
+        device_id, band, day, _ = state
+        alert_id = alert["id"]
+        self._by_device.setdefault(device_id, {})[alert_id] = alert
+        if band is not None:
+            self._by_band[band][alert_id] = alert
+        self._by_day.setdefault(day, {})[alert_id] = alert
+
+    def _unbucket(self, alert_id, state):
+        device_id, band, day, _ = state
+        self._by_device.get(device_id, {}).pop(alert_id, None)
+        if band is not None:
+            self._by_band[band].pop(alert_id, None)
+        self._by_day.get(day, {}).pop(alert_id, None)
+
+    def add(self, alert):
+        previous = self._by_id.get(alert["id"])
+        if previous is not None:
+            self._unbucket(alert["id"], self._state(previous))
+            self.stats.apply(self._state(previous), -1)
+        self._by_id[alert["id"]] = alert
+        self._bucket(alert, self._state(alert))
+        self.stats.apply(self._state(alert), 1)
+        self.version += 1
+
+    def remove(self, alert_id):
+        alert = self._by_id.pop(alert_id, None)
+        if alert is not None:
+            self._unbucket(alert_id, self._state(alert))
+            self.stats.apply(self._state(alert), -1)
+            self.version += 1
+        return alert
+
+    def update(self, alert_id, changes):
+        """Apply field changes to an indexed alert, re-bucketing it if an indexed field moved"""
+        alert = self._by_id[alert_id]
+        old_state = self._state(alert)
+        alert.update(changes)
+        new_state = self._state(alert)
+        if new_state[:3] != old_state[:3]:
+            self._unbucket(alert_id, old_state)
+            self._bucket(alert, new_state)
+        if new_state != old_state:
+            self.stats.apply(old_state, -1)
+            self.stats.apply(new_state, 1)
+        self.version += 1
+        return alert
+
+    def get(self, alert_id):
+        return self._by_id.get(alert_id)
+
+    def by_device(self, device_id):
+        return list(self._by_device.get(device_id, {}).values())
+
+    def by_band(self, band):
+        return list(self._by_band.get(band, {}).values())
+
+    def by_day(self, day):
+        return list(self._by_day.get(day, {}).values())
+
+    def filter(self, band=None, device_id=None):
+        """Alerts matching an optional severity band and device, in insertion order"""
+        if band is None and device_id is None:
+            return list(self._by_id.values())
+        if band is None:
+            return self.by_device(device_id)
+        if device_id is None:
+            return self.by_band(band)
+        device_bucket = self._by_device.get(device_id, {})
+        band_bucket = self._by_band.get(band, {})
+        if len(device_bucket) <= len(band_bucket):
+            return [a for alert_id, a in device_bucket.items() if alert_id in band_bucket]
+        return [a for alert_id, a in band_bucket.items() if alert_id in device_bucket]
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, alert_id):
+        return alert_id in self._by_id
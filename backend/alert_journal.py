@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+
+
+class AlertJournal:
+    """Append-only JSON-lines journal of alert changes on top of a snapshot file.
+
+    Every alert create/update is appended to `log_path` as one line, so the
+    cost of persisting an event does not depend on how many alerts exist.
+    Lines are flushed to the OS immediately and fsynced in batches by a
+    background thread at most every `fsync_interval` seconds. `compact()`
+    writes the full alert list to `snapshot_path` atomically and starts a new
+    log; `load()` rebuilds the alerts from the snapshot plus the log tail.
+    """
+
+    def __init__(self, snapshot_path, log_path, fsync_interval=1.0):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.compacting_path = log_path + ".compacting"
+        self.fsync_interval = fsync_interval
+        self.events_since_compaction = 0
+        self.last_compaction = time.monotonic()
+        self._lock = threading.Lock()
+        self._log = None
+        self._dirty = False
+        self._syncer = None
+        self._stop = threading.Event()
+
+    def record_created(self, alert):
+        """Journal a new alert"""
+        self._append({"op": "create", "alert": alert})
+
+    def record_updated(self, alert_id, changes):
+        """Journal changed fields of an existing alert"""
+        self._append({"op": "update", "id": alert_id, "changes": changes})
+
+    def _append(self, event):
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_path, "a")
+            self._log.write(line)
+            self._log.flush()
+            self._dirty = True
+            self.events_since_compaction += 1
+        self._ensure_syncer()
+
+    def _ensure_syncer(self):
+        if self._syncer is None or not self._syncer.is_alive():
+            self._stop.clear()
+            self._syncer = threading.Thread(target=self._sync_loop, name="alert-journal-fsync", daemon=True)
+            self._syncer.start()
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """fsync journal lines written since the last sync"""
+        with self._lock:
+            if self._dirty and self._log is not None:
+                os.fsync(self._log.fileno())
+                self._dirty = False
+
+    def close(self):
+        self._stop.set()
+        self.sync()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def load(self):
+        """Rebuild the alert list from the snapshot, then replay the journal"""
+        alerts_by_id = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                for alert in json.load(f):
+                    alerts_by_id[alert.get("id")] = alert
+        for path in (self.compacting_path, self.log_path):
+            if os.path.exists(path):
+                self._replay(path, alerts_by_id)
+        return list(alerts_by_id.values())
+
+    def _replay(self, path, alerts_by_id):
+        with open(path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn write from a crash can only leave a partial line behind
+                    print(f"Skipping corrupt alert journal line {line_number} in {path}")
+                    continue
+                if event.get("op") == "create":
+                    alert = event["alert"]
+                    alerts_by_id[alert.get("id")] = alert
+                elif event.get("op") == "update" and event.get("id") in alerts_by_id:
+                    alerts_by_id[event["id"]].update(event.get("changes", {}))
+
+    def compact(self, alerts):
+        """Write `alerts` as the new snapshot and drop the journal entries it covers.
+
+        The log is rotated and the alerts copied under the journal lock, so any
+        event recorded afterwards lands in the new log; replay is idempotent, so
+        an event that is both in the snapshot and the new log is harmless.
+        """
+        with self._lock:
+            if self._log is not None:
+                os.fsync(self._log.fileno())
+                self._log.close()
+                self._log = None
+            self._dirty = False
+            if os.path.exists(self.log_path):
+                if os.path.exists(self.compacting_path):
+                    # A previous compaction did not finish; keep its events too
+                    with open(self.log_path, "r") as src, open(self.compacting_path, "a") as dst:
+                        dst.write(src.read())
+                    os.remove(self.log_path)
+                else:
+                    os.replace(self.log_path, self.compacting_path)
+            snapshot = [dict(alert) for alert in alerts]
+            self.events_since_compaction = 0
+            self.last_compaction = time.monotonic()
+
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+
+    def needs_compaction(self, max_events, max_age):
+        """Whether enough events or time have accumulated since the last compaction"""
+        if self.events_since_compaction >= max_events:
+            return True
+        return self.events_since_compaction > 0 and time.monotonic() - self.last_compaction >= max_age
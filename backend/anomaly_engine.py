@@ -0,0 +1,154 @@
+"""Z-score anomaly detection per (device, sensor type), in batch or streaming.
+
+`zscore_anomalies` scores a whole DataFrame in one vectorized pass: group
+means and standard deviations are broadcast back to the rows with groupby
+transforms, so a fleet costs one pass instead of one filter per device.
+
+`StreamingAnomalyDetector` keeps Welford running statistics per
+(device, sensor type) and scores each new reading in O(1) against the
+readings seen before it, for data that arrives one reading at a time.
+"""
+import math
+from collections import deque
+
+DEFAULT_THRESHOLD = 3  # |z| above which a reading is anomalous
+NON_SENSOR_KEYS = {"timestamp", "raw_timestamp"}
+
+
+def zscores(df, value_column="sensor_value", group_columns=("device_id", "sensor_type")):
+    """|z| of every row's value within its group (sample std, NaN for one-row or constant groups)"""
+    grouped = df.groupby(list(group_columns), sort=False, observed=True)[value_column]
+    std = grouped.transform("std")
+    return ((df[value_column] - grouped.transform("mean")) / std.where(std != 0)).abs()
+
+
+def zscore_anomalies(df, threshold=DEFAULT_THRESHOLD, value_column="sensor_value",
+                     group_columns=("device_id", "sensor_type")):
+    """Rows whose |z| within their group exceeds threshold, with an anomaly_score column"""
+    scores = zscores(df, value_column, group_columns)
+    is_anomaly = scores > threshold
+    anomalies = df[is_anomaly].copy()
+    anomalies["anomaly_score"] = scores[is_anomaly]
+    return anomalies
+
+
+class RunningStats:
+    """Welford's running mean and variance"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1, like pandas), NaN below two values"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def zscore(self, value):
+        std = self.std
+        if not std > 0:
+            return math.nan
+        return abs(value - self.mean) / std
+
+
+class SensorAnomalyState:
+    """Running statistics and the latest score of one (device, sensor type)"""
+
+    __slots__ = ("stats", "last_value", "last_score", "last_timestamp", "anomaly_count")
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.last_value = None
+        self.last_score = math.nan
+        self.last_timestamp = None
+        self.anomaly_count = 0
+
+
+class StreamingAnomalyDetector:
+    """Per-(device, sensor type) z-scores updated one reading at a time.
+
+    Each reading is scored against the mean and standard deviation of the
+    readings before it, then folded into them. Scores stay NaN until
+    min_samples readings have been seen. Anomalous readings are also queued
+    until `drain_anomalies` collects them, so a periodic task can alert on
+    everything flagged since its last run.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, min_samples=10, max_pending=1000):
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self._states = {}
+        self._pending = deque(maxlen=max_pending)
+
+    def observe(self, device_id, sensor_type, value, timestamp=None):
+        """Score value and add it to the running statistics; returns its |z| (NaN while warming up)"""
+        key = (device_id, sensor_type)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = SensorAnomalyState()
+        value = float(value)
+        score = state.stats.zscore(value) if state.stats.count >= self.min_samples else math.nan
+        mean = state.stats.mean
+        state.stats.update(value)
+        state.last_value, state.last_score, state.last_timestamp = value, score, timestamp
+        if score > self.threshold:
+            state.anomaly_count += 1
+            self._pending.append({
+                "device_id": device_id,
+                "sensor_type": sensor_type,
+                "value": value,
+                "anomaly_score": score,
+                "mean": mean,
+                "timestamp": timestamp
+            })
+        return score
+
+    def observe_readings(self, device_id, readings):
+        """Feed sensor reading dicts ({sensor: value, "timestamp": ...}) oldest first"""
+        for reading in readings:
+            timestamp = reading.get("raw_timestamp", reading.get("timestamp"))
+            for sensor_type, value in reading.items():
+                if sensor_type not in NON_SENSOR_KEYS and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.observe(device_id, sensor_type, value, timestamp)
+
+    def state(self, device_id, sensor_type):
+        return self._states.get((device_id, sensor_type))
+
+    def is_anomalous(self, device_id, sensor_type):
+        """Whether the latest reading of the sensor was flagged"""
+        state = self._states.get((device_id, sensor_type))
+        return state is not None and state.last_score > self.threshold
+
+    def drain_anomalies(self):
+        """Anomalies flagged since the previous call, oldest first"""
+        drained = list(self._pending)
+        self._pending.clear()
+        return drained
+
+    def reset(self, device_id=None):
+        """Forget the statistics of one device, or of every device"""
+        if device_id is None:
+            self._states.clear()
+            self._pending.clear()
+            return
+        for key in [key for key in self._states if key[0] == device_id]:
+            del self._states[key]
+        kept = [anomaly for anomaly in self._pending if anomaly["device_id"] != device_id]
+        self._pending.clear()
+        self._pending.extend(kept)
+
+    def __len__(self):
+        return len(self._states)
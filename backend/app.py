@@ -2,6 +2,7 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from ml_model import PredictiveMaintenanceModel
@@ -9,19 +10,31 @@ import json
 import os
 import uuid
 import random
+import re
 from enum import Enum
 from fastapi_utils.tasks import repeat_every
 from fastapi.responses import Response
 from dateutil.parser import parse
 from threading import Lock
+from functools import partial
 from pathlib import Path
-import openai
 from dotenv import load_dotenv
 from fastapi import HTTPException
-import requests
-from openai import AsyncOpenAI
-from google import genai
 import asyncio
+from sensor_store import SensorHistoryStore, to_micros
+from alert_journal import AlertJournal
+from alert_index import AlertIndex, SEVERITY_BANDS
+from llm_gateway import LLMGateway
+from ttl_cache import TTLCache, MISSING
+from chat_context import build_alert_context
+from lazy_loader import LazyResource
+from prediction_cache import PredictionCache, window_fingerprint
+from feature_state import FeatureStateStore
+from anomaly_engine import StreamingAnomalyDetector
+from breach_tracker import BreachRateTracker
+from status_snapshot import StatusSnapshot
+from inference_batcher import InferenceBatcher
+from inference_pool import InferencePool
 
 app = FastAPI(title="Predictive Maintenance API")
 
@@ -34,14 +47,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize model
-model = PredictiveMaintenanceModel()
-model.load_model()
+# Initialize model; the trained weights (and TensorFlow, for the keras backend) are loaded on first inference
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")  # "keras", or "numpy" to serve without TensorFlow
+model = PredictiveMaintenanceModel(inference_backend=INFERENCE_BACKEND)
+
+def load_predictive_model():
+    model.load_model()
+    return model
+
+predictive_model = LazyResource("predictive_model", load_predictive_model)
+MODEL_RELOAD_SECONDS = int(os.getenv("MODEL_RELOAD_SECONDS", "30"))  # How often to check the registry for a newly promoted model
+
+def load_model_version(version):
+    candidate = PredictiveMaintenanceModel(inference_backend=INFERENCE_BACKEND)
+    if not candidate.load_model(version):
+        raise RuntimeError(f"Model version {version} could not be loaded")
+    return candidate
+
+async def reload_promoted_model():
+    """Load a newly promoted model in the background and swap it in.
+    
+    Requests that already hold the previous model finish on it; later
+    requests get the new one. Returns the version now being served.
+    """
+    global model
+    current = await predictive_model.aget()
+    version = await asyncio.to_thread(current.registry.current_version)
+    if version is None or version == current.model_version:
+        return current.model_version
+    candidate = await asyncio.to_thread(load_model_version, version)
+    predictive_model.swap(candidate)
+    model = candidate
+    if inference_pool is not None and inference_pool.loaded:
+        await asyncio.to_thread(inference_pool.get().restart)
+    print(f"Now serving model version {version} (was {current.model_version})")
+    return version
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))  # Inference worker processes; 0 runs the model in-process
+
+def start_inference_pool():
+    loaded_model = predictive_model.get()
+    return InferencePool(INFERENCE_WORKERS, (loaded_model.sequence_length, 5), inference_backend=INFERENCE_BACKEND)
+
+inference_pool = LazyResource("inference_pool", start_inference_pool) if INFERENCE_WORKERS > 0 else None
+
+def predict_windows(X, loaded_model):
+    """Score windows prepared and scaled by loaded_model with that same model.
+    
+    Uses the worker pool when it is enabled and still serves loaded_model's
+    version; after a reload has moved the pool on, scores in-process.
+    """
+    if inference_pool is not None:
+        try:
+            return inference_pool.get().predict_windows(X, model_version=loaded_model.model_version)
+        except LookupError:
+            pass
+    return loaded_model.predict_windows(X)
+
+PREDICT_MAX_BATCH_SIZE = 256  # Windows per batched model call for /predict
+PREDICT_MAX_WAIT = 0.005  # Seconds a /predict request waits for others to share its batch
+inference_batcher = InferenceBatcher(predict_windows, max_batch_size=PREDICT_MAX_BATCH_SIZE, max_wait=PREDICT_MAX_WAIT)
+MODEL_WARM_UP = os.getenv("MODEL_WARM_UP", "true").lower() in ("1", "true", "yes")  # Load model and LLM clients in the background at startup
 
 # Global variables to store mock data
 devices = {}
-sensor_history = {}
+SENSOR_HISTORY_CAPACITY = 2880  # Readings kept per device
+sensor_history = SensorHistoryStore(capacity=SENSOR_HISTORY_CAPACITY)
+prediction_cache = PredictionCache()  # Latest prediction per device, dropped when its readings change
+feature_states = FeatureStateStore(model.sequence_length)  # Rolling model input per device, updated per reading
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3"))  # |z| at which a sensor reading is anomalous
+anomaly_detector = StreamingAnomalyDetector(threshold=ANOMALY_Z_THRESHOLD)  # Running statistics per device sensor
+MAINTENANCE_BREACH_WINDOW = 24  # Readings in the rolling breach rate behind maintenance predictions
+breach_rates = BreachRateTracker(MAINTENANCE_BREACH_WINDOW)  # Rolling breach counts per device, updated per reading
+device_status_snapshot = StatusSnapshot()  # Pre-serialized /device-status response
+DEVICE_STATUS_REFRESH_SECONDS = 1  # How quickly alert changes show up in /device-status
 alerts = []
+alert_index = AlertIndex()  # Lookups by id, device, severity band and day
 failures = []  # Initialize as empty list
 settings = {
     "thresholds": {
@@ -67,30 +148,66 @@ settings = {
 settings_lock = Lock()
 
 # Add after other global variables
-ALERTS_FILE = "alerts.json"
+ALERTS_FILE = os.getenv("ALERTS_FILE", "alerts.json")  # Snapshot written by journal compaction
+ALERTS_JOURNAL_FILE = os.getenv("ALERTS_JOURNAL_FILE", "alerts.journal.jsonl")
+ALERT_JOURNAL_COMPACT_EVENTS = 1000  # Compact once this many events are journaled
+ALERT_JOURNAL_COMPACT_AGE = 600  # ...or when events are older than this many seconds
+alert_journal = AlertJournal(ALERTS_FILE, ALERTS_JOURNAL_FILE)
 
 # Load environment variables (for OPENAI_API_KEY)
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+def load_openai():
+    import openai
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+openai_client = LazyResource("openai", load_openai)
 
 # Track last alert time per device to avoid spamming
 last_alert_times = {}
+last_anomaly_alert_times = {}  # (device_id, sensor_type) -> time of the last sensor anomaly alert
 ALERT_GENERATION_COOLDOWN = 300  # 1 hour between alerts per device
 
 def save_alerts_to_disk():
-    """Save alerts to disk"""
+    """Write a full alerts snapshot to disk and truncate the journal"""
     try:
-        with open(ALERTS_FILE, 'w') as f:
-            json.dump(alerts, f, default=str)
+        alert_journal.compact(alerts)
     except Exception as e:
         print(f"Error saving alerts to disk: {str(e)}")
 
+def journal_alert_created(alert):
+    """Persist a new alert by appending it to the journal"""
+    try:
+        alert_journal.record_created(alert)
+    except Exception as e:
+        print(f"Error journaling alert: {str(e)}")
+
+def journal_alert_updated(alert_id, changes):
+    """Persist changed alert fields by appending them to the journal"""
+    try:
+        alert_journal.record_updated(alert_id, changes)
+    except Exception as e:
+        print(f"Error journaling alert update: {str(e)}")
+
+def add_alert(alert):
+    """Record a new alert in memory, in the index and in the journal"""
+    alerts.append(alert)
+    alert_index.add(alert)
+    journal_alert_created(alert)
+    device_status_snapshot.mark_dirty(alert.get("device_id"))
+
+def update_alert(alert_id, changes):
+    """Apply field changes to an alert, keeping the index and journal in sync"""
+    alert = alert_index.update(alert_id, changes)
+    journal_alert_updated(alert_id, changes)
+    device_status_snapshot.mark_dirty(alert.get("device_id"))
+    return alert
+
 def load_alerts_from_disk():
-    """Load alerts from disk"""
+    """Load alerts from disk (snapshot plus journal replay)"""
     try:
-        if os.path.exists(ALERTS_FILE):
-            with open(ALERTS_FILE, 'r') as f:
-                return json.load(f)
+        return alert_journal.load()
     except Exception as e:
         print(f"Error loading alerts from disk: {str(e)}")
     return []
@@ -123,6 +240,70 @@ def generate_mock_alerts():
         mock_alerts.append(alert)
     return mock_alerts
 
+def generate_device_readings(device_id, current_time):
+    """Generate 10 mock readings for a device ending at current_time, oldest first"""
+    readings = []
+    base_values = devices[device_id]["sensors"]
+    
+    # Generate readings from oldest to newest
+    for i in range(9, -1, -1):  # 9 to 0, to generate oldest to newest
+        reading_time = current_time - timedelta(minutes=i*5)
+        reading = {
+            "timestamp": reading_time.strftime("%H:%M"),
+            "raw_timestamp": reading_time.isoformat()
+        }
+        
+        # Add each sensor with device-specific variations
+        for sensor_name, base_value in base_values.items():
+            # Generate variations based on device type and sensor
+            variation = 0
+            if devices[device_id]["type"].lower() == "hvac":
+                if sensor_name == "temperature":
+                    variation = random.uniform(-2, 2)
+                elif sensor_name == "humidity":
+                    variation = random.uniform(-5, 5)
+                else:
+                    variation = random.uniform(-0.1, 0.1) * base_value
+            elif devices[device_id]["type"].lower() == "power":
+                if sensor_name in ["voltage", "current"]:
+                    variation = random.uniform(-0.05, 0.05) * base_value
+                else:
+                    variation = random.uniform(-0.1, 0.1) * base_value
+            elif devices[device_id]["type"].lower() == "network":
+                if sensor_name == "packet_loss":
+                    variation = random.uniform(-0.01, 0.01)
+                elif sensor_name == "bandwidth":
+                    variation = random.uniform(-50, 50)
+                else:
+                    variation = random.uniform(-0.1, 0.1) * base_value
+            elif devices[device_id]["type"].lower() == "storage":
+                if sensor_name == "disk_usage":
+                    variation = random.uniform(-0.5, 0.5)
+                elif sensor_name == "read_latency":
+                    variation = random.uniform(-0.2, 0.2)
+                else:
+                    variation = random.uniform(-0.1, 0.1) * base_value
+            else:
+                variation = random.uniform(-0.1, 0.1) * base_value
+            
+            # Ensure values stay within reasonable bounds
+            if sensor_name == "temperature":
+                reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
+            elif sensor_name == "humidity":
+                reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
+            elif sensor_name == "packet_loss":
+                reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
+            elif sensor_name == "disk_usage":
+                reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
+            elif sensor_name == "fuel_level":
+                reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
+            else:
+                reading[sensor_name] = round(base_value + variation, 2)
+        
+        readings.append(reading)
+    
+    return readings
+
 def generate_sensor_history(device_id=None):
     """Generate mock sensor history for each device or a specific device if device_id is provided"""
     current_time = datetime.now()
@@ -133,72 +314,14 @@ def generate_sensor_history(device_id=None):
         device_ids = devices.keys()
 
     for device_id in device_ids:
-        sensor_history[device_id] = []
-        base_values = devices[device_id]["sensors"]
-        
-        # Generate readings from oldest to newest
-        for i in range(9, -1, -1):  # 9 to 0, to generate oldest to newest
-            reading_time = current_time - timedelta(minutes=i*5)
-            reading = {
-                "timestamp": reading_time.strftime("%H:%M"),
-                "raw_timestamp": reading_time.isoformat(),
-                "index": 9-i  # Add index for proper ordering
-            }
-            
-            # Add each sensor with device-specific variations
-            for sensor_name, base_value in base_values.items():
-                # Generate variations based on device type and sensor
-                variation = 0
-                if devices[device_id]["type"].lower() == "hvac":
-                    if sensor_name == "temperature":
-                        variation = random.uniform(-2, 2)
-                    elif sensor_name == "humidity":
-                        variation = random.uniform(-5, 5)
-                    else:
-                        variation = random.uniform(-0.1, 0.1) * base_value
-                elif devices[device_id]["type"].lower() == "power":
-                    if sensor_name in ["voltage", "current"]:
-                        variation = random.uniform(-0.05, 0.05) * base_value
-                    else:
-                        variation = random.uniform(-0.1, 0.1) * base_value
-                elif devices[device_id]["type"].lower() == "network":
-                    if sensor_name == "packet_loss":
-                        variation = random.uniform(-0.01, 0.01)
-                    elif sensor_name == "bandwidth":
-                        variation = random.uniform(-50, 50)
-                    else:
-                        variation = random.uniform(-0.1, 0.1) * base_value
-                elif devices[device_id]["type"].lower() == "storage":
-                    if sensor_name == "disk_usage":
-                        variation = random.uniform(-0.5, 0.5)
-                    elif sensor_name == "read_latency":
-                        variation = random.uniform(-0.2, 0.2)
-                    else:
-                        variation = random.uniform(-0.1, 0.1) * base_value
-                else:
-                    variation = random.uniform(-0.1, 0.1) * base_value
-                
-                # Ensure values stay within reasonable bounds
-                if sensor_name == "temperature":
-                    reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
-                elif sensor_name == "humidity":
-                    reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
-                elif sensor_name == "packet_loss":
-                    reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
-                elif sensor_name == "disk_usage":
-                    reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
-                elif sensor_name == "fuel_level":
-                    reading[sensor_name] = round(max(0, min(100, base_value + variation)), 2)
-                else:
-                    reading[sensor_name] = round(base_value + variation, 2)
-            
-            sensor_history[device_id].append(reading)
-        
-        # Sort by index to ensure proper ordering (oldest to newest)
-        sensor_history[device_id].sort(key=lambda x: x["index"])
-        # Remove the index field as it's no longer needed
-        for reading in sensor_history[device_id]:
-            reading.pop("index", None)
+        sensor_history.reset(device_id)
+        prediction_cache.invalidate(device_id)
+        feature_states.reset(device_id)
+        breach_rates.reset(device_id)
+        anomaly_detector.reset(device_id)
+        readings = generate_device_readings(device_id, current_time)
+        sensor_history.extend(device_id, readings)
+        anomaly_detector.observe_readings(device_id, readings)
     
     return sensor_history
 
@@ -247,6 +370,7 @@ def init_mock_data():
     if not alerts:
         alerts = generate_mock_alerts()
         save_alerts_to_disk()
+    alert_index.rebuild(alerts)
     
     # Rest of the function remains the same
     devices = {
@@ -342,8 +466,14 @@ def init_mock_data():
         }
     }
     
+    sensor_history.reset()
+    prediction_cache.invalidate()
+    feature_states.reset()
+    breach_rates.reset()
+    anomaly_detector.reset()
     sensor_history = generate_sensor_history()
     failures = generate_mock_failures()
+    device_status_snapshot.mark_dirty()
 
 # Initialize mock data when the server starts
 init_mock_data()
@@ -371,6 +501,7 @@ class AlertResponse(BaseModel):
     message: str
     details: dict
     acknowledged: bool = False
+    model_version: Optional[str] = None
 
 class ThresholdSettings(BaseModel):
     warning: float
@@ -441,31 +572,44 @@ async def root():
 
 @app.get("/device-status", summary="Get Device Statuses", description="Retrieve the current status and health of all devices, including operational state and active alerts.")
 async def get_device_status():
-    """Get current status of all devices"""
+    """Get current status of all devices from the latest precomputed snapshot"""
     try:
-        # Update statuses before returning
-        predictions = await get_predictions()
-        for device_id in devices:
-            status_info = update_device_status(device_id, alerts, predictions)
-            devices[device_id]["status"] = status_info["status"]
-            devices[device_id]["status_message"] = status_info["message"]
-        return devices
+        snapshot = device_status_snapshot.current
+        if snapshot is None:
+            snapshot = publish_device_status_snapshot()
+        version, generated_at, body = snapshot
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"X-Status-Version": str(version), "X-Status-Generated-At": generated_at, "ETag": f'"{version}"'}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Function to simulate sensor data update
 def update_sensor_data_periodically():
+    current_time = datetime.now()
     for device_id in devices.keys():
         # Simulate new sensor data
-        new_data = generate_sensor_history()[device_id]
-        
-        # Append new data to existing sensor history without altering previous data
-        existing_timestamps = {reading['raw_timestamp'] for reading in sensor_history[device_id]}
-        new_data = [reading for reading in new_data if reading['raw_timestamp'] not in existing_timestamps]
-        sensor_history[device_id].extend(new_data)
-        
-        # Sort by timestamp to ensure proper ordering
-        sensor_history[device_id].sort(key=lambda x: x['raw_timestamp'])
+        new_data = generate_device_readings(device_id, current_time)
+        
+        # Append new data to existing sensor history without altering previous data;
+        # the store keeps every reading in time order
+        new_data = [reading for reading in new_data
+                    if not sensor_history.has_timestamp(device_id, reading["raw_timestamp"])]
+        latest = sensor_history.latest(device_id)
+        in_order = latest is None or all(to_micros(reading["raw_timestamp"]) >= latest for reading in new_data)
+        if sensor_history.extend(device_id, new_data):
+            prediction_cache.invalidate(device_id)
+            if in_order:
+                rows = readings_to_model_rows(device_id, new_data)
+                feature_states.add_readings(device_id, rows)
+                breach_rates.add(device_id, [row["threshold_breach"] for row in rows])
+            else:
+                # Late readings landed inside the history; rebuild the rolling state from it on next use
+                feature_states.reset(device_id)
+                breach_rates.reset(device_id)
+            anomaly_detector.observe_readings(device_id, new_data)
 
 def get_status_message(status, device_id, alerts, predictions):
     """Get detailed message for device status"""
@@ -527,51 +671,87 @@ def get_status_message(status, device_id, alerts, predictions):
         print(f"Error getting status message: {str(e)}")
         return "Unable to determine status message"
 
-def update_device_status(device_id, alerts, predictions):
+def update_device_status(device_id, predictions):
     """Update device status based on alerts only"""
     try:
         # Get all alerts for this device
-        device_alerts = [a for a in alerts if a["device_id"] == device_id]
+        device_alerts = alert_index.by_device(device_id)
         
         # Check for critical alerts
         critical_alerts = [a for a in device_alerts if a["severity"] >= 7 and not a.get("resolved", False)]
         if critical_alerts:
             status = "critical"
-            message = get_status_message(status, device_id, alerts, predictions)
+            message = get_status_message(status, device_id, device_alerts, predictions)
             return {"status": status, "message": message}
             
         # Check for warning alerts
         warning_alerts = [a for a in device_alerts if 4 <= a["severity"] < 7 and not a.get("resolved", False)]
         if warning_alerts:
             status = "warning"
-            message = get_status_message(status, device_id, alerts, predictions)
+            message = get_status_message(status, device_id, device_alerts, predictions)
             return {"status": status, "message": message}
         
         # Default to operational if no alerts
         status = "operational"
-        message = get_status_message(status, device_id, alerts, predictions)
+        message = get_status_message(status, device_id, device_alerts, predictions)
         return {"status": status, "message": message}
     except Exception as e:
         print(f"Error updating device status: {str(e)}")
         return {"status": "unknown", "message": "Unable to determine status"}
 
+def refresh_device_statuses(device_ids, predictions=()):
+    """Recompute status and status message of the given devices in place"""
+    for device_id in device_ids:
+        if device_id in devices:
+            status_info = update_device_status(device_id, predictions)
+            devices[device_id]["status"] = status_info["status"]
+            devices[device_id]["status_message"] = status_info["message"]
+
+def publish_device_status_snapshot():
+    """Refresh devices marked dirty and publish a new /device-status snapshot"""
+    refresh_all, dirty = device_status_snapshot.take_dirty()
+    refresh_device_statuses(list(devices) if refresh_all else dirty)
+    return device_status_snapshot.publish(devices)
+
+async def publish_device_status_snapshot_async():
+    """Like publish_device_status_snapshot, serializing a copy off the event loop"""
+    refresh_all, dirty = device_status_snapshot.take_dirty()
+    refresh_device_statuses(list(devices) if refresh_all else dirty)
+    payload = {device_id: dict(device) for device_id, device in devices.items()}
+    return await asyncio.to_thread(device_status_snapshot.publish, payload)
+
 # Schedule the periodic update every 30 seconds
 @app.on_event("startup")
 @repeat_every(seconds=30)
 async def periodic_sensor_update_task() -> None:
     update_sensor_data_periodically()
     
-    # Update device statuses
+    # Update device statuses and rebuild the status snapshot
     predictions = await get_predictions()
-    for device_id in devices:
-        status_info = update_device_status(device_id, alerts, predictions)
-        devices[device_id]["status"] = status_info["status"]
-        devices[device_id]["status_message"] = status_info["message"]
+    refresh_device_statuses(devices, predictions)
+    await publish_device_status_snapshot_async()
+
+@app.on_event("startup")
+@repeat_every(seconds=DEVICE_STATUS_REFRESH_SECONDS)
+async def periodic_device_status_snapshot() -> None:
+    if device_status_snapshot.is_dirty:
+        await publish_device_status_snapshot_async()
+
+@app.on_event("startup")
+@repeat_every(seconds=MODEL_RELOAD_SECONDS)
+async def periodic_model_reload() -> None:
+    # Until the first load the lazy loader already picks up the promoted version
+    if not predictive_model.loaded:
+        return
+    try:
+        await reload_promoted_model()
+    except Exception as e:
+        print(f"Error reloading promoted model: {str(e)}")
 
 @app.get("/sensor-data", summary="Get All Sensor Data", description="Return the complete sensor history for all devices.")
 async def get_sensor_data():
     # Return the updated sensor history
-    return sensor_history
+    return sensor_history.as_dict()
 
 @app.get("/devices", summary="List Devices", description="Get a list of all registered devices in the system.")
 async def get_devices():
@@ -586,6 +766,7 @@ async def get_device(device_id: str):
 @app.post("/devices", summary="Create Device", description="Register a new device in the system.")
 async def create_device(device: Device):
     devices[device.id] = device.dict()
+    device_status_snapshot.mark_dirty(device.id)
     return device
 
 @app.get("/alerts", summary="List Alerts", description="Get all alerts, with optional filtering by severity, device, and resolution status.")
@@ -596,17 +777,11 @@ async def get_alerts(
 ):
     """Get all alerts with optional filtering"""
     try:
-        filtered_alerts = alerts
-        if severity:
-            if severity.lower() == "critical":
-                filtered_alerts = [a for a in alerts if a["severity"] >= 7]
-            elif severity.lower() == "warning":
-                filtered_alerts = [a for a in alerts if 4 <= a["severity"] < 7]
-            elif severity.lower() == "info":
-                filtered_alerts = [a for a in alerts if a["severity"] < 4]
-        
-        if device_id:
-            filtered_alerts = [a for a in filtered_alerts if a["device_id"] == device_id]
+        band = severity.lower() if severity and severity.lower() in SEVERITY_BANDS else None
+        if band or device_id:
+            filtered_alerts = alert_index.filter(band=band, device_id=device_id or None)
+        else:
+            filtered_alerts = alerts
         
         if not include_resolved:
             filtered_alerts = [a for a in filtered_alerts if not a.get("acknowledged", False)]
@@ -637,8 +812,10 @@ async def predict(request: PredictionRequest, background_tasks: BackgroundTasks)
         sensor_df = pd.DataFrame(request.sensor_data)
         log_df = pd.DataFrame(request.log_data)
         
-        # Make predictions
-        predictions = model.predict(sensor_df, log_df)
+        # Build windows off the event loop, then score them in a shared micro-batch
+        loaded_model = await predictive_model.aget()
+        X = await asyncio.to_thread(loaded_model.prepare_windows, sensor_df, log_df)
+        predictions = await inference_batcher.predict(X, loaded_model)
         
         # Generate alerts
         new_alerts = []
@@ -649,6 +826,7 @@ async def predict(request: PredictionRequest, background_tasks: BackgroundTasks)
                     "timestamp": datetime.now().isoformat(),
                     "device_id": request.device_id,
                     "alert_type": "PREDICTIVE_MAINTENANCE",
+                    "type": "critical" if int(pred * 10) >= 7 else "warning",
                     "severity": int(pred * 10),  # Scale to 1-10
                     "message": f"High probability of device failure detected",
                     "details": {
@@ -656,17 +834,16 @@ async def predict(request: PredictionRequest, background_tasks: BackgroundTasks)
                         "sensor_readings": sensor_df.iloc[i].to_dict(),
                         "recommended_action": "Schedule maintenance check"
                     },
-                    "acknowledged": False
+                    "acknowledged": False,
+                    "model_version": loaded_model.model_version
                 }
                 new_alerts.append(alert)
-                alerts.append(alert)
-        
-        # Save alerts to disk
-        save_alerts_to_disk()
+                add_alert(alert)
         
         # Update device status
         if request.device_id in devices:
             devices[request.device_id]["last_check"] = datetime.now()
+            device_status_snapshot.mark_dirty(request.device_id)
             if any(a["severity"] > 7 for a in new_alerts):
                 devices[request.device_id]["status"] = "warning"
         
@@ -681,21 +858,22 @@ async def predict(request: PredictionRequest, background_tasks: BackgroundTasks)
 async def acknowledge_alert(alert_id: str, data: dict):
     """Acknowledge an alert and save resolution notes"""
     try:
-        for alert in alerts:
-            if alert["id"] == alert_id:
-                alert["acknowledged"] = True
-                alert["resolved"] = True
-                alert["resolution_notes"] = data.get("notes") or "No specific resolution notes provided"
-                alert["resolution_timestamp"] = data.get("resolution_timestamp") or datetime.now().isoformat()
-                alert["resolved_by"] = data.get("resolved_by", "System")
-                
-                # Save changes to disk
-                save_alerts_to_disk()
-                
-                return {
-                    "message": "Alert acknowledged and resolved",
-                    "alert": alert
-                }
+        if alert_id in alert_index:
+            changes = {
+                "acknowledged": True,
+                "resolved": True,
+                "resolution_notes": data.get("notes") or "No specific resolution notes provided",
+                "resolution_timestamp": data.get("resolution_timestamp") or datetime.now().isoformat(),
+                "resolved_by": data.get("resolved_by", "System")
+            }
+            
+            # Save changes to disk
+            alert = update_alert(alert_id, changes)
+            
+            return {
+                "message": "Alert acknowledged and resolved",
+                "alert": alert
+            }
         raise HTTPException(status_code=404, detail="Alert not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -704,7 +882,7 @@ async def acknowledge_alert(alert_id: str, data: dict):
 async def get_alert_notes(alert_id: str):
     """Get resolution notes for an alert"""
     try:
-        alert = next((a for a in alerts if a["id"] == alert_id), None)
+        alert = alert_index.get(alert_id)
         if alert:
             return {
                 "notes": alert.get("resolution_notes", ""),
@@ -723,6 +901,9 @@ async def get_settings():
 async def update_settings(new_settings: Settings):
     with settings_lock:
         settings.update(new_settings.dict())
+    # Model rows depend on the thresholds, so rebuild feature states and breach rates from the history
+    feature_states.reset()
+    breach_rates.reset()
     return settings
 
 @app.get("/health", summary="Health Check", description="Check the health status of the API, model, and data.")
@@ -730,6 +911,14 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": model.model is not None,
+        "model_version": model.model_version,
+        "inference_backend": model.inference_backend,
+        "loading": {
+            "predictive_model": predictive_model.status(),
+            "gemini_client": gemini_client.status(),
+            "openai": openai_client.status(),
+            "inference_pool": inference_pool.status() if inference_pool is not None else "disabled"
+        },
         "timestamp": datetime.now().isoformat(),
         "device_count": len(devices),
         "alert_count": len(alerts)
@@ -753,30 +942,52 @@ load_dotenv()
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 if gemini_api_key:
     os.environ["GEMINI_API_KEY"] = gemini_api_key
-# Initialize Gemini client
-client = genai.Client()
+# Gemini client is created on the first chat request
+def create_gemini_client():
+    from google import genai
+    return genai.Client()
+
+gemini_client = LazyResource("gemini_client", create_gemini_client)
+
+AI_CHAT_MODEL = "gemini-2.5-flash"  # or "gemini-1.5-pro-latest" if preferred
+AI_CHAT_MAX_CONCURRENCY = int(os.getenv("AI_CHAT_MAX_CONCURRENCY", "8"))  # Gemini calls in flight at once
+AI_CHAT_TIMEOUT = float(os.getenv("AI_CHAT_TIMEOUT", "30"))  # Seconds, including time spent queued
+
+def generate_chat_response(prompt: str) -> str:
+    """Blocking Gemini call; only run through llm_gateway"""
+    response = gemini_client.get().models.generate_content(
+        model=AI_CHAT_MODEL,
+        contents=prompt
+    )
+    return response.text.strip()
+
+llm_gateway = LLMGateway(generate_chat_response, max_concurrency=AI_CHAT_MAX_CONCURRENCY, timeout=AI_CHAT_TIMEOUT)
+
+AI_CHAT_CACHE_SIZE = int(os.getenv("AI_CHAT_CACHE_SIZE", "256"))
+AI_CHAT_CACHE_TTL = float(os.getenv("AI_CHAT_CACHE_TTL", "300"))  # Seconds
+chat_response_cache = TTLCache(maxsize=AI_CHAT_CACHE_SIZE, ttl=AI_CHAT_CACHE_TTL)
+
+AI_CHAT_CONTEXT_TOP_K = int(os.getenv("AI_CHAT_CONTEXT_TOP_K", "25"))  # Alerts quoted in full in the prompt
+AI_CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CHAT_CONTEXT_TOKEN_BUDGET", "2000"))  # Estimated tokens for alert context
+
+def normalize_chat_message(message: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a chat query"""
+    return re.sub(r"\s+", " ", message.lower()).strip().rstrip("?!. ")
 
 @app.get("/alerts/statistics", summary="Get Alert Statistics", description="Get accurate statistics for all alerts by severity and status.")
 async def get_alert_statistics():
     """Get accurate alert statistics"""
     try:
-        # Load alerts from disk to ensure we have the latest data
-        current_alerts = load_alerts_from_disk()
-        
-        # Calculate statistics using the same logic as frontend
-        total_alerts = len(current_alerts)
-        critical_alerts = len([a for a in current_alerts if a["severity"] >= 7 and not a.get("acknowledged", False)])
-        warning_alerts = len([a for a in current_alerts if 4 <= a["severity"] < 7 and not a.get("acknowledged", False)])
-        info_alerts = len([a for a in current_alerts if a["severity"] < 4 and not a.get("acknowledged", False)])
-        resolved_alerts = len([a for a in current_alerts if a.get("acknowledged", False)])
+        # Running counters kept current by every alert create/update
+        stats = alert_index.stats
         
         return {
-            "total": total_alerts,
-            "critical": critical_alerts,
-            "warning": warning_alerts,
-            "info": info_alerts,
-            "resolved": resolved_alerts,
-            "active": total_alerts - resolved_alerts
+            "total": stats.total,
+            "critical": stats.active_by_band["critical"],
+            "warning": stats.active_by_band["warning"],
+            "info": stats.active_by_band["info"],
+            "resolved": stats.resolved,
+            "active": stats.total - stats.resolved
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -786,6 +997,16 @@ async def chat_with_ai(message: ChatMessage):
     user_message = message.message.strip()
     msg = user_message.lower()
     
+    # Only handle help/greeting directly; all other queries (including alerts) use Gemini
+    if "help" in msg or "help me" in msg or "help me with" in msg or "hi" in msg or "hello" in msg or "hi there" in msg or "hello there" in msg:
+        return {"response": "Hi! 👋 I can assist you with the following queries:\n• Show all alerts\n• List critical devices\n• List warning devices\n• List info (operational) devices\n\nJust type your question, for example: 'Show all alerts' or 'List critical devices'."}
+    
+    # Answers stay valid until the alert set changes
+    cache_key = (normalize_chat_message(user_message), alert_index.version)
+    cached_response = chat_response_cache.get(cache_key)
+    if cached_response is not MISSING:
+        return {"response": cached_response}
+    
     # Get accurate alert statistics
     try:
         alert_stats = await get_alert_statistics()
@@ -794,37 +1015,8 @@ async def chat_with_ai(message: ChatMessage):
         alert_stats = {"total": 0, "critical": 0, "warning": 0, "info": 0, "resolved": 0}
         stats_context = "Alert statistics unavailable"
     
-    # Load alerts context with severity-based classification
-    try:
-        with open("alerts.json", "r") as f:
-            alerts_data = json.load(f)
-    except Exception:
-        alerts_data = []
-    
-    # Generate alerts_context using severity-based classification
-    alerts_context_parts = []
-    for a in alerts_data:
-        severity = a.get('severity', 0)
-        # Determine alert type based on severity (same logic as frontend)
-        if severity >= 7:
-            alert_type = "critical"
-        elif severity >= 4:
-            alert_type = "warning"
-        else:
-            alert_type = "info"
-        
-        alerts_context_parts.append(
-            f"- On {a.get('timestamp', '')}, device {a.get('device_name', 'Unknown')} raised a {alert_type} alert "
-            f"(severity {severity}): {a.get('message', '')}. "
-            f"Acknowledged: {a.get('acknowledged', False)}."
-        )
-    
-    alerts_context = "\n".join(alerts_context_parts)
-    print(alerts_context)
-    
-    # Only handle help/greeting directly; all other queries (including alerts) use Gemini
-    if "help" in msg or "help me" in msg or "help me with" in msg or "hi" in msg or "hello" in msg or "hi there" in msg or "hello there" in msg:
-        return {"response": "Hi! 👋 I can assist you with the following queries:\n• Show all alerts\n• List critical devices\n• List warning devices\n• List info (operational) devices\n\nJust type your question, for example: 'Show all alerts' or 'List critical devices'."}
+    # Most relevant alerts in full, the rest summarized per device, within the token budget
+    alerts_context = build_alert_context(alerts, top_k=AI_CHAT_CONTEXT_TOP_K, token_budget=AI_CHAT_CONTEXT_TOKEN_BUDGET)
     
     # Otherwise, use Gemini generative model for all alert-related and open-ended queries
     prompt = (
@@ -850,11 +1042,11 @@ async def chat_with_ai(message: ChatMessage):
         "Response:"
     )
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",  # or "gemini-1.5-pro-latest" if preferred
-            contents=prompt
-        )
-        return {"response": response.text.strip()}
+        response_text = await llm_gateway.complete(prompt)
+        chat_response_cache.set(cache_key, response_text)
+        return {"response": response_text}
+    except asyncio.TimeoutError:
+        return {"response": f"Gemini AI error: no response within {llm_gateway.timeout:g} seconds"}
     except Exception as e:
         return {"response": "Gemini AI error: " + str(e)}
 
@@ -931,12 +1123,12 @@ async def get_alert_trends():
     trends = []
     for i in range(7):
         date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-        day_alerts = [a for a in alerts if a["timestamp"].startswith(date)]
+        day_alerts = alert_index.by_day(date)
         
         trends.append({
             "date": date,
-            "Critical Alerts": len([a for a in day_alerts if a["type"] == "critical"]),
-            "Warning Alerts": len([a for a in day_alerts if a["type"] == "warning"]),
+            "Critical Alerts": len([a for a in day_alerts if a.get("type") == "critical"]),
+            "Warning Alerts": len([a for a in day_alerts if a.get("type") == "warning"]),
             "Info Alerts": 0  # We don't have info alerts in our system
         })
     return trends
@@ -959,9 +1151,8 @@ async def get_device_info(device_id: str):
 async def get_device_sensor_data(device_id: str):
     if device_id not in devices:
         raise HTTPException(status_code=404, detail="Device not found")
-    # Generate sensor history for the specific device
-    device_sensor_data = generate_sensor_history(device_id=device_id)
-    return device_sensor_data.get(device_id, [])
+    history = sensor_history.get(device_id)
+    return history.to_list() if history is not None else []
 
 @app.get("/dashboard/kpis", summary="Dashboard KPIs", description="Get high-level Key Performance Indicators (KPIs) for the dashboard, such as MTBF, MTTR, and OEE.")
 async def get_kpis():
@@ -1009,79 +1200,182 @@ async def get_kpis():
             detail="Failed to calculate KPIs. Please ensure all devices have required metrics."
         )
 
+def readings_to_model_rows(device_id, readings):
+    """Convert wide sensor readings into the single-value rows the model was trained on.
+    
+    Each reading is represented by its most stressed sensor (highest value relative
+    to its critical threshold), flagged as a breach when that sensor is over it.
+    """
+    thresholds = settings["thresholds"]
+    rows = []
+    for reading in readings:
+        sensor_value = 0.0
+        breach = False
+        worst_ratio = None
+        for sensor_name, value in reading.items():
+            if sensor_name not in thresholds or not isinstance(value, (int, float)):
+                continue
+            critical = thresholds[sensor_name]["critical"]
+            ratio = value / critical if critical else 0
+            if worst_ratio is None or ratio > worst_ratio:
+                worst_ratio = ratio
+                sensor_value = value
+                breach = value > critical
+        rows.append({
+            "device_id": device_id,
+            "timestamp": reading.get("timestamp"),
+            "sensor_value": sensor_value,
+            "threshold_breach": breach
+        })
+    return rows
+
+def latest_feature_window(device_id):
+    """Newest model-input window of a device from its incremental feature state.
+    
+    The state is replayed from the sensor history the first time it is needed
+    (and after resets); afterwards each stored reading updates it in place.
+    """
+    state = feature_states.get(device_id)
+    if state is None:
+        # No device logs are collected yet
+        recent_data = sensor_history[device_id][-feature_states.sequence_length:]
+        state = feature_states.rebuild(device_id, readings_to_model_rows(device_id, recent_data))
+    return state.latest_window()
+
+def device_breach_window(device_id):
+    """Rolling breach window of a device, replayed from the sensor history when it has none"""
+    state = breach_rates.get(device_id)
+    if state is None:
+        recent_data = sensor_history[device_id][-breach_rates.window:]
+        state = breach_rates.rebuild(device_id, [row["threshold_breach"] for row in readings_to_model_rows(device_id, recent_data)])
+    return state
+
+async def predict_latest_windows(device_ids):
+    """Score the latest sensor window of every given device with one batched model call.
+    
+    Devices whose window, thresholds and model version are unchanged since the
+    last call are answered from prediction_cache without touching the model.
+    Loading the model and scoring run in a thread, off the event loop.
+    Returns the predictions and the version of the model that made them.
+    """
+    try:
+        loaded_model = await predictive_model.aget()
+    except Exception as e:
+        print(f"Error loading model: {str(e)}")
+        return {}, None
+    
+    results = {}
+    fingerprints = {}
+    windows = {}
+    for device_id in device_ids:
+        if device_id not in sensor_history:
+            continue
+        timestamps, columns = sensor_history.last(device_id, loaded_model.sequence_length)
+        fingerprint = window_fingerprint(timestamps, columns, loaded_model.model_version, settings["thresholds"])
+        cached = prediction_cache.get(device_id, fingerprint)
+        if cached is not None:
+            results[device_id] = cached
+            continue
+        window = latest_feature_window(device_id)
+        if window is not None:
+            fingerprints[device_id] = fingerprint
+            windows[device_id] = window
+    if not windows:
+        return results, loaded_model.model_version
+    
+    try:
+        batch_predictions = await asyncio.to_thread(
+            loaded_model.predict_latest, list(windows), np.stack(list(windows.values())),
+            predict_windows=partial(predict_windows, loaded_model=loaded_model)
+        )
+    except Exception as e:
+        print(f"Error making batched predictions: {str(e)}")
+        return results, loaded_model.model_version
+    for device_id, prediction in batch_predictions.items():
+        prediction_cache.set(device_id, fingerprints[device_id], prediction)
+    results.update(batch_predictions)
+    return results, loaded_model.model_version
+
 @app.get("/dashboard/predictions", summary="Dashboard Predictions", description="Get a list of predicted failures for all devices, including risk scores and estimated time to failure.")
 async def get_predictions():
     """Get list of predicted failures"""
     try:
         predictions = []
-        for device_id, device_data in devices.items():
-            # Only generate predictions for devices with sensor data
-            if device_id in sensor_history and len(sensor_history[device_id]) > 0:
-                recent_data = sensor_history[device_id][-10:]  # Get last 10 readings
-                
-                # Extract sensor values from the data
-                sensor_values = []
-                for reading in recent_data:
-                    if isinstance(reading, dict):
-                        sensor_reading = {}
-                        for key, value in reading.items():
-                            if key not in ['timestamp', 'raw_timestamp']:
-                                sensor_reading[key] = value
-                        sensor_values.append(sensor_reading)
-                    else:
-                        sensor_values.append({
-                            'timestamp': datetime.now().strftime("%H:%M"),
-                            'temperature': random.uniform(20, 30),
-                            'humidity': random.uniform(40, 60),
-                            'vibration': random.uniform(0, 5)
-                        })
-                
-                # Make prediction using the model
-                try:
-                    prediction = model.predict(pd.DataFrame(sensor_values), [])[0]
-                except Exception as e:
-                    print(f"Error making prediction for device {device_id}: {str(e)}")
-                    prediction = random.uniform(0, 1)  # Fallback to random prediction
-                
-                # Calculate time to failure based on prediction
-                time_to_failure = int((1 - prediction) * 30)  # Days until failure
-                
-                # Determine effects based on device type
-                effects = []
-                if device_data["type"].lower() == "hvac":
-                    effects = ["Temperature regulation", "Humidity control", "Air quality"]
-                elif device_data["type"].lower() == "power":
-                    effects = ["Power supply", "Voltage stability", "Current regulation"]
-                elif device_data["type"].lower() == "network":
-                    effects = ["Network connectivity", "Data transfer", "Communication"]
-                elif device_data["type"].lower() == "storage":
-                    effects = ["Data access", "Storage capacity", "Read/write operations"]
-                
-                # Create prediction with proper timestamp handling
-                current_time = datetime.now()
-                prediction_time = current_time.isoformat()
-                failure_time = (current_time + timedelta(days=time_to_failure)).isoformat()
-                
-                predictions.append({
-                    "id": str(uuid.uuid4()),
-                    "device_id": device_id,
-                    "device_name": device_data["name"],
-                    "prediction_time": prediction_time,
-                    "failure_time": failure_time,
-                    "location": device_data["location"],
-                    "severity": prediction,
-                    "risk_score": prediction * 100,
-                    "component": device_data["type"],
-                    "confidence": random.uniform(0.7, 0.95),
-                    "effects": effects,
-                    "time_since_prediction": 0  # Will be calculated on the frontend
-                })
+        # Only generate predictions for devices with sensor data
+        device_ids = [device_id for device_id in devices if len(sensor_history.get(device_id, [])) > 0]
+        batch_predictions, _ = await predict_latest_windows(device_ids)
+        
+        for device_id in device_ids:
+            device_data = devices[device_id]
+            prediction = batch_predictions.get(device_id)
+            if prediction is None:
+                prediction = random.uniform(0, 1)  # Fallback to random prediction
+            
+            # Calculate time to failure based on prediction
+            time_to_failure = int((1 - prediction) * 30)  # Days until failure
+            
+            # Determine effects based on device type
+            effects = []
+            if device_data["type"].lower() == "hvac":
+                effects = ["Temperature regulation", "Humidity control", "Air quality"]
+            elif device_data["type"].lower() == "power":
+                effects = ["Power supply", "Voltage stability", "Current regulation"]
+            elif device_data["type"].lower() == "network":
+                effects = ["Network connectivity", "Data transfer", "Communication"]
+            elif device_data["type"].lower() == "storage":
+                effects = ["Data access", "Storage capacity", "Read/write operations"]
+            
+            # Create prediction with proper timestamp handling
+            current_time = datetime.now()
+            prediction_time = current_time.isoformat()
+            failure_time = (current_time + timedelta(days=time_to_failure)).isoformat()
+            
+            predictions.append({
+                "id": str(uuid.uuid4()),
+                "device_id": device_id,
+                "device_name": device_data["name"],
+                "prediction_time": prediction_time,
+                "failure_time": failure_time,
+                "location": device_data["location"],
+                "severity": prediction,
+                "risk_score": prediction * 100,
+                "component": device_data["type"],
+                "confidence": random.uniform(0.7, 0.95),
+                "effects": effects,
+                "time_since_prediction": 0  # Will be calculated on the frontend
+            })
         
         return predictions
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+ENV_DESCRIPTION_CONCURRENCY = 4  # OpenAI description requests in flight at once
+ENV_DESCRIPTION_TIMEOUT = 5.0  # Seconds per description, including the wait for a slot
+ENV_DESCRIPTION_CACHE_TTL = 900  # Seconds a generated description is reused
+env_description_semaphore = asyncio.Semaphore(ENV_DESCRIPTION_CONCURRENCY)
+env_description_cache = TTLCache(maxsize=512, ttl=ENV_DESCRIPTION_CACHE_TTL)
+
+def fallback_description(alert_type, severity, impact, affected_devices):
+    return f"{alert_type.capitalize()} alert affecting {', '.join(affected_devices)}. Severity: {severity}. Impact: {', '.join(impact)}."
+
+async def request_gpt_description(prompt):
+    async with env_description_semaphore:
+        client = await openai_client.aget()
+        response = await client.ChatCompletion.acreate(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=60,
+            temperature=0.7
+        )
+        return response.choices[0].message['content'].strip()
+
 async def generate_gpt_description(alert_type, severity, impact, affected_devices):
+    # Devices in sorted order, so the text matches the cache key whatever order they came in
+    affected_devices = sorted(affected_devices)
+    cache_key = (alert_type, severity, tuple(impact), tuple(affected_devices))
+    cached_description = env_description_cache.get(cache_key)
+    if cached_description is not MISSING:
+        return cached_description
     prompt = f"""
 Generate a concise, professional, and context-aware description for an environmental alert in a predictive maintenance system.
 Alert Type: {alert_type}
@@ -1090,16 +1384,15 @@ Impact: {', '.join(impact)}
 Affected Devices: {', '.join(affected_devices)}
 Description: """
     try:
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=60,
-            temperature=0.7
-        )
-        return response.choices[0].message['content'].strip()
+        description = await asyncio.wait_for(request_gpt_description(prompt), ENV_DESCRIPTION_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"GPT description timed out after {ENV_DESCRIPTION_TIMEOUT:g}s")
+        return fallback_description(alert_type, severity, impact, affected_devices)
     except Exception as e:
         print(f"Error generating GPT description: {e}")
-        return f"{alert_type.capitalize()} alert affecting {', '.join(affected_devices)}. Severity: {severity}. Impact: {', '.join(impact)}."
+        return fallback_description(alert_type, severity, impact, affected_devices)
+    env_description_cache.set(cache_key, description)
+    return description
 
 @app.get("/dashboard/environmental", summary="Environmental Alerts", description="Retrieve environmental and unexpected issue alerts, such as weather or power events.")
 async def get_environmental_alerts():
@@ -1117,11 +1410,8 @@ async def get_environmental_alerts():
             "start_time": datetime.now().isoformat(),
             "end_time": (datetime.now() + timedelta(hours=2)).isoformat(),
             "impact": ["Temperature", "Humidity", "Air pressure"],
-            "affected_devices": random.sample(device_ids, min(3, len(device_ids)))
+            "affected_devices": sorted(random.sample(device_ids, min(3, len(device_ids))))
         }
-        weather_alert["description"] = await generate_gpt_description(
-            weather_alert["type"], weather_alert["severity"], weather_alert["impact"], weather_alert["affected_devices"]
-        )
         alerts.append(weather_alert)
 
         power_alert = {
@@ -1131,11 +1421,8 @@ async def get_environmental_alerts():
             "start_time": datetime.now().isoformat(),
             "end_time": (datetime.now() + timedelta(hours=1)).isoformat(),
             "impact": ["Power supply", "Voltage stability"],
-            "affected_devices": random.sample(device_ids, min(2, len(device_ids)))
+            "affected_devices": sorted(random.sample(device_ids, min(2, len(device_ids))))
         }
-        power_alert["description"] = await generate_gpt_description(
-            power_alert["type"], power_alert["severity"], power_alert["impact"], power_alert["affected_devices"]
-        )
         alerts.append(power_alert)
 
         # Sensor issues (if any)
@@ -1152,10 +1439,15 @@ async def get_environmental_alerts():
                         "impact": ["Data collection", "Monitoring"],
                         "affected_devices": [device_id]
                     }
-                    sensor_alert["description"] = await generate_gpt_description(
-                        sensor_alert["type"], sensor_alert["severity"], sensor_alert["impact"], sensor_alert["affected_devices"]
-                    )
                     alerts.append(sensor_alert)
+
+        # Fetch every description concurrently; each call falls back after its own deadline
+        descriptions = await asyncio.gather(*(
+            generate_gpt_description(a["type"], a["severity"], a["impact"], a["affected_devices"])
+            for a in alerts
+        ))
+        for alert, description in zip(alerts, descriptions):
+            alert["description"] = description
         return alerts
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1187,17 +1479,21 @@ async def get_sensor_health():
                                 "end": end.isoformat()
                             })
                     
-                    # Determine sensor status
+                    # Determine sensor status; the latest reading being anomalous makes it critical
+                    anomaly_state = anomaly_detector.state(device_id, sensor_type)
+                    anomaly_score = anomaly_state.last_score if anomaly_state is not None else np.nan
                     status = "healthy"
                     if len(data_gaps) > 0:
                         status = "warning"
-                    if random.random() < 0.1:  # 10% chance of critical status
+                    if anomaly_detector.is_anomalous(device_id, sensor_type):
                         status = "critical"
                     
                     sensors.append({
                         "device_id": device_id,
                         "sensor_type": sensor_type,
                         "status": status,
+                        "anomaly_score": None if np.isnan(anomaly_score) else round(anomaly_score, 2),
+                        "anomaly_count": anomaly_state.anomaly_count if anomaly_state is not None else 0,
                         "last_calibration": last_calibration.isoformat(),
                         "next_calibration": next_calibration.isoformat(),
                         "data_gaps": data_gaps
@@ -1446,7 +1742,7 @@ async def get_prediction_analysis(alert_id: str):
     """Get detailed analysis for a specific alert"""
     try:
         # Find the alert
-        alert = next((a for a in alerts if a["id"] == alert_id), None)
+        alert = alert_index.get(alert_id)
         if not alert:
             # Return default analysis data if alert not found
             return PredictionAnalysis(
@@ -1523,24 +1819,46 @@ async def get_prediction_analysis(alert_id: str):
 async def move_to_maintenance(alert_id: str):
     """Move an alert to maintenance tab"""
     try:
-        alert = next((a for a in alerts if a["id"] == alert_id), None)
+        alert = alert_index.get(alert_id)
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
         
         # Update alert status to indicate it's moved to maintenance
-        alert["moved_to_maintenance"] = True
-        alert["maintenance_timestamp"] = datetime.now().isoformat()
+        update_alert(alert_id, {
+            "moved_to_maintenance": True,
+            "maintenance_timestamp": datetime.now().isoformat()
+        })
         
         return {"message": "Alert moved to maintenance successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/maintenance/predictions", summary="Fleet Maintenance Predictions", description="Get the rolling threshold-breach rate and maintenance recommendation of every device in one call.")
+async def get_maintenance_predictions():
+    """Maintenance recommendation per device from its incrementally kept breach rate"""
+    try:
+        predictions = []
+        for device_id, device in devices.items():
+            state = device_breach_window(device_id)
+            rate = state.rate
+            predictions.append({
+                "device_id": device_id,
+                "device_name": device.get("name"),
+                "breach_rate": None if rate is None or np.isnan(rate) else round(rate, 4),
+                "readings": state.readings,
+                "window": state.window,
+                "recommendation": state.recommendation()
+            })
+        return predictions
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/maintenance/plan/{alert_id}", summary="Maintenance Plan", description="Retrieve a maintenance plan for a specific alert, including steps, tools, and skill level required.")
 async def get_maintenance_plan(alert_id: str):
     """Get maintenance plan for an alert"""
     try:
         # Find the alert
-        alert = next((a for a in alerts if a["id"] == alert_id), None)
+        alert = alert_index.get(alert_id)
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
 
@@ -1679,10 +1997,11 @@ async def get_dashboard_statistics():
     """Get dashboard statistics"""
     try:
         # Calculate statistics
-        total_alerts = len(alerts)
-        critical_alerts = len([a for a in alerts if a["severity"] >= 7 and not a.get("acknowledged", False)])
-        warning_alerts = len([a for a in alerts if 4 <= a["severity"] < 7 and not a.get("acknowledged", False)])
-        resolved_alerts = len([a for a in alerts if a.get("acknowledged", False)])
+        stats = alert_index.stats
+        total_alerts = stats.total
+        critical_alerts = stats.active_by_band["critical"]
+        warning_alerts = stats.active_by_band["warning"]
+        resolved_alerts = stats.resolved
         
         # Calculate device statistics
         total_devices = len(devices)
@@ -1732,7 +2051,7 @@ async def get_device_metrics():
                         }
             
             # Get device alerts
-            device_alerts = [a for a in alerts if a["device_id"] == device_id]
+            device_alerts = alert_index.by_device(device_id)
             
             metrics.append({
                 "device_id": device_id,
@@ -1755,14 +2074,12 @@ async def get_device_metrics():
 async def get_alert_analysis():
     """Get alert analysis for reports"""
     try:
-        # Get all alerts
-        all_alerts = alerts.copy()
-        
         # Calculate alert statistics
-        total_alerts = len(all_alerts)
-        critical_alerts = len([a for a in all_alerts if a["severity"] >= 7])
-        warning_alerts = len([a for a in all_alerts if 4 <= a["severity"] < 7])
-        resolved_alerts = len([a for a in all_alerts if a.get("acknowledged", False)])
+        stats = alert_index.stats
+        total_alerts = stats.total
+        critical_alerts = stats.by_band["critical"]
+        warning_alerts = stats.by_band["warning"]
+        resolved_alerts = stats.resolved
         
         # Calculate alert trends
         now = datetime.now()
@@ -1770,33 +2087,24 @@ async def get_alert_analysis():
         alert_trends = []
         
         for date in last_7_days:
-            day_alerts = [a for a in all_alerts if a["timestamp"].startswith(date)]
+            day_counts = stats.day(date)
             alert_trends.append({
                 "date": date,
-                "total": len(day_alerts),
-                "critical": len([a for a in day_alerts if a["severity"] >= 7]),
-                "warning": len([a for a in day_alerts if 4 <= a["severity"] < 7]),
-                "resolved": len([a for a in day_alerts if a.get("acknowledged", False)])
+                "total": day_counts["total"],
+                "critical": day_counts["critical"],
+                "warning": day_counts["warning"],
+                "resolved": day_counts["resolved"]
             })
         
         # Calculate device-wise alert distribution
         device_alerts = {}
-        for alert in all_alerts:
-            device_id = alert["device_id"]
-            if device_id not in device_alerts:
-                device_alerts[device_id] = {
-                    "total": 0,
-                    "critical": 0,
-                    "warning": 0,
-                    "resolved": 0
-                }
-            device_alerts[device_id]["total"] += 1
-            if alert["severity"] >= 7:
-                device_alerts[device_id]["critical"] += 1
-            elif alert["severity"] >= 4:
-                device_alerts[device_id]["warning"] += 1
-            if alert.get("acknowledged", False):
-                device_alerts[device_id]["resolved"] += 1
+        for device_id, counts in stats.by_device.items():
+            device_alerts[device_id] = {
+                "total": counts["total"],
+                "critical": counts["critical"],
+                "warning": counts["warning"],
+                "resolved": counts["resolved"]
+            }
         
         return {
             "summary": {
@@ -1885,22 +2193,10 @@ async def periodic_alert_generation():
     try:
         now = datetime.now()
         new_alerts = []
-        for device_id, device_data in devices.items():
-            # Get recent sensor data for this device
-            recent_data = sensor_history.get(device_id, [])[-10:]
-            if not recent_data:
-                continue
-            sensor_df = pd.DataFrame(recent_data)
-            # Use empty log data for now
-            log_df = pd.DataFrame([])
-            # Predict
-            try:
-                predictions = model.predict(sensor_df, log_df)
-            except Exception as e:
-                print(f"ML prediction error for {device_id}: {e}")
-                continue
-            # Only consider the last prediction
-            pred = predictions[-1] if len(predictions) else 0
+        # Score the latest window of every device in one batch
+        batch_predictions, model_version = await predict_latest_windows(list(devices.keys()))
+        for device_id, pred in batch_predictions.items():
+            recent_data = sensor_history[device_id][-model.sequence_length:]
             if pred > 0.7:
                 # Check cooldown
                 last_time = last_alert_times.get(device_id)
@@ -1911,28 +2207,104 @@ async def periodic_alert_generation():
                     "timestamp": now.isoformat(),
                     "device_id": device_id,
                     "alert_type": "PREDICTIVE_MAINTENANCE",
+                    "type": "critical" if int(pred * 10) >= 7 else "warning",
                     "severity": int(pred * 10),
                     "message": "High probability of device failure detected (ML)",
                     "details": {
                         "probability": float(pred),
-                        "sensor_readings": sensor_df.iloc[-1].to_dict(),
+                        "sensor_readings": recent_data[-1],
                         "recommended_action": "Schedule maintenance check"
                     },
-                    "acknowledged": False
+                    "acknowledged": False,
+                    "model_version": model_version
                 }
                 new_alerts.append(alert)
-                alerts.append(alert)
+                add_alert(alert)
                 last_alert_times[device_id] = now
                 # Update device status
                 devices[device_id]["last_check"] = now
                 if alert["severity"] > 7:
                     devices[device_id]["status"] = "warning"
+        # Alert on readings the streaming anomaly detector flagged since the last run
+        anomaly_alerts = 0
+        for anomaly in anomaly_detector.drain_anomalies():
+            device_id, sensor_type = anomaly["device_id"], anomaly["sensor_type"]
+            if device_id not in devices:
+                continue
+            last_time = last_anomaly_alert_times.get((device_id, sensor_type))
+            if last_time and (now - last_time).total_seconds() < ALERT_GENERATION_COOLDOWN:
+                continue
+            severity = min(int(anomaly["anomaly_score"] * 2), 10)
+            alert = {
+                "id": str(uuid.uuid4()),
+                "timestamp": now.isoformat(),
+                "device_id": device_id,
+                "alert_type": "SENSOR_ANOMALY",
+                "type": "critical" if severity >= 7 else "warning",
+                "severity": severity,
+                "message": f"Anomalous {sensor_type} reading detected",
+                "details": {
+                    "sensor_type": sensor_type,
+                    "value": anomaly["value"],
+                    "expected": round(anomaly["mean"], 2),
+                    "anomaly_score": round(anomaly["anomaly_score"], 2),
+                    "reading_time": anomaly["timestamp"],
+                    "recommended_action": f"Inspect the {sensor_type} sensor"
+                },
+                "acknowledged": False
+            }
+            add_alert(alert)
+            anomaly_alerts += 1
+            last_anomaly_alert_times[(device_id, sensor_type)] = now
         if new_alerts:
-            save_alerts_to_disk()
             print(f"Generated {len(new_alerts)} ML-based alerts")
+        if anomaly_alerts:
+            print(f"Generated {anomaly_alerts} sensor anomaly alerts")
     except Exception as e:
         print(f"Error generating periodic ML alerts: {str(e)}")
 
+# Fold the alert journal into a fresh snapshot in the background
+@app.on_event("startup")
+@repeat_every(seconds=60)
+async def periodic_alert_journal_compaction():
+    try:
+        if alert_journal.needs_compaction(ALERT_JOURNAL_COMPACT_EVENTS, ALERT_JOURNAL_COMPACT_AGE):
+            await asyncio.to_thread(alert_journal.compact, alerts)
+    except Exception as e:
+        print(f"Error compacting alert journal: {str(e)}")
+
+@app.get("/metrics", summary="Service Metrics", description="Runtime counters for background components such as the AI chat queue.")
+async def get_metrics():
+    return {
+        "ai_chat": llm_gateway.metrics(),
+        "ai_chat_cache": chat_response_cache.metrics(),
+        "environmental_description_cache": env_description_cache.metrics(),
+        "prediction_cache": prediction_cache.metrics(),
+        "predict_batching": inference_batcher.metrics(),
+        "inference_pool": inference_pool.get().metrics() if inference_pool is not None and inference_pool.loaded else None
+    }
+
+@app.on_event("startup")
+async def warm_up_lazy_resources():
+    if MODEL_WARM_UP:
+        for resource in (predictive_model, gemini_client, openai_client, inference_pool):
+            if resource is not None:
+                resource.warm_up()
+
+@app.on_event("shutdown")
+async def close_alert_journal():
+    alert_journal.close()
+
+@app.on_event("shutdown")
+async def shutdown_llm_gateway():
+    llm_gateway.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_inference_batcher():
+    inference_batcher.shutdown()
+    if inference_pool is not None and inference_pool.loaded:
+        inference_pool.get().close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""Load test: /health and /devices latency while AI chat requests are in flight.
+
+Replaces the Gemini call with a fake LLM that sleeps for --llm-latency
+seconds, fires --chats concurrent POST /ai-chat requests, and meanwhile
+polls /health and /devices. Latency of the cheap endpoints is compared
+against an idle baseline. --inline runs the fake LLM directly on the event
+loop, the way chat_with_ai used to call Gemini, for comparison.
+
+Usage:
+    python benchmarks/bench_ai_chat_load.py --chats 50 --llm-latency 2
+    python benchmarks/bench_ai_chat_load.py --chats 50 --llm-latency 2 --inline
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+import httpx
+
+import app as app_module
+
+
+def fake_llm(latency):
+    def generate(prompt):
+        time.sleep(latency)
+        return f'Fake response to a {len(prompt)} character prompt'
+    return generate
+
+
+async def poll(client, paths, stop, latencies):
+    while not stop.is_set():
+        for path in paths:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f'{label:<10} requests={len(latencies):>5}  median={statistics.median(latencies) * 1000:8.2f} ms  '
+          f'p99={p99 * 1000:8.2f} ms  max={latencies[-1] * 1000:8.2f} ms')
+
+
+async def run(args):
+    generate = fake_llm(args.llm_latency)
+    app_module.llm_gateway.generate = generate
+    if args.inline:
+        async def complete_inline(prompt, timeout=None):
+            return generate(prompt)
+        app_module.llm_gateway.complete = complete_inline
+
+    paths = ['/health', '/devices']
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        baseline = []
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll(client, paths, stop, baseline))
+        await asyncio.sleep(args.llm_latency)
+        stop.set()
+        await poller
+
+        loaded = []
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll(client, paths, stop, loaded))
+        start = time.perf_counter()
+        chats = [client.post('/ai-chat', json={'message': f'What needs attention first? ({i})'})
+                 for i in range(args.chats)]
+        peak = {'queue_depth': 0, 'in_flight': 0}
+
+        async def watch_gateway():
+            while not stop.is_set():
+                metrics = app_module.llm_gateway.metrics()
+                for key in peak:
+                    peak[key] = max(peak[key], metrics[key])
+                await asyncio.sleep(0.05)
+
+        watcher = asyncio.create_task(watch_gateway())
+        responses = await asyncio.gather(*chats)
+        chat_elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(poller, watcher)
+
+    failed = sum(1 for r in responses if r.status_code != 200 or 'error' in r.json()['response'])
+    mode = 'inline (blocking)' if args.inline else f'gateway (max_concurrency={app_module.llm_gateway.max_concurrency})'
+    print(f'{args.chats} chats, fake LLM latency {args.llm_latency:g}s, {mode}')
+    print(f'chats finished in {chat_elapsed:.2f}s, errors={failed}, '
+          f'peak queue_depth={peak["queue_depth"]}, peak in_flight={peak["in_flight"]}')
+    summarize('idle', baseline)
+    summarize('loaded', loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--llm-latency', type=float, default=2.0)
+    parser.add_argument('--inline', action='store_true', help='call the fake LLM on the event loop')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    app_module.llm_gateway.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark per-tick inference cost against device count.
+
+Compares scoring every device's latest window with one model call per device
+(the old get_predictions loop) against a single batched predict_batch call.
+
+Usage:
+    python benchmarks/bench_batched_inference.py --devices 10 100 1000 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ml_model import PredictiveMaintenanceModel
+
+
+def make_fleet(n_devices, sequence_length, seed=0):
+    """Latest sequence_length readings for n_devices, stacked in one frame"""
+    rng = np.random.default_rng(seed)
+    n_rows = n_devices * sequence_length
+    minutes = np.tile(np.arange(sequence_length) * 5, n_devices)
+    return pd.DataFrame({
+        'device_id': np.repeat([f'device_{i}' for i in range(n_devices)], sequence_length),
+        'timestamp': [f'{m // 60:02d}:{m % 60:02d}' for m in minutes],
+        'sensor_value': rng.normal(60, 10, n_rows).round(2),
+        'threshold_breach': rng.random(n_rows) < 0.1
+    })
+
+
+def empty_logs():
+    return pd.DataFrame(columns=['device_id', 'timestamp', 'event_severity'])
+
+
+def time_per_device(model, fleet, limit):
+    """Time one predict_batch call per device, extrapolated past `limit` devices"""
+    groups = list(fleet.groupby('device_id', sort=False))
+    sample = groups[:limit]
+    start = time.perf_counter()
+    for _, device_rows in sample:
+        model.predict_batch(device_rows.copy(), empty_logs())
+    elapsed = time.perf_counter() - start
+    return elapsed * len(groups) / len(sample)
+
+
+def time_batched(model, fleet, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_batch(fleet.copy(), empty_logs())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--loop-limit', type=int, default=50,
+                        help='devices actually timed in the per-device loop before extrapolating')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    model = PredictiveMaintenanceModel()
+    if not model.load_model():
+        raise SystemExit('No trained model found in data/models; run training first.')
+
+    # Warm up the Keras predict function
+    model.predict_batch(make_fleet(1, model.sequence_length), empty_logs())
+
+    print(f"{'devices':>8} {'per-device loop (s)':>20} {'batched (s)':>12} {'speedup':>8}")
+    for n_devices in args.devices:
+        fleet = make_fleet(n_devices, model.sequence_length)
+        loop_time = time_per_device(model, fleet, args.loop_limit)
+        batch_time = time_batched(model, fleet, args.repeats)
+        print(f"{n_devices:>8} {loop_time:>20.3f} {batch_time:>12.3f} {loop_time / batch_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark /device-status latency against fleet size.
+
+Populates the app with --devices mock devices and --alerts-per-device alerts
+each, publishes the status snapshot once (as the background tick does), then
+times repeated GET /device-status requests through the ASGI app. The handler
+time excludes the HTTP client and ASGI plumbing.
+
+Usage:
+    python benchmarks/bench_device_status.py --devices 100 1000 10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('MODEL_WARM_UP', 'false')
+
+import httpx
+
+import app as app_module
+
+
+def populate(n_devices, alerts_per_device, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    app_module.devices.clear()
+    app_module.alerts.clear()
+    for i in range(n_devices):
+        device_id = f'device_{i}'
+        app_module.devices[device_id] = {
+            'id': device_id, 'name': f'Device {i}', 'type': 'hvac', 'location': 'Branch',
+            'status': 'operational', 'last_check': now
+        }
+    for i in range(n_devices * alerts_per_device):
+        app_module.alerts.append({
+            'id': f'alert_{i}', 'device_id': f'device_{i % n_devices}', 'severity': int(rng.integers(1, 11)),
+            'message': 'Temperature exceeded threshold', 'acknowledged': bool(rng.random() < 0.5),
+            'timestamp': (now - timedelta(minutes=i)).isoformat()
+        })
+    app_module.alert_index.rebuild(app_module.alerts)
+    app_module.device_status_snapshot.mark_dirty()
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1e3
+    return f'p50={np.percentile(samples, 50):7.3f} ms  p99={np.percentile(samples, 99):7.3f} ms'
+
+
+async def run(n_devices, alerts_per_device, requests):
+    populate(n_devices, alerts_per_device)
+    start = time.perf_counter()
+    await app_module.publish_device_status_snapshot_async()
+    publish_seconds = time.perf_counter() - start
+
+    handler = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app_module.get_device_status()
+        handler.append(time.perf_counter() - start)
+
+    end_to_end = []
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get('/device-status')
+            end_to_end.append(time.perf_counter() - start)
+    assert len(response.json()) == n_devices
+
+    print(f'{n_devices:>6} devices  publish {publish_seconds * 1e3:8.1f} ms  '
+          f'handler {percentiles(handler)}  via ASGI {percentiles(end_to_end)}  '
+          f'body {len(response.content) / 1e6:.1f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--alerts-per-device', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    for n_devices in args.devices:
+        asyncio.run(run(n_devices, args.alerts_per_device, args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark fleet health scoring: one calculate_device_health call per device vs calculate_fleet_health.
+
+Builds --rows synthetic readings over --devices devices spread across two
+days, scores every device with calculate_fleet_health, and times
+calculate_device_health on a --sample of devices (checking the scores
+agree), extrapolating its time to the whole fleet.
+
+Usage:
+    python benchmarks/bench_fleet_health.py --devices 10000 --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from ml.preprocessing import DataPreprocessor
+
+
+def make_frame(rows, devices, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 2 * 86400, rows), unit='s'),
+        'device_id': [f'dev_{d}' for d in rng.integers(0, devices, rows)],
+        'sensor_value': rng.normal(60, 15, rows).round(2),
+        'threshold_breach': (rng.random(rows) < 0.1).astype(int)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--sample', type=int, default=100, help='devices scored one call at a time')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.devices)
+    preprocessor = DataPreprocessor()
+
+    start = time.perf_counter()
+    fleet = preprocessor.calculate_fleet_health(df)
+    fleet_seconds = time.perf_counter() - start
+
+    sample = fleet.index[:args.sample]
+    start = time.perf_counter()
+    single = pd.Series([preprocessor.calculate_device_health(df, device_id) for device_id in sample], index=sample)
+    per_device_seconds = (time.perf_counter() - start) / len(sample)
+    pd.testing.assert_series_equal(single, fleet[sample], check_names=False, check_dtype=False)
+
+    loop_seconds = per_device_seconds * len(fleet)
+    print(f'{args.rows} rows, {len(fleet)} devices')
+    print(f'  per-device loop: {per_device_seconds * 1000:8.2f} ms/device, ~{loop_seconds:8.1f} s for the fleet '
+          f'(extrapolated from {len(sample)})')
+    print(f'  fleet batch:     {fleet_seconds:8.3f} s  ({loop_seconds / fleet_seconds:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark cold import time of the backend app and the cost of the first inference.
+
+Each run starts a fresh interpreter, times `import app`, records which heavy
+libraries got imported along the way, then times loading the model on first
+use (predictive_model.get()).
+
+Usage:
+    python benchmarks/bench_import_time.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ['tensorflow', 'openai', 'google.genai']
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+import_seconds = time.perf_counter() - start
+heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+start = time.perf_counter()
+app.predictive_model.get()
+load_seconds = time.perf_counter() - start
+print('BENCH ' + json.dumps({{'import': import_seconds, 'first_load': load_seconds, 'heavy': heavy}}))
+"""
+
+
+def run_once():
+    env = dict(os.environ, MODEL_WARM_UP='false', TF_CPP_MIN_LOG_LEVEL='3')
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('BENCH '))
+    return json.loads(line[len('BENCH '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    imports = [r['import'] for r in results]
+    loads = [r['first_load'] for r in results]
+    print(f'import app:        median {statistics.median(imports):6.2f}s  min {min(imports):6.2f}s')
+    print(f'first model load:  median {statistics.median(loads):6.2f}s  min {min(loads):6.2f}s')
+    print(f'heavy modules imported by `import app`: {results[0]["heavy"] or "none"}')
+
+
+if __name__ == '__main__':
+    main()
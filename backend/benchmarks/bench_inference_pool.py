@@ -0,0 +1,69 @@
+"""Benchmark inference throughput against the number of worker processes.
+
+Scores --windows random windows per call, first in-process (0 workers) and
+then through an InferencePool with each --workers count, both as one large
+call and as --concurrency concurrent smaller calls. Speed-ups need as many
+free CPU cores as workers; on a single core the pool only adds overhead.
+
+Usage:
+    python benchmarks/bench_inference_pool.py --workers 0 1 2 4 --windows 20000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from inference_pool import InferencePool
+from ml_model import PredictiveMaintenanceModel
+
+
+def throughput(predict_windows, X, concurrency, repeats):
+    predict_windows(X[:16])  # Warm up
+    chunks = np.array_split(X, concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(repeats):
+            list(executor.map(predict_windows, chunks))
+    return repeats * len(X) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--windows', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--backend', choices=['keras', 'numpy'], default='numpy')
+    args = parser.parse_args()
+
+    model = PredictiveMaintenanceModel(inference_backend=args.backend)
+    if not model.load_model():
+        sys.exit('No trained model found')
+    X = np.random.default_rng(0).random((args.windows, model.sequence_length, 5), dtype=np.float32)
+
+    print(f'backend={args.backend}, {args.windows} windows, {os.cpu_count()} CPU core(s)')
+    print(f"{'workers':>8} {'one call windows/s':>19} {'concurrent windows/s':>21}")
+    for n_workers in args.workers:
+        pool = None
+        if n_workers == 0:
+            predict_windows = model.predict_windows
+        else:
+            pool = InferencePool(n_workers, (model.sequence_length, 5), inference_backend=args.backend,
+                                 chunk_size=args.chunk_size)
+            predict_windows = pool.predict_windows
+        single = throughput(predict_windows, X, 1, args.repeats)
+        concurrent = throughput(predict_windows, X, args.concurrency, args.repeats)
+        print(f'{n_workers:>8} {single:>19.0f} {concurrent:>21.0f}')
+        if pool is not None:
+            pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the Keras and NumPy inference backends of PredictiveMaintenanceModel.
+
+Reports per-window latency of model.predict at several batch sizes, the
+largest difference between the two backends' outputs, and the resident
+memory of a fresh process after loading each backend and scoring once.
+
+Usage:
+    python benchmarks/bench_numpy_inference.py --batch-sizes 1 8 64 512
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+from ml_model import PredictiveMaintenanceModel
+
+MEMORY_PROBE = """
+import json, sys, numpy as np
+from ml_model import PredictiveMaintenanceModel
+model = PredictiveMaintenanceModel(inference_backend=sys.argv[1])
+model.load_model()
+model.model.predict(np.zeros((1, model.sequence_length, 5), dtype=np.float32), verbose=0)
+rss_kb = next(int(line.split()[1]) for line in open('/proc/self/status') if line.startswith('VmRSS'))
+print('BENCH ' + json.dumps({'rss_mb': rss_kb / 1024, 'tensorflow': 'tensorflow' in sys.modules}))
+"""
+
+
+def load(backend):
+    model = PredictiveMaintenanceModel(inference_backend=backend)
+    if not model.load_model():
+        sys.exit('No trained model found in data/models')
+    return model
+
+
+def time_predict(model, X, repeats):
+    model.model.predict(X, batch_size=len(X), verbose=0)  # Warm up
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.model.predict(X, batch_size=len(X), verbose=0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def resident_memory(backend):
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    output = subprocess.run([sys.executable, '-c', MEMORY_PROBE, backend], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('BENCH '))
+    return json.loads(line[len('BENCH '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64, 512])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    keras_model = load('keras')
+    numpy_model = load('numpy')
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>6} {'keras us/window':>16} {'numpy us/window':>16} {'speedup':>8} {'max |diff|':>11}")
+    for batch_size in args.batch_sizes:
+        X = rng.random((batch_size, keras_model.sequence_length, 5)).astype(np.float32)
+        keras_time = time_predict(keras_model, X, args.repeats)
+        numpy_time = time_predict(numpy_model, X, args.repeats)
+        diff = np.abs(keras_model.model.predict(X, verbose=0) - numpy_model.model.predict(X)).max()
+        print(f"{batch_size:>6} {keras_time / batch_size * 1e6:>16.1f} {numpy_time / batch_size * 1e6:>16.1f} "
+              f"{keras_time / numpy_time:>7.1f}x {diff:>11.2e}")
+
+    for backend in ('keras', 'numpy'):
+        memory = resident_memory(backend)
+        print(f"{backend:>6} backend: {memory['rss_mb']:.0f} MB resident, TensorFlow imported: {memory['tensorflow']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark raw sensor data stored as CSV vs partitioned Parquet.
+
+Writes a synthetic sensor CSV with --rows readings spread over --days days,
+converts it with parquet_store, and reports the on-disk size of each plus
+the time to load: every column, the columns prepare_data uses, and those
+columns for one device over one day (pushed down to the Parquet partitions,
+filtered after reading for the CSV).
+
+Usage:
+    python benchmarks/bench_parquet_storage.py --rows 200000 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+COLUMNS = ['timestamp', 'device_id', 'sensor_value', 'threshold_breach']
+
+
+def write_csv(path, rows, devices, days, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2025-06-01')
+    timestamps = start + pd.to_timedelta(np.sort(rng.integers(0, days * 86400, rows)), unit='s')
+    pd.DataFrame({
+        'timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': [f'dev_{d}' for d in rng.integers(0, devices, rows)],
+        'component_type': rng.choice(['ATM', 'Server', 'UPS', 'AC_Unit'], rows),
+        'sensor_type': rng.choice(['temperature', 'humidity', 'power', 'vibration'], rows),
+        'sensor_value': rng.normal(60, 10, rows).round(2),
+        'threshold_breach': rng.random(rows) < 0.1,
+        'location': rng.choice(['Mumbai', 'Delhi', 'Chennai', 'Bangalore', 'Hyderabad'], rows)
+    }).to_csv(path, index=False)
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200000, 1000000])
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from parquet_store import convert_csv, read_dataset
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'sensor_data.csv')
+            parquet_dir = os.path.join(tmp_dir, 'sensor_data')
+            write_csv(csv_path, rows, args.devices, args.days)
+            start = time.perf_counter()
+            convert_csv(csv_path, parquet_dir)
+            convert_seconds = time.perf_counter() - start
+            day_start, day_end = pd.Timestamp('2025-06-10'), pd.Timestamp('2025-06-10 23:59:59')
+
+            def csv_filtered():
+                df = pd.read_csv(csv_path, usecols=COLUMNS, parse_dates=['timestamp'])
+                return df[(df['device_id'] == 'dev_0') & df['timestamp'].between(day_start, day_end)]
+
+            cases = [
+                ('all columns', lambda: pd.read_csv(csv_path, parse_dates=['timestamp']),
+                 lambda: read_dataset(parquet_dir)),
+                ('model columns', lambda: pd.read_csv(csv_path, usecols=COLUMNS, parse_dates=['timestamp']),
+                 lambda: read_dataset(parquet_dir, COLUMNS)),
+                ('1 device, 1 day', csv_filtered,
+                 lambda: read_dataset(parquet_dir, COLUMNS, ['dev_0'], day_start, day_end)),
+            ]
+            csv_mb, parquet_mb = os.path.getsize(csv_path) / 2**20, directory_size(parquet_dir) / 2**20
+            print(f'{rows} rows, {args.devices} devices, {args.days} days: '
+                  f'CSV {csv_mb:.1f} MB, Parquet {parquet_mb:.1f} MB (converted in {convert_seconds:.1f} s)')
+            for name, read_csv, read_parquet in cases:
+                csv_seconds, csv_rows = timed(read_csv, args.repeat)
+                parquet_seconds, parquet_rows = timed(read_parquet, args.repeat)
+                assert csv_rows == parquet_rows, (name, csv_rows, parquet_rows)
+                print(f'{name:>16}: CSV {csv_seconds * 1000:8.1f} ms  Parquet {parquet_seconds * 1000:8.1f} ms  '
+                      f'({csv_seconds / parquet_seconds:5.1f}x, {parquet_rows} rows)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark POST /predict throughput with and without micro-batching.
+
+Each client sends --requests-per-client /predict calls back to back, each
+carrying enough readings for --windows windows. Throughput is measured at
+several client counts, once with the InferenceBatcher settings from app.py
+and once with batching disabled (max batch size 1, no wait).
+
+Usage:
+    python benchmarks/bench_predict_batching.py --clients 1 16 128 --backend keras
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('MODEL_WARM_UP', 'false')
+
+import httpx
+
+
+def make_payload(rng, windows, sequence_length):
+    rows = sequence_length + windows
+    minutes = np.arange(rows) * 5
+    return {
+        'device_id': 'bench_device',
+        'sensor_data': [
+            {'device_id': 'bench_device', 'timestamp': f'{m // 60 % 24:02d}:{m % 60:02d}',
+             'sensor_value': float(v), 'threshold_breach': bool(b)}
+            for m, v, b in zip(minutes, rng.normal(60, 10, rows).round(2), rng.random(rows) < 0.1)
+        ],
+        'log_data': [{'device_id': 'bench_device', 'timestamp': '00:00', 'event_severity': 2}]
+    }
+
+
+async def run(app_module, clients, requests_per_client, payload):
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        async def worker():
+            for _ in range(requests_per_client):
+                response = await client.post('/predict', json=payload)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return clients * requests_per_client / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 16, 128])
+    parser.add_argument('--requests-per-client', type=int, default=20)
+    parser.add_argument('--windows', type=int, default=1, help='windows per request')
+    parser.add_argument('--backend', choices=['keras', 'numpy'], default='numpy')
+    args = parser.parse_args()
+
+    os.environ['INFERENCE_BACKEND'] = args.backend
+    import app as app_module
+    app_module.predictive_model.get()
+    app_module.send_notifications = lambda alerts: None
+    batcher = app_module.inference_batcher
+    payload = make_payload(np.random.default_rng(0), args.windows, app_module.model.sequence_length)
+    configs = [('unbatched', 1, 0.0), ('batched', batcher.max_batch_size, batcher.max_wait)]
+
+    print(f'backend={args.backend}, {args.windows} window(s) per request')
+    print(f"{'clients':>8} {'unbatched req/s':>16} {'batched req/s':>14} {'mean batch':>11}")
+    for clients in args.clients:
+        throughput = {}
+        for name, max_batch_size, max_wait in configs:
+            batcher.max_batch_size, batcher.max_wait = max_batch_size, max_wait
+            batcher.batches = batcher.windows = 0
+            asyncio.run(run(app_module, 1, 2, payload))  # Warm up
+            throughput[name] = asyncio.run(run(app_module, clients, args.requests_per_client, payload))
+        mean_batch = batcher.windows / batcher.batches if batcher.batches else 0
+        print(f"{clients:>8} {throughput['unbatched']:>16.1f} {throughput['batched']:>14.1f} {mean_batch:>11.1f}")
+    batcher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
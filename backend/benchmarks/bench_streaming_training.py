@@ -0,0 +1,94 @@
+"""Benchmark peak memory of preparing training data in memory vs streaming.
+
+Writes synthetic sensor/log CSVs with --rows sensor readings, then, in a
+fresh process per mode, runs the data side of training: prepare_data plus
+scaler.fit_transform for "in-memory", and partitioning, the partial_fit pass
+and one full pass over the scaled tf.data pipeline for "streaming". Reports
+wall time and peak RSS.
+
+Usage:
+    python benchmarks/bench_streaming_training.py --rows 200000 1000000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def write_dataset(raw_dir, rows, devices, seed=0):
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, 1440, rows)
+    pd.DataFrame({
+        'timestamp': [f'{m // 60:02d}:{m % 60:02d}' for m in minutes],
+        'device_id': [f'dev_{d}' for d in rng.integers(0, devices, rows)],
+        'sensor_value': rng.normal(60, 10, rows).round(2),
+        'threshold_breach': rng.random(rows) < 0.1
+    }).to_csv(os.path.join(raw_dir, 'sensor_data.csv'), index=False)
+    n_logs = rows // 10
+    pd.DataFrame({
+        'timestamp': [f'1900-01-01 {m // 60:02d}:{m % 60:02d}:00' for m in rng.integers(0, 1440, n_logs)],
+        'device_id': [f'dev_{d}' for d in rng.integers(0, devices, n_logs)],
+        'event_severity': rng.integers(1, 6, n_logs)
+    }).to_csv(os.path.join(raw_dir, 'log_data.csv'), index=False)
+
+
+def run_mode(mode, raw_dir, chunksize):
+    from sklearn.preprocessing import MinMaxScaler
+    from ml_model import PredictiveMaintenanceModel, parse_sensor_timestamps
+    from training_stream import DeviceWindowStream, partition_csv_by_device, time_order
+
+    model = PredictiveMaintenanceModel()
+    model.RAW_DATA_DIR = raw_dir
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        X, y = model.prepare_data(*model.load_data())
+        model.scaler.fit_transform(X.reshape(len(X), -1))
+        n_windows = len(X)
+    else:
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            sensor_partitions = partition_csv_by_device(os.path.join(raw_dir, 'sensor_data.csv'), scratch_dir,
+                                                        chunksize, parse_sensor_timestamps)
+            log_partitions = partition_csv_by_device(os.path.join(raw_dir, 'log_data.csv'), scratch_dir, chunksize)
+            stream = DeviceWindowStream(sensor_partitions, log_partitions, model.iter_device_windows,
+                                        (model.sequence_length, 5), device_order=time_order(sensor_partitions))
+            scaler = MinMaxScaler()
+            n_windows = stream.fit_scaler(scaler)
+            for _ in stream.dataset(lambda: stream.iter_blocks(), scaler, batch_size=256):
+                pass
+    seconds = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'{mode:>10} {n_windows:>10} windows {seconds:8.1f} s  peak RSS {peak_mb:8.0f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200000, 1000000])
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--mode', choices=['in-memory', 'streaming'])
+    parser.add_argument('--raw-dir')
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.raw_dir, args.chunksize)
+        return
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as raw_dir:
+            write_dataset(raw_dir, rows, args.devices)
+            print(f'{rows} sensor rows, {args.devices} devices')
+            for mode in ('in-memory', 'streaming'):
+                subprocess.run([sys.executable, __file__, '--mode', mode, '--raw-dir', raw_dir,
+                                '--chunksize', str(args.chunksize)], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Rolling threshold-breach rate of every device, updated one reading at a time.
+
+Each device keeps the breach flags of its last `window` readings in a
+fixed-size circular buffer plus a running count, so adding a reading and
+reading the rate are O(1) and classifying the whole fleet is O(devices).
+The classification is the one DataPreprocessor.get_maintenance_prediction
+makes from the rolling mean of the last sequence_length readings.
+"""
+import math
+
+IMMEDIATE_MAINTENANCE = "Immediate maintenance recommended"
+MAINTENANCE_WITHIN_48_HOURS = "Maintenance recommended within 48 hours"
+NO_MAINTENANCE = "No immediate maintenance required"
+
+
+def classify_breach_rate(rate):
+    """Maintenance recommendation for a rolling breach rate (NaN falls through to none)"""
+    if rate > 0.2:  # If more than 20% breaches in recent window
+        return IMMEDIATE_MAINTENANCE
+    elif rate > 0.1:  # If more than 10% breaches
+        return MAINTENANCE_WITHIN_48_HOURS
+    return NO_MAINTENANCE
+
+
+class DeviceBreachWindow:
+    """Breach flags of one device's last `window` readings in a circular buffer"""
+
+    __slots__ = ("window", "_flags", "_next", "readings", "breaches", "missing")
+
+    def __init__(self, window):
+        self.window = window
+        self._flags = [None] * window
+        self._next = 0  # Slot the next reading overwrites
+        self.readings = 0  # Readings seen, capped at window
+        self.breaches = 0  # Breaches among the buffered readings
+        self.missing = 0  # Buffered readings without a breach flag
+
+    def add(self, breach):
+        if breach is None or (isinstance(breach, float) and math.isnan(breach)):
+            flag = None
+        else:
+            flag = bool(breach)
+        old = self._flags[self._next]
+        if self.readings == self.window:
+            self.breaches -= old is True
+            self.missing -= old is None
+        else:
+            self.readings += 1
+        self._flags[self._next] = flag
+        self.breaches += flag is True
+        self.missing += flag is None
+        self._next = (self._next + 1) % self.window
+
+    @property
+    def rate(self):
+        """Breach rate over the window; None until it is full, NaN if a flag is missing (like rolling().mean())"""
+        if self.readings < self.window:
+            return None
+        if self.missing:
+            return math.nan
+        return self.breaches / self.window
+
+    def recommendation(self):
+        rate = self.rate
+        return None if rate is None else classify_breach_rate(rate)
+
+
+class BreachRateTracker:
+    """DeviceBreachWindow per device id"""
+
+    def __init__(self, window):
+        self.window = window
+        self._devices = {}
+
+    def get(self, device_id):
+        return self._devices.get(device_id)
+
+    def rebuild(self, device_id, breaches):
+        """Replace a device's window with one replayed from breach flags, oldest first"""
+        state = self._devices[device_id] = DeviceBreachWindow(self.window)
+        for breach in breaches:
+            state.add(breach)
+        return state
+
+    def add(self, device_id, breaches):
+        """Feed new breach flags to a device's window; returns False if it has none yet"""
+        state = self._devices.get(device_id)
+        if state is None:
+            return False
+        for breach in breaches:
+            state.add(breach)
+        return True
+
+    def predictions(self):
+        """{device_id: (breach rate, recommendation)} for every tracked device"""
+        return {device_id: (state.rate, state.recommendation()) for device_id, state in self._devices.items()}
+
+    def reset(self, device_id=None):
+        """Drop the window of one device, or of every device"""
+        if device_id is None:
+            self._devices.clear()
+        else:
+            self._devices.pop(device_id, None)
+
+    def __len__(self):
+        return len(self._devices)
@@ -0,0 +1,104 @@
+import heapq
+from datetime import datetime
+
+from alert_index import severity_band
+
+UNACKNOWLEDGED_WEIGHT = 10.0  # An open alert outranks any acknowledged one of equal age
+RECENCY_WEIGHT = 5.0  # Score bonus for a brand-new alert, halving every RECENCY_HALF_LIFE_HOURS
+RECENCY_HALF_LIFE_HOURS = 24.0
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def _parse_timestamp(alert):
+    try:
+        return datetime.fromisoformat(str(alert.get("timestamp", ""))).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def relevance(alert, now):
+    """Ranking score combining unacknowledged state, severity and recency"""
+    severity = alert.get("severity", 0)
+    score = float(severity) if severity_band(severity) else 0.0
+    if not alert.get("acknowledged", False):
+        score += UNACKNOWLEDGED_WEIGHT
+    raised = _parse_timestamp(alert)
+    if raised is not None:
+        age_hours = max((now - raised).total_seconds() / 3600, 0.0)
+        score += RECENCY_WEIGHT * 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+    return score
+
+
+def alert_line(alert):
+    severity = alert.get("severity", 0)
+    return (
+        f"- On {alert.get('timestamp', '')}, device {alert.get('device_name', 'Unknown')} raised a "
+        f"{severity_band(severity) or 'info'} alert (severity {severity}): {alert.get('message', '')}. "
+        f"Acknowledged: {alert.get('acknowledged', False)}."
+    )
+
+
+def _device_summary_line(summary):
+    return (
+        f"- Device {summary['device_name']}: {summary['total']} more alerts "
+        f"({summary['critical']} critical, {summary['warning']} warning, {summary['info']} info; "
+        f"{summary['open']} unacknowledged), latest at {summary['latest']}."
+    )
+
+
+def build_alert_context(alerts, top_k=25, token_budget=2000, now=None):
+    """Prompt context for the AI chat: the most relevant alerts in full, the rest summarized per device.
+
+    Picks the `top_k` alerts with the highest relevance() and lists them one per
+    line, most relevant first. Every other alert is folded into one summary
+    line per device. Lines are added until `token_budget` (estimated tokens)
+    would be exceeded; whatever does not fit is reported as a single count.
+    Cost is O(n log top_k) in the number of alerts.
+    """
+    now = now or datetime.now()
+    alerts = list(alerts)
+    ranked = heapq.nlargest(top_k, range(len(alerts)), key=lambda i: relevance(alerts[i], now))
+    selected = set(ranked)
+
+    device_summaries = {}
+    for i, alert in enumerate(alerts):
+        if i in selected:
+            continue
+        device_id = alert.get("device_id")
+        summary = device_summaries.get(device_id)
+        if summary is None:
+            summary = device_summaries[device_id] = {
+                "device_name": alert.get("device_name", device_id or "Unknown"),
+                "total": 0, "critical": 0, "warning": 0, "info": 0, "open": 0, "latest": ""
+            }
+        summary["total"] += 1
+        summary[severity_band(alert.get("severity", 0)) or "info"] += 1
+        if not alert.get("acknowledged", False):
+            summary["open"] += 1
+        summary["latest"] = max(summary["latest"], str(alert.get("timestamp", "")))
+    summaries = sorted(device_summaries.values(),
+                       key=lambda s: (s["open"], s["critical"], s["total"]), reverse=True)
+
+    lines = []
+    used = 0
+    budget_reached = False
+    omitted_alerts = 0
+    candidates = [(alert_line(alerts[i]), 1) for i in ranked]
+    if summaries:
+        candidates.append(("Other alerts by device:", 0))
+        candidates.extend((_device_summary_line(s), s["total"]) for s in summaries)
+    for line, alert_count in candidates:
+        cost = estimate_tokens(line)
+        if budget_reached or used + cost > token_budget:
+            budget_reached = True
+            omitted_alerts += alert_count
+            continue
+        lines.append(line)
+        used += cost
+    if omitted_alerts:
+        lines.append(f"- {omitted_alerts} further alerts omitted to fit the context budget.")
+    return "\n".join(lines)
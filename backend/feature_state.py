@@ -0,0 +1,193 @@
+import bisect
+import math
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+N_FEATURES = 5  # sensor_value, threshold_breach, log count, mean and max severity
+
+
+def parse_reading_time(timestamp):
+    """Reading timestamps as prepare_data parses them: datetimes as-is, strings as %H:%M"""
+    if isinstance(timestamp, str):
+        try:
+            return datetime.strptime(timestamp, "%H:%M")
+        except ValueError:
+            return None
+    if isinstance(timestamp, datetime) and timestamp == timestamp:  # NaT compares unequal to itself
+        return timestamp
+    return None
+
+
+def parse_log_time(timestamp):
+    """Log timestamps: datetimes as-is, strings in ISO format"""
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if isinstance(timestamp, datetime) and timestamp == timestamp:
+        return timestamp
+    return None
+
+
+class DeviceFeatureState:
+    """Rolling model-input window of one device, kept current as data arrives.
+
+    Holds the newest `sequence_length` (sensor_value, threshold_breach)
+    pairs, plus the device's logs from the window start onwards. The count,
+    severity sum and max severity of the logs inside the window are updated
+    as the window slides, so `latest_window()` builds the same features as
+    `prepare_latest_windows` in O(sequence_length), without pandas.
+
+    Readings are expected in timestamp order (SensorHistoryStore skips
+    stale ones); logs may arrive in any order. Logs older than the window
+    start are dropped, since no later window can include them.
+    """
+
+    def __init__(self, sequence_length):
+        self.sequence_length = sequence_length
+        self._times = deque(maxlen=sequence_length)
+        self._values = deque(maxlen=sequence_length)
+        self._breaches = deque(maxlen=sequence_length)
+        # Retained logs sorted by time; the first _in_window of them lie inside the window
+        self._log_times = []
+        self._log_severities = []
+        self._in_window = 0
+        self._severity_sum = 0.0
+        self._severity_present = 0
+        self._severity_max = -math.inf
+        self._max_stale = False
+
+    @classmethod
+    def from_rows(cls, sequence_length, rows, logs=()):
+        """State after replaying model rows and log dicts shaped like prepare_data's input"""
+        state = cls(sequence_length)
+        for log in logs:
+            state.add_log(log["timestamp"], log.get("event_severity"))
+        for row in rows:
+            state.add_reading(row["timestamp"], row["sensor_value"], row["threshold_breach"])
+        return state
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def window_bounds(self):
+        """(start, end) timestamps of the current window, None where unparseable"""
+        if not self._times:
+            return None, None
+        return self._times[0], self._times[-1]
+
+    def add_reading(self, timestamp, sensor_value, threshold_breach):
+        self._times.append(parse_reading_time(timestamp))
+        self._values.append(float(sensor_value))
+        self._breaches.append(float(threshold_breach))
+        self._slide()
+
+    def add_log(self, timestamp, event_severity):
+        log_time = parse_log_time(timestamp)
+        if log_time is None:
+            return  # Logs without a timestamp never fall inside a window
+        start, end = self.window_bounds
+        if start is not None and log_time < start:
+            return
+        severity = math.nan if event_severity is None else float(event_severity)
+        i = bisect.bisect_right(self._log_times, log_time)
+        self._log_times.insert(i, log_time)
+        self._log_severities.insert(i, severity)
+        if i < self._in_window or (i == self._in_window and end is not None and log_time <= end):
+            self._in_window += 1
+            self._enter(severity)
+
+    def _slide(self):
+        start, end = self.window_bounds
+        if start is not None:
+            # Evict logs that fell out of the front of the window
+            evicted = bisect.bisect_left(self._log_times, start)
+            for severity in self._log_severities[:min(evicted, self._in_window)]:
+                self._leave(severity)
+            self._in_window = max(self._in_window - evicted, 0)
+            del self._log_times[:evicted], self._log_severities[:evicted]
+        if end is not None:
+            # Admit logs the new end now covers
+            entered = bisect.bisect_right(self._log_times, end)
+            for severity in self._log_severities[self._in_window:entered]:
+                self._enter(severity)
+            self._in_window = max(self._in_window, entered)
+
+    def _enter(self, severity):
+        if math.isnan(severity):
+            return
+        self._severity_sum += severity
+        self._severity_present += 1
+        self._severity_max = max(self._severity_max, severity)
+
+    def _leave(self, severity):
+        if math.isnan(severity):
+            return
+        self._severity_present -= 1
+        if self._severity_present == 0:
+            self._severity_sum, self._severity_max, self._max_stale = 0.0, -math.inf, False
+            return
+        self._severity_sum -= severity
+        if severity >= self._severity_max:
+            self._max_stale = True
+
+    def log_features(self):
+        """(count, mean severity, max severity) of the logs inside the window"""
+        start, end = self.window_bounds
+        if start is None or end is None or self._in_window == 0:
+            return 0.0, 0.0, 0.0
+        if self._severity_present == 0:
+            return float(self._in_window), math.nan, math.nan
+        if self._max_stale:
+            self._severity_max = max(s for s in self._log_severities[:self._in_window] if not math.isnan(s))
+            self._max_stale = False
+        return float(self._in_window), self._severity_sum / self._severity_present, self._severity_max
+
+    def latest_window(self):
+        """(sequence_length, 5) features of the newest window, or None until it is full"""
+        if len(self._values) < self.sequence_length:
+            return None
+        features = np.empty((self.sequence_length, N_FEATURES), dtype=np.float64)
+        features[:, 0] = self._values
+        features[:, 1] = self._breaches
+        features[:, 2:] = self.log_features()
+        return features
+
+
+class FeatureStateStore:
+    """DeviceFeatureState per device id"""
+
+    def __init__(self, sequence_length):
+        self.sequence_length = sequence_length
+        self._states = {}
+
+    def get(self, device_id):
+        return self._states.get(device_id)
+
+    def rebuild(self, device_id, rows, logs=()):
+        """Replace a device's state with one replayed from model rows and logs"""
+        state = self._states[device_id] = DeviceFeatureState.from_rows(self.sequence_length, rows, logs)
+        return state
+
+    def add_readings(self, device_id, rows):
+        """Feed new model rows to a device's state; returns False if it has none yet"""
+        state = self._states.get(device_id)
+        if state is None:
+            return False
+        for row in rows:
+            state.add_reading(row["timestamp"], row["sensor_value"], row["threshold_breach"])
+        return True
+
+    def reset(self, device_id=None):
+        """Drop the state of one device, or of every device"""
+        if device_id is None:
+            self._states.clear()
+        else:
+            self._states.pop(device_id, None)
+
+    def __len__(self):
+        return len(self._states)
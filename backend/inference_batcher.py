@@ -0,0 +1,119 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceBatcher:
+    """Micro-batches model inputs from concurrent requests onto one worker thread.
+
+    `submit(X, *args)` queues an array of windows and returns a Future. The
+    worker takes the oldest queued request, keeps collecting more until the
+    batch holds `max_batch_size` windows or `max_wait` seconds have passed
+    since it started, runs `predict_fn(X, *args)` once on the concatenation
+    of the requests with the same args and resolves every Future with its
+    own slice of the output. args (e.g. the model to score with) must be
+    hashable; requests with different args are never scored together.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=256, max_wait=0.005):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.windows = 0
+        self.largest_batch = 0
+
+    def submit(self, X, *args):
+        future = Future()
+        if len(X) == 0:
+            future.set_result(np.empty((0, 1), dtype=np.float32))
+            return future
+        self._ensure_worker()
+        self._queue.put((X, args, future))
+        return future
+
+    async def predict(self, X, *args):
+        """Awaitable predictions for the windows in X, shaped like predict_fn's output"""
+        return await asyncio.wrap_future(self.submit(X, *args))
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or max_wait elapses"""
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return None
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Let the loop see the stop signal after this batch
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            groups = {}
+            for X, args, future in batch:
+                # Skip requests whose caller has already given up
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(args, []).append((X, future))
+            for args, live in groups.items():
+                self._predict_group(live, args)
+
+    def _predict_group(self, live, args):
+        inputs = [X for X, _ in live]
+        futures = [future for _, future in live]
+        try:
+            outputs = self.predict_fn(np.concatenate(inputs) if len(inputs) > 1 else inputs[0], *args)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        start = 0
+        for X, future in zip(inputs, futures):
+            future.set_result(outputs[start:start + len(X)])
+            start += len(X)
+        self.requests += len(futures)
+        self.batches += 1
+        self.windows += start
+        self.largest_batch = max(self.largest_batch, start)
+
+    def metrics(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_windows": self.windows / self.batches if self.batches else 0.0,
+            "largest_batch_windows": self.largest_batch
+        }
+
+    def shutdown(self):
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
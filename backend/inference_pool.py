@@ -0,0 +1,279 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _worker_main(connection, input_name, output_name, capacity, window_shape, inference_backend):
+    """Worker process: load the model once, then score windows handed over in shared memory"""
+    from ml_model import PredictiveMaintenanceModel
+
+    model = PredictiveMaintenanceModel(inference_backend=inference_backend)
+    if not model.load_model():
+        connection.send(("error", "No trained model found"))
+        return
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((capacity, *window_shape), dtype=np.float32, buffer=input_block.buf)
+    outputs = np.ndarray((capacity,), dtype=np.float32, buffer=output_block.buf)
+    connection.send(("ready", model.model_version))
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            n = message
+            try:
+                outputs[:n] = np.ravel(model.predict_windows(inputs[:n]))
+                connection.send(("done", n))
+            except Exception as e:
+                connection.send(("error", str(e)))
+    finally:
+        del inputs, outputs
+        input_block.close()
+        output_block.close()
+
+
+class _Worker:
+    """One inference process plus the shared-memory blocks it reads from and writes to"""
+
+    def __init__(self, context, capacity, window_shape, inference_backend):
+        self.capacity = capacity
+        self.window_shape = window_shape
+        self.inference_backend = inference_backend
+        self._context = context
+        itemsize = np.dtype(np.float32).itemsize
+        self.input_block = shared_memory.SharedMemory(create=True, size=capacity * int(np.prod(window_shape)) * itemsize)
+        self.output_block = shared_memory.SharedMemory(create=True, size=capacity * itemsize)
+        self.inputs = np.ndarray((capacity, *window_shape), dtype=np.float32, buffer=self.input_block.buf)
+        self.outputs = np.ndarray((capacity,), dtype=np.float32, buffer=self.output_block.buf)
+        self.process = None
+        self.connection = None
+        self.model_version = None
+        self.start()
+
+    def start(self):
+        parent_end, child_end = self._context.Pipe()
+        self.process = self._context.Process(
+            target=_worker_main,
+            args=(child_end, self.input_block.name, self.output_block.name,
+                  self.capacity, self.window_shape, self.inference_backend),
+            daemon=True
+        )
+        self.process.start()
+        child_end.close()
+        self.connection = parent_end
+        try:
+            status, detail = self.connection.recv()
+        except (EOFError, OSError) as e:
+            status, detail = "error", f"worker exited before it was ready ({e!r})"
+        if status != "ready":
+            self.stop()
+            raise RuntimeError(f"Inference worker failed to start: {detail}")
+        self.model_version = detail
+
+    def stop(self, timeout=5):
+        if self.process is None:
+            return
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def run(self, X, timeout):
+        """Score up to `capacity` windows; raises if the worker died or timed out"""
+        n = len(X)
+        self.inputs[:n] = X
+        self.connection.send(n)
+        if not self.connection.poll(timeout):
+            raise TimeoutError(f"Inference worker did not answer within {timeout}s")
+        status, detail = self.connection.recv()
+        if status != "done":
+            raise RuntimeError(detail)
+        return self.outputs[:n].copy()
+
+    def release(self):
+        del self.inputs, self.outputs
+        self.input_block.close()
+        self.input_block.unlink()
+        self.output_block.close()
+        self.output_block.unlink()
+
+
+class InferencePool:
+    """N worker processes, each holding the loaded model, fed through shared memory.
+
+    `predict_windows(X)` splits prepared windows into chunks of at most
+    `chunk_size`, runs them on idle workers in parallel and returns the
+    outputs in order, shaped (n, 1) like Keras. Given a `model_version`, only
+    workers serving that version are used, and LookupError is raised once
+    none does (e.g. all were restarted on a newer model). Inputs are copied
+    into each worker's preallocated shared-memory block instead of being
+    pickled. A worker that crashes or times out is restarted and its chunk
+    retried once.
+    A worker that cannot be restarted (e.g. the model is gone) is set aside
+    as dead rather than handed out again; `restart()` replaces every worker
+    one at a time (e.g. after a model update) while the others keep serving,
+    and revives dead ones. Failures are counted in `metrics()`, which the
+    /metrics endpoint reports.
+    """
+
+    def __init__(self, n_workers, window_shape, inference_backend="numpy", chunk_size=1024, timeout=30.0):
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.restarts = 0
+        self.chunks = 0
+        self.failures = 0
+        self.last_error = None
+        # Spawned workers do not inherit the server's threads, locks or TensorFlow state
+        context = mp.get_context("spawn")
+        self._workers = [_Worker(context, chunk_size, tuple(window_shape), inference_backend) for _ in range(n_workers)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._dead = set()  # Workers whose restart failed; kept out of _idle
+        self._executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="inference-pool")
+        self._lock = threading.Lock()
+
+    @property
+    def model_versions(self):
+        return sorted({worker.model_version for worker in self._workers if worker.process is not None})
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+
+    def _check_version(self, model_version):
+        if model_version is not None and model_version not in self.model_versions:
+            raise LookupError(f"No inference worker serves model version {model_version}")
+
+    def _take_worker(self, model_version=None):
+        """Wait for an idle worker serving model_version (any, if None); raises once every worker is dead"""
+        while True:
+            try:
+                worker = self._idle.get(timeout=0.1)
+            except queue.Empty:
+                if len(self._dead) == self.n_workers:
+                    raise RuntimeError(f"No inference workers are running: {self.last_error}")
+                self._check_version(model_version)
+                continue
+            if model_version is None or worker.model_version == model_version:
+                return worker
+            # Serving another version; hand it back and wait for one that matches
+            self._idle.put(worker)
+            self._check_version(model_version)
+            time.sleep(0.005)
+
+    def _run_chunk(self, X, model_version=None):
+        worker = self._take_worker(model_version)
+        try:
+            try:
+                return worker.run(X, self.timeout)
+            except (EOFError, BrokenPipeError, ConnectionResetError, TimeoutError, OSError) as e:
+                self._record_failure(f"Inference worker failed, restarting it: {e!r}")
+                try:
+                    worker.restart()
+                except Exception as restart_error:
+                    self._record_failure(f"Inference worker could not be restarted: {restart_error}")
+                    with self._lock:
+                        self._dead.add(worker)
+                    raise RuntimeError(self.last_error) from restart_error
+                with self._lock:
+                    self.restarts += 1
+                # The restarted worker loads the promoted model, which may have changed
+                if model_version is not None and worker.model_version != model_version:
+                    raise LookupError(f"No inference worker serves model version {model_version}")
+                return worker.run(X, self.timeout)
+        finally:
+            if worker not in self._dead:
+                self._idle.put(worker)
+
+    def predict_windows(self, X, model_version=None):
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.empty((0, 1), dtype=np.float32)
+        chunks = [X[start:start + self.chunk_size] for start in range(0, len(X), self.chunk_size)]
+        with self._lock:
+            self.chunks += len(chunks)
+        if len(chunks) == 1:
+            outputs = [self._run_chunk(chunks[0], model_version)]
+        else:
+            outputs = list(self._executor.map(self._run_chunk, chunks, [model_version] * len(chunks)))
+        return np.concatenate(outputs)[:, None]
+
+    def restart(self):
+        """Replace every worker process, one at a time, without interrupting the others.
+
+        Dead workers are started again too. Raises RuntimeError if any worker
+        failed to start; it is left dead and the others keep serving.
+        """
+        errors = []
+
+        def replace(worker):
+            try:
+                worker.restart()
+            except Exception as e:
+                errors.append(str(e))
+                self._record_failure(f"Inference worker could not be restarted: {e}")
+                with self._lock:
+                    self._dead.add(worker)
+                return
+            with self._lock:
+                self.restarts += 1
+                self._dead.discard(worker)
+            self._idle.put(worker)
+
+        pending = [worker for worker in self._workers if worker not in self._dead]
+        for worker in list(self._dead):
+            replace(worker)
+        while pending:
+            try:
+                worker = self._idle.get(timeout=0.1)
+            except queue.Empty:
+                # A worker that died while we waited will not come back to _idle
+                pending = [worker for worker in pending if worker not in self._dead]
+                continue
+            if worker not in pending:
+                # Already restarted; hand it back and wait for one of the others to go idle
+                self._idle.put(worker)
+                time.sleep(0.005)
+                continue
+            pending.remove(worker)
+            replace(worker)
+        if errors:
+            raise RuntimeError(f"{len(errors)} inference worker(s) could not be restarted: {errors[0]}")
+
+    def metrics(self):
+        return {
+            "workers": self.n_workers,
+            "alive": sum(1 for worker in self._workers if worker.process is not None and worker.process.is_alive()),
+            "idle": self._idle.qsize(),
+            "chunks": self.chunks,
+            "dead": len(self._dead),
+            "restarts": self.restarts,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "model_versions": self.model_versions
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for worker in self._workers:
+            worker.stop()
+            worker.release()
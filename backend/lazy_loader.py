@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+class LazyResource:
+    """A value built on first use by `factory()`, e.g. a model or an API client.
+
+    `get()` runs the factory once, under a lock, so concurrent first callers
+    wait for a single load. A failed load is retried on the next `get()`.
+    Coroutines use `aget()`, which runs a first load in a thread so it does
+    not block the event loop.
+    `warm_up()` starts the load on a background thread so it is usually done
+    before the first request needs it. `status()` reports the loading state
+    for /health.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.state = NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.state == LOADED:
+            return self._value
+        with self._lock:
+            if self.state != LOADED:
+                self.state = LOADING
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.state = FAILED
+                    self.error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self.state = LOADED
+        return self._value
+
+    async def aget(self):
+        if self.state == LOADED:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def warm_up(self):
+        """Start loading in a daemon thread; errors are recorded in status()"""
+        def load():
+            try:
+                self.get()
+            except Exception as e:
+                print(f"Warm-up of {self.name} failed: {e}")
+        thread = threading.Thread(target=load, name=f"warm-up-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def swap(self, value):
+        """Replace the loaded value; callers already holding the old one keep using it"""
+        with self._lock:
+            previous, self._value = self._value, value
+            self.error = None
+            self.state = LOADED
+        return previous
+
+    @property
+    def loaded(self):
+        return self.state == LOADED
+
+    def status(self):
+        status = {"state": self.state}
+        if self.load_seconds is not None:
+            status["load_seconds"] = round(self.load_seconds, 3)
+        if self.error:
+            status["error"] = self.error
+        return status
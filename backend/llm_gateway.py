@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LLMGateway:
+    """Runs a blocking LLM call on a dedicated bounded thread pool.
+
+    `generate(prompt)` is any synchronous function returning the response
+    text. At most `max_concurrency` calls run at once; the rest wait in the
+    pool's queue, so the event loop never blocks on an LLM round trip.
+    Callers waiting longer than `timeout` seconds (queueing included) get
+    asyncio.TimeoutError; a call that has not started yet is cancelled.
+    """
+
+    def __init__(self, generate, max_concurrency=8, timeout=30.0):
+        self.generate = generate
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def _run(self, prompt):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return self.generate(prompt)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _discard(self, future):
+        """Undo the queued count for a call cancelled before a worker picked it up"""
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def complete(self, prompt, timeout=None):
+        """Generate a response for `prompt` without blocking the event loop"""
+        with self._lock:
+            self.queued += 1
+        future = self._executor.submit(self._run, prompt)
+        future.add_done_callback(self._discard)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "timeout_seconds": self.timeout,
+                "queue_depth": self.queued,
+                "in_flight": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -50,10 +50,39 @@ class PredictiveMaintenanceModel:
         
         return history
     
+    def train_on_dataset(self, train_data, validation_data, epochs=50):
+        """Train from tf.data pipelines of (sequence, label) batches"""
+        early_stopping = tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=5,
+            restore_best_weights=True
+        )
+        
+        history = self.model.fit(
+            train_data,
+            validation_data=validation_data,
+            epochs=epochs,
+            callbacks=[early_stopping],
+            verbose=1
+        )
+        
+        return history
+    
+    def evaluate_dataset(self, dataset):
+        """Evaluate model performance batch by batch over a tf.data pipeline"""
+        y_test, y_pred_proba = [], []
+        for X_batch, y_batch in dataset:
+            y_pred_proba.append(self.model.predict_on_batch(X_batch))
+            y_test.append(y_batch.numpy())
+        return self._classification_metrics(np.concatenate(y_test), np.concatenate(y_pred_proba))
+    
     def evaluate(self, X_test, y_test):
         """Evaluate model performance"""
         # Get predictions
         y_pred_proba = self.model.predict(X_test)
+        return self._classification_metrics(y_test, y_pred_proba)
+    
+    def _classification_metrics(self, y_test, y_pred_proba):
         y_pred = (y_pred_proba > 0.5).astype(int)
         
         # Calculate metrics
@@ -1,18 +1,91 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from datetime import datetime, timedelta
 
+CATEGORICAL_COLUMNS = ['device_id', 'component_type', 'sensor_type', 'location']
+NUMERICAL_COLUMNS = ['sensor_value', 'hour', 'day_of_week', 'month']
+FEATURE_COLUMNS = [
+    'sensor_value_scaled',
+    'hour_scaled',
+    'day_of_week_scaled',
+    'month_scaled',
+    'device_id_encoded',
+    'component_type_encoded',
+    'sensor_type_encoded',
+    'location_encoded'
+]
+RAW_COLUMNS = ['timestamp', 'sensor_value', 'threshold_breach'] + CATEGORICAL_COLUMNS  # Columns read from raw files
+
+class SequenceWindows:
+    """Sequences kept as start rows into one feature matrix, materialized on demand.
+    
+    `features` holds every device's rows back to back, each device sorted by
+    time, and sequence i is rows starts[i]:starts[i] + sequence_length. This
+    takes the feature matrix plus one offset per sequence, roughly
+    sequence_length times less memory than the stacked (N, sequence_length,
+    n_features) array. Indexing with an int returns a read-only view; slices
+    and index arrays return a copy of just those sequences.
+    """
+    
+    def __init__(self, features, row_labels, starts, sequence_length):
+        self.features = features
+        self.starts = starts
+        self.sequence_length = sequence_length
+        self.labels = row_labels[starts + sequence_length]
+        if len(features) < sequence_length:
+            self._views = np.empty((0, sequence_length, features.shape[1]), dtype=features.dtype)
+        else:
+            # (rows - sequence_length + 1, sequence_length, n_features) strided view, no copy
+            self._views = sliding_window_view(features, sequence_length, axis=0).transpose(0, 2, 1)
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    @property
+    def shape(self):
+        return (len(self.starts), self.sequence_length, self.features.shape[1])
+    
+    def __getitem__(self, index):
+        return self._views[self.starts[index]]
+    
+    def to_array(self):
+        """The stacked (N, sequence_length, n_features) array"""
+        return np.ascontiguousarray(self[:])
+    
+    def batches(self, batch_size=32, shuffle=False, seed=None):
+        """Yield (X, y) batches, copying one batch of sequences at a time"""
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batch_size):
+            index = order[start:start + batch_size]
+            yield self[index], self.labels[index]
+    
+    def dataset(self, batch_size=32, shuffle=False, seed=None):
+        """tf.data pipeline of (X, y) batches, reshuffled on every epoch when shuffle is set"""
+        import tensorflow as tf
+        
+        rng = np.random.default_rng(seed)
+        
+        def generate():
+            yield from self.batches(batch_size, shuffle, rng.integers(2**32) if shuffle else None)
+        
+        return tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec(shape=(None, self.sequence_length, self.features.shape[1]), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.as_dtype(self.labels.dtype))
+        )).prefetch(tf.data.AUTOTUNE)
+
 class DataPreprocessor:
     def __init__(self):
         self.scalers = {}
         self.label_encoders = {}
         self.sequence_length = 24  # 24 hours of data for sequence prediction
+        self.stream = None  # DeviceWindowStream over per-device partitions, set by fit_streaming
         
     def load_and_preprocess(self, file_path):
         """Load and preprocess the raw data"""
         # Load data
-        df = pd.read_csv(file_path)
+        df = self.load_raw(file_path)
         
         # Convert timestamp to datetime
         df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -48,36 +121,123 @@ class DataPreprocessor:
         
         return df
     
-    def create_sequences(self, df, target_device=None):
-        """Create sequences for LSTM model"""
-        if target_device:
-            df = df[df['device_id'] == target_device]
+    def load_raw(self, file_path, device_ids=None, start=None, end=None):
+        """Read RAW_COLUMNS of a raw CSV, from its Parquet copy when parquet_store made one.
         
-        # Features for sequence
-        feature_columns = [
-            'sensor_value_scaled',
-            'hour_scaled',
-            'day_of_week_scaled',
-            'month_scaled',
-            'device_id_encoded',
-            'component_type_encoded',
-            'sensor_type_encoded',
-            'location_encoded'
-        ]
+        device_ids and the [start, end] timestamp range are pushed down to the
+        Parquet partitions, or applied in pandas when reading the CSV.
+        """
+        from parquet_store import dataset_path, has_dataset, read_csv, read_dataset
+        
+        if has_dataset(file_path):
+            df = read_dataset(dataset_path(file_path), RAW_COLUMNS, device_ids, start, end)
+        else:
+            df = read_csv(file_path, RAW_COLUMNS, device_ids, start, end)
+        # LabelEncoder and the fills below expect plain object columns
+        for col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype(object)
+        return df
+    
+    def _clean_device_data(self, df):
+        """Sort one device's rows and fill gaps and time features like load_and_preprocess"""
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp')
+        # Fill within the device only; leading gaps take the first known value
+        df['sensor_value'] = df['sensor_value'].ffill().bfill()
+        df['threshold_breach'] = df['threshold_breach'].fillna(False).astype(int)
+        df['hour'] = df['timestamp'].dt.hour
+        df['day_of_week'] = df['timestamp'].dt.dayofweek
+        df['month'] = df['timestamp'].dt.month
+        return df
+    
+    def fit_streaming(self, file_path, scratch_dir, chunksize=100_000):
+        """Fit the encoders and scalers on a CSV too large to load at once.
         
-        sequences = []
-        labels = []
+        The CSV is read chunksize rows at a time and split into one file per
+        device under scratch_dir. One pass over the devices then collects the
+        categories and partial_fits the scalers; afterwards sequence_datasets
+        streams the sequences from the same files.
+        """
+        # Shared with the backend's training pipeline
+        from training_stream import DeviceWindowStream, partition_csv_by_device, time_order
         
-        for device in df['device_id'].unique():
-            device_data = df[df['device_id'] == device].sort_values('timestamp')
-            
-            for i in range(len(device_data) - self.sequence_length):
-                sequence = device_data[feature_columns].iloc[i:i + self.sequence_length].values
-                label = device_data['threshold_breach'].iloc[i + self.sequence_length]
-                sequences.append(sequence)
-                labels.append(label)
+        partitions = partition_csv_by_device(file_path, scratch_dir, chunksize, pd.to_datetime)
+        categories = {col: [] for col in CATEGORICAL_COLUMNS}
+        self.scalers = {col: StandardScaler() for col in NUMERICAL_COLUMNS}
+        for partition in partitions.values():
+            df = self._clean_device_data(pd.read_csv(partition.path))
+            for col in CATEGORICAL_COLUMNS:
+                categories[col].append(df[col].unique())
+            for col in NUMERICAL_COLUMNS:
+                self.scalers[col].partial_fit(df[[col]])
+        # Encoders are fit on the distinct values only, which gives the same classes
+        for col, values in categories.items():
+            self.label_encoders[col] = LabelEncoder().fit(np.concatenate(values))
         
-        return np.array(sequences), np.array(labels)
+        self.stream = DeviceWindowStream(
+            partitions, {}, self._device_sequence_blocks,
+            (self.sequence_length, len(FEATURE_COLUMNS)), device_order=time_order(partitions)
+        )
+        return self
+    
+    def transform(self, df):
+        """Encode and scale cleaned rows with the already fitted encoders and scalers"""
+        for col in CATEGORICAL_COLUMNS:
+            df[f'{col}_encoded'] = self.label_encoders[col].transform(df[col])
+        for col in NUMERICAL_COLUMNS:
+            df[f'{col}_scaled'] = self.scalers[col].transform(df[[col]])
+        return df
+    
+    def _device_sequence_blocks(self, device_data, device_logs, block_size=4096):
+        """Yield one device's sequences in blocks of at most block_size"""
+        windows = self.create_sequences(self.transform(self._clean_device_data(device_data)), lazy=True)
+        for start in range(0, len(windows), block_size):
+            yield windows[start:start + block_size], windows.labels[start:start + block_size]
+    
+    def sequence_datasets(self, test_size=0.2, validation_size=0.2, batch_size=32, seed=42, shuffle_buffer=10_000):
+        """(train, validation, test) tf.data pipelines over the sequences found by fit_streaming.
+        
+        Every sequence is assigned to the test set with probability test_size,
+        and the rest to validation with probability validation_size, using
+        draws that repeat on every epoch.
+        """
+        stream = self.stream
+        test_end = test_size
+        validation_end = test_size + (1 - test_size) * validation_size
+        train = stream.dataset(lambda: stream.iter_split_blocks(validation_end, 1.0, seed), batch_size=batch_size,
+                               shuffle_buffer=shuffle_buffer)
+        validation = stream.dataset(lambda: stream.iter_split_blocks(test_end, validation_end, seed), batch_size=batch_size)
+        test = stream.dataset(lambda: stream.iter_split_blocks(0.0, test_end, seed), batch_size=batch_size)
+        return train, validation, test
+    
+    def create_sequences(self, df, target_device=None, lazy=False):
+        """Create sequences for LSTM model.
+        
+        Devices come in order of first appearance, each sorted by timestamp,
+        and every window of sequence_length rows is labelled with the
+        threshold_breach of the row after it. Returns float32 (X, y) arrays,
+        or a SequenceWindows over the same sequences when lazy is set.
+        """
+        if target_device:
+            df = df[df['device_id'] == target_device]
+        
+        # Group once: rows of each device together, in time order
+        device_codes = pd.factorize(df['device_id'])[0]
+        has_device = device_codes >= 0
+        df = df[has_device].assign(_device=device_codes[has_device]).sort_values(['_device', 'timestamp'], kind='stable')
+        device_codes = df['_device'].to_numpy()
+        features = np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+        row_labels = df['threshold_breach'].to_numpy()
+        
+        # A row starts a sequence if the device has sequence_length more rows after it
+        device_rows = np.bincount(device_codes)
+        device_offsets = np.concatenate([[0], np.cumsum(device_rows)[:-1]])
+        row_position = np.arange(len(df)) - device_offsets[device_codes]
+        starts = np.flatnonzero(row_position < device_rows[device_codes] - self.sequence_length)
+        windows = SequenceWindows(features, row_labels, starts, self.sequence_length)
+        if lazy:
+            return windows
+        return windows.to_array(), windows.labels
     
     def calculate_device_health(self, df, device_id, current_time=None):
         """Calculate device health score based on recent data"""
@@ -104,7 +264,32 @@ class DataPreprocessor:
         health_score = (breach_ratio * 0.7 + sensor_volatility * 0.3) * 100
         
         return round(max(min(health_score, 100), 0), 2)
-    
+
+    def calculate_fleet_health(self, df, device_ids=None, current_time=None):
+        """Health scores of many devices at once, as calculate_device_health computes them.
+
+        One pass over the rows of the last 24 hours, grouped by device,
+        instead of filtering the whole frame once per device. Returns a
+        Series indexed by device id, covering device_ids or every device in
+        df; devices without recent data score 100.
+        """
+        if current_time is None:
+            current_time = df['timestamp'].max()
+        if device_ids is None:
+            device_ids = df['device_id'].dropna().unique()
+
+        time_threshold = current_time - timedelta(hours=24)
+        recent = df.loc[df['timestamp'] >= time_threshold, ['device_id', 'threshold_breach', 'sensor_value']]
+        grouped = recent.groupby('device_id', sort=False, observed=True)
+
+        breach_ratio = 1 - grouped['threshold_breach'].mean()
+        sensor_volatility = 1 - np.minimum(grouped['sensor_value'].std() / 100, 0.5)
+        health_scores = ((breach_ratio * 0.7 + sensor_volatility * 0.3) * 100).clip(0, 100)
+
+        # Python's round, so scores match the per-device function exactly
+        health_scores = health_scores.map(lambda score: round(score, 2))
+        return health_scores.reindex(pd.Index(device_ids, name='device_id'), fill_value=100).rename('health_score')
+
     def detect_anomalies(self, df, device_id, threshold=3):
         """Detect anomalies using Z-score method"""
         device_data = df[df['device_id'] == device_id]
@@ -119,19 +304,40 @@ class DataPreprocessor:
         
         return anomalies
     
+    def detect_fleet_anomalies(self, df, threshold=3, group_columns=('device_id', 'sensor_type')):
+        """Z-score anomalies of every device, per sensor type, in one vectorized pass.
+        
+        With group_columns=('device_id',) this returns the rows detect_anomalies
+        finds for each device, for all devices at once.
+        """
+        # Shared with the backend's streaming anomaly detector
+        from anomaly_engine import zscore_anomalies
+        
+        group_columns = [col for col in group_columns if col in df.columns]
+        return zscore_anomalies(df, threshold, 'sensor_value', group_columns)
+    
     def get_maintenance_prediction(self, df, device_id):
         """Predict next maintenance time based on threshold breaches"""
+        # Shared with the backend's per-device breach tracker
+        from breach_tracker import DeviceBreachWindow
+        
         device_data = df[df['device_id'] == device_id].sort_values('timestamp')
         
         if len(device_data) < self.sequence_length:
             return None
         
-        # Calculate breach frequency
-        recent_breaches = device_data['threshold_breach'].rolling(window=self.sequence_length).mean().iloc[-1]
+        # Breach frequency over the last sequence_length readings only
+        window = DeviceBreachWindow(self.sequence_length)
+        for breach in device_data['threshold_breach'].values[-self.sequence_length:]:
+            window.add(breach)
+        return window.recommendation()
+    
+    def get_fleet_maintenance_predictions(self, df):
+        """get_maintenance_prediction of every device from one sort, as {device_id: recommendation}"""
+        from breach_tracker import BreachRateTracker
         
-        if recent_breaches > 0.2:  # If more than 20% breaches in recent window
-            return "Immediate maintenance recommended"
-        elif recent_breaches > 0.1:  # If more than 10% breaches
-            return "Maintenance recommended within 48 hours"
-        else:
-            return "No immediate maintenance required" 
\ No newline at end of file
+        tracker = BreachRateTracker(self.sequence_length)
+        recent = df.sort_values('timestamp').groupby('device_id', sort=False).tail(self.sequence_length)
+        for device_id, breaches in recent.groupby('device_id', sort=False)['threshold_breach']:
+            tracker.rebuild(device_id, breaches.values)
+        return {device_id: recommendation for device_id, (rate, recommendation) in tracker.predictions().items()} 
\ No newline at end of file
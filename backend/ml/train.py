@@ -1,10 +1,11 @@
 import os
+import tempfile
 import pandas as pd
 import numpy as np
 import tensorflow as tf
-from sklearn.model_selection import train_test_split
-from preprocessing import DataPreprocessor
-from model import PredictiveMaintenanceModel
+# Run from backend/ as `python -m ml.train`: backend/ is the import root, as for the app
+from ml.preprocessing import DataPreprocessor, FEATURE_COLUMNS
+from ml.model import PredictiveMaintenanceModel
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -65,35 +66,33 @@ def analyze_feature_importance(model, feature_names):
     plt.savefig('feature_importance.png')
     plt.close()
 
-def main():
+def main(data_path='data/raw/combined_data.csv', chunksize=100_000):
     # Initialize preprocessor
     preprocessor = DataPreprocessor()
     
-    # Load and preprocess data
-    print("Loading and preprocessing data...")
-    data = preprocessor.load_and_preprocess('data/raw/combined_data.csv')
-    
-    # Create sequences for LSTM
-    print("Creating sequences...")
-    sequences, labels = preprocessor.create_sequences(data)
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        sequences, labels, test_size=0.2, random_state=42
-    )
-    
-    # Initialize and train model
-    print("Training model...")
-    model = PredictiveMaintenanceModel(
-        sequence_length=preprocessor.sequence_length,
-        n_features=X_train.shape[2]
-    )
-    
-    history = model.train(X_train, y_train, epochs=50)
-    
-    # Evaluate model
-    print("Evaluating model...")
-    metrics = model.evaluate(X_test, y_test)
+    # The CSV is read in chunks and split per device into a scratch directory,
+    # so memory use is bounded by the largest device rather than the dataset
+    with tempfile.TemporaryDirectory(prefix='training-') as scratch_dir:
+        # Fit encoders and scalers in one streaming pass
+        print("Loading and preprocessing data...")
+        preprocessor.fit_streaming(data_path, scratch_dir, chunksize)
+        
+        # Sequences for the LSTM are regenerated from the device files every epoch
+        print("Creating sequence datasets...")
+        train_data, validation_data, test_data = preprocessor.sequence_datasets(test_size=0.2, seed=42)
+        
+        # Initialize and train model
+        print("Training model...")
+        model = PredictiveMaintenanceModel(
+            sequence_length=preprocessor.sequence_length,
+            n_features=len(FEATURE_COLUMNS)
+        )
+        
+        history = model.train_on_dataset(train_data, validation_data, epochs=50)
+        
+        # Evaluate model
+        print("Evaluating model...")
+        metrics = model.evaluate_dataset(test_data)
     
     # Print metrics
     print("\nModel Performance Metrics:")
@@ -1,23 +1,107 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
-import tensorflow as tf
-from tensorflow import keras
 from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime, timedelta
 import os
 import joblib
 import random
+import hashlib
+import tempfile
+from numpy_lstm import NumpyLSTMModel, export_h5_to_npz, is_current_export
+import parquet_store
+from model_registry import ModelRegistry, MODEL_FILE, NUMPY_MODEL_FILE, SCALER_FILE
+from training_stream import DeviceWindowStream, partition_csv_by_device, time_order
 
-Sequential = keras.models.Sequential
-LSTM = keras.layers.LSTM
-Dense = keras.layers.Dense
-Dropout = keras.layers.Dropout
+def _window_log_features(device_logs, start_times, end_times):
+    """Log count, mean severity and max severity for logs inside each [start, end] window.
+    
+    Matches the pandas semantics of filtering the logs per window: NaT bounds
+    or NaT log timestamps never match, and NaN severities are skipped by the
+    mean/max but still counted as logs.
+    """
+    n_windows = len(start_times)
+    counts = np.zeros(n_windows, dtype=np.float64)
+    means = np.zeros(n_windows, dtype=np.float64)
+    maxes = np.zeros(n_windows, dtype=np.float64)
+    if device_logs.empty or n_windows == 0:
+        return counts, means, maxes
+    
+    # Logs are sorted by timestamp with NaT last, so the valid ones form a sorted prefix
+    log_times = device_logs['timestamp'].values.astype('datetime64[ns]')
+    n_valid = int((~np.isnat(log_times)).sum())
+    log_times = log_times[:n_valid]
+    
+    lo = np.searchsorted(log_times, start_times, side='left')
+    hi = np.searchsorted(log_times, end_times, side='right')
+    valid = ~(np.isnat(start_times) | np.isnat(end_times)) & (hi > lo)
+    lo = np.where(valid, lo, 0)
+    hi = np.where(valid, hi, 0)
+    counts[:] = hi - lo
+    if not valid.any():
+        return counts, means, maxes
+    
+    severities = device_logs['event_severity'].values[:n_valid].astype(np.float64)
+    present = ~np.isnan(severities)
+    filled = np.where(present, severities, 0.0)
+    
+    # Mean severity, skipping NaN like Series.mean()
+    present_cumsum = np.concatenate([[0], np.cumsum(present)])
+    n_present = present_cumsum[hi] - present_cumsum[lo]
+    if np.all(filled == np.round(filled)) and np.abs(filled).sum() < 2 ** 53:
+        # Integer severities: prefix sums are exact, so the differences are too
+        filled_cumsum = np.concatenate([[0.0], np.cumsum(filled)])
+        sums = filled_cumsum[hi] - filled_cumsum[lo]
+    else:
+        sums = np.array([filled[a:b].sum() for a, b in zip(lo, hi)], dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means[valid] = sums[valid] / n_present[valid]
+    
+    # Max severity via a sparse table of range maxima, NaN when every severity is NaN
+    maxes[valid] = _range_max(np.where(present, severities, -np.inf), lo[valid], hi[valid])
+    maxes[valid & (n_present == 0)] = np.nan
+    
+    return counts, means, maxes
+
+def _range_max(values, lo, hi):
+    """Maximum of values[lo[i]:hi[i]] for every i (all ranges non-empty)."""
+    levels = [values]
+    width = 1
+    while 2 * width <= len(values):
+        prev = levels[-1]
+        levels.append(np.maximum(prev[:-width], prev[width:]))
+        width *= 2
+    
+    lengths = hi - lo
+    level = np.floor(np.log2(lengths)).astype(np.int64)
+    result = np.empty(len(lo), dtype=np.float64)
+    for k in np.unique(level):
+        mask = level == k
+        table = levels[k]
+        result[mask] = np.maximum(table[lo[mask]], table[hi[mask] - (1 << k)])
+    return result
+
+def parse_sensor_timestamps(timestamps):
+    """Sensor timestamps as the model reads them (HH:MM, anything else becomes NaT)"""
+    return pd.to_datetime(timestamps, format="%H:%M", errors='coerce')
+
+INFERENCE_BACKENDS = ("keras", "numpy")
+SENSOR_COLUMNS = ['timestamp', 'device_id', 'sensor_value', 'threshold_breach']  # Raw columns prepare_data reads
+LOG_COLUMNS = ['timestamp', 'device_id', 'event_severity']
 
 class PredictiveMaintenanceModel:
-    def __init__(self):
+    def __init__(self, inference_backend="keras"):
+        if inference_backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend: {inference_backend}")
         self.model = None
+        self.model_version = None  # Digest of the loaded model file
+        self.inference_backend = inference_backend  # "numpy" serves without importing TensorFlow
         self.scaler = MinMaxScaler()
         self.sequence_length = 10  # Number of time steps to look back
+        self.inference_batch_size = 4096  # Max windows per Keras predict step
+        self.in_memory_training_bytes = 256 * 1024 * 1024  # Larger raw CSVs are trained on in chunks
+        self.training_chunksize = 100_000  # CSV rows read at a time by train_streaming
+        self.training_block_windows = 4096  # Windows built at a time by train_streaming
         self.gpt_model = None  # Will be initialized when needed
         
         # Data paths
@@ -30,14 +114,89 @@ class PredictiveMaintenanceModel:
         # Create directories if they don't exist
         os.makedirs(self.PROCESSED_DATA_DIR, exist_ok=True)
         os.makedirs(self.MODELS_DIR, exist_ok=True)
+    
+    @property
+    def registry(self):
+        """Versioned model bundles under MODELS_DIR/registry"""
+        return ModelRegistry(os.path.join(self.MODELS_DIR, 'registry'))
         
-    def load_data(self):
-        """Load data from CSV files"""
-        sensor_data = pd.read_csv(os.path.join(self.RAW_DATA_DIR, 'sensor_data.csv'))
-        log_data = pd.read_csv(os.path.join(self.RAW_DATA_DIR, 'log_data.csv'))
-        return sensor_data, log_data
+    def load_data(self, device_ids=None, start=None, end=None):
+        """Load the columns the model uses from the raw data.
+        
+        Reads the Parquet copies made by parquet_store when they exist,
+        pushing the device_ids and [start, end] filters down to the
+        partitions; otherwise reads the CSVs and applies the same filters
+        in pandas. Both return the same frames: typed columns, sorted by
+        device and timestamp.
+        """
+        sensor_path = os.path.join(self.RAW_DATA_DIR, 'sensor_data.csv')
+        log_path = os.path.join(self.RAW_DATA_DIR, 'log_data.csv')
+        if parquet_store.has_dataset(sensor_path) and parquet_store.has_dataset(log_path):
+            sensor_data = parquet_store.read_dataset(parquet_store.dataset_path(sensor_path), SENSOR_COLUMNS,
+                                                     device_ids, start, end)
+            log_data = parquet_store.read_dataset(parquet_store.dataset_path(log_path), LOG_COLUMNS,
+                                                  device_ids, start, end)
+        else:
+            sensor_data = parquet_store.read_csv(sensor_path, SENSOR_COLUMNS, device_ids, start, end)
+            log_data = parquet_store.read_csv(log_path, LOG_COLUMNS, device_ids, start, end)
+        return self._same_layout(sensor_data), self._same_layout(log_data)
+    
+    @staticmethod
+    def _same_layout(df):
+        """Row order and categories that don't depend on whether df came from Parquet or CSV"""
+        df = df.copy()
+        for column in df.select_dtypes('category').columns:
+            df[column] = df[column].cat.remove_unused_categories()
+            df[column] = df[column].cat.reorder_categories(sorted(df[column].cat.categories))
+        keys = [column for column in ('device_id', 'timestamp') if column in df.columns]
+        return df.sort_values(keys, kind='stable', ignore_index=True) if keys else df
         
     def prepare_data(self, sensor_data, log_data):
+        sensor_data, log_data = self._sort_inputs(sensor_data, log_data)
+        
+        # Create features
+        features = []
+        labels = []
+        
+        # Process sensor data
+        for device_id, device_sensors, device_logs in self._iter_devices(sensor_data, log_data, self.sequence_length + 1):
+            n_windows = len(device_sensors) - self.sequence_length
+            features.append(self._window_features(device_sensors, device_logs, n_windows))
+            
+            # Label (1 if next reading has threshold breach, 0 otherwise)
+            next_breaches = device_sensors['threshold_breach'].values[self.sequence_length:]
+            labels.append(next_breaches.astype(bool).astype(np.int64))
+        
+        if not features:
+            return np.array([]), np.array([])
+        
+        features = np.concatenate(features)
+        labels = np.concatenate(labels)
+        
+        return features, labels
+    
+    def prepare_latest_windows(self, sensor_data, log_data):
+        """Build the most recent window of every device for inference.
+        
+        Returns the device ids and a (devices, sequence_length, features) array
+        whose rows line up with them. Devices with fewer than sequence_length
+        readings are left out.
+        """
+        sensor_data, log_data = self._sort_inputs(sensor_data, log_data)
+        
+        device_ids = []
+        features = []
+        for device_id, device_sensors, device_logs in self._iter_devices(sensor_data, log_data, self.sequence_length):
+            latest = device_sensors.iloc[-self.sequence_length:]
+            features.append(self._window_features(latest, device_logs, 1))
+            device_ids.append(device_id)
+        
+        if not features:
+            return [], np.empty((0, self.sequence_length, 5))
+        
+        return device_ids, np.concatenate(features)
+    
+    def _sort_inputs(self, sensor_data, log_data):
         # Ensure sensor_data is a DataFrame
         if not isinstance(sensor_data, pd.DataFrame):
             sensor_data = pd.DataFrame(sensor_data)
@@ -46,69 +205,60 @@ class PredictiveMaintenanceModel:
         if 'timestamp' not in sensor_data.columns:
             print("sensor_data missing 'timestamp' column. Data:", sensor_data.head())
         # Convert timestamps (specify format if known)
-        sensor_data['timestamp'] = pd.to_datetime(sensor_data['timestamp'], format="%H:%M", errors='coerce')
+        sensor_data['timestamp'] = parse_sensor_timestamps(sensor_data['timestamp'])
         log_data['timestamp'] = pd.to_datetime(log_data['timestamp'], errors='coerce')
         
         # Sort by timestamp
         sensor_data = sensor_data.sort_values('timestamp')
         log_data = log_data.sort_values('timestamp')
+        return sensor_data, log_data
+    
+    def _iter_devices(self, sensor_data, log_data, min_rows):
+        """Yield (device_id, device_sensors, device_logs) in order of first appearance"""
+        device_logs_index = None
+        for device_id, positions in sensor_data.groupby('device_id', sort=False, observed=True).indices.items():
+            if len(positions) < min_rows:
+                continue
+            if device_logs_index is None:
+                device_logs_index = log_data.groupby('device_id', sort=False, observed=True).indices
+            yield device_id, sensor_data.iloc[positions], log_data.iloc[device_logs_index.get(device_id, [])]
+    
+    def _window_features(self, device_sensors, device_logs, n_windows):
+        """Build the first n_windows windows of a single device without a per-window loop.
         
-        # Create features
-        features = []
-        labels = []
+        Windows are strided views over the device's sensor columns, and the log
+        features of each window come from searchsorted boundaries into the sorted
+        log timestamps plus cumulative sums of the severities.
+        """
+        seq_len = self.sequence_length
         
-        # Process sensor data
-        for device_id in sensor_data['device_id'].unique():
-            device_sensors = sensor_data[sensor_data['device_id'] == device_id]
-            device_logs = log_data[log_data['device_id'] == device_id]
-            
-            if len(device_sensors) <= self.sequence_length:
-                continue
-                
-            # Create sequences
-            for i in range(len(device_sensors) - self.sequence_length):
-                sequence = device_sensors.iloc[i:i+self.sequence_length]
-                
-                # Extract features
-                sensor_values = sequence['sensor_value'].values.reshape(-1, 1)
-                threshold_breaches = sequence['threshold_breach'].values.reshape(-1, 1)
-                
-                # Get corresponding logs
-                start_time = sequence.iloc[0]['timestamp']
-                end_time = sequence.iloc[-1]['timestamp']
-                relevant_logs = device_logs[
-                    (device_logs['timestamp'] >= start_time) & 
-                    (device_logs['timestamp'] <= end_time)
-                ]
-                
-                # Calculate log-based features
-                log_features = np.array([
-                    len(relevant_logs),
-                    relevant_logs['event_severity'].mean() if not relevant_logs.empty else 0,
-                    relevant_logs['event_severity'].max() if not relevant_logs.empty else 0
-                ]).reshape(1, -1)
-                
-                # Combine features for each timestep
-                timestep_features = np.concatenate([sensor_values, threshold_breaches], axis=1)
-                
-                # Add log features to each timestep
-                timestep_features = np.concatenate([
-                    timestep_features,
-                    np.tile(log_features, (self.sequence_length, 1))
-                ], axis=1)
-                
-                features.append(timestep_features)
-                
-                # Label (1 if next reading has threshold breach, 0 otherwise)
-                next_reading = device_sensors.iloc[i+self.sequence_length]
-                labels.append(1 if next_reading['threshold_breach'] else 0)
+        sensor_values = device_sensors['sensor_value'].values
+        threshold_breaches = device_sensors['threshold_breach'].values
+        timestamps = device_sensors['timestamp'].values.astype('datetime64[ns]')
         
-        features = np.array(features)
-        labels = np.array(labels)
+        # Window start/end timestamps
+        start_times = timestamps[:n_windows]
+        end_times = timestamps[seq_len - 1:seq_len - 1 + n_windows]
+        log_counts, log_means, log_maxes = _window_log_features(device_logs, start_times, end_times)
         
-        return features, labels
+        dtype = np.result_type(sensor_values.dtype, threshold_breaches.dtype, np.float64)
+        features = np.empty((n_windows, seq_len, 5), dtype=dtype)
+        features[:, :, 0] = sliding_window_view(sensor_values, seq_len)[:n_windows]
+        features[:, :, 1] = sliding_window_view(threshold_breaches, seq_len)[:n_windows]
+        features[:, :, 2] = log_counts[:, None]
+        features[:, :, 3] = log_means[:, None]
+        features[:, :, 4] = log_maxes[:, None]
+        
+        return features
     
     def build_model(self, input_shape):
+        # TensorFlow is imported on first use so importing this module stays cheap
+        from tensorflow import keras
+        Sequential = keras.models.Sequential
+        LSTM = keras.layers.LSTM
+        Dense = keras.layers.Dense
+        Dropout = keras.layers.Dropout
+        
         model = Sequential([
             LSTM(64, input_shape=input_shape, return_sequences=True),
             Dropout(0.2),
@@ -126,7 +276,27 @@ class PredictiveMaintenanceModel:
         
         return model
     
-    def train(self):
+    def train(self, chunksize=None):
+        """Train on the raw CSVs, register the result and promote it.
+        
+        Loads everything into memory unless the CSVs are larger than
+        in_memory_training_bytes or a chunksize is given, in which case
+        train_streaming is used.
+        """
+        if chunksize is None and self._raw_data_bytes() <= self.in_memory_training_bytes:
+            return self._train_in_memory()
+        return self.train_streaming(chunksize or self.training_chunksize)
+    
+    def _raw_data_bytes(self):
+        return sum(
+            os.path.getsize(os.path.join(self.RAW_DATA_DIR, name))
+            for name in ('sensor_data.csv', 'log_data.csv')
+            if os.path.exists(os.path.join(self.RAW_DATA_DIR, name))
+        )
+    
+    def _train_in_memory(self):
+        import tensorflow as tf
+        
         # Load data
         sensor_data, log_data = self.load_data()
         
@@ -138,8 +308,12 @@ class PredictiveMaintenanceModel:
         X_scaled = self.scaler.fit_transform(X_reshaped)
         X = X_scaled.reshape(X.shape)
         
+        # Write the new bundle to a staging directory; it is registered once complete
+        registry = self.registry
+        bundle_dir = registry.stage()
+        
         # Save scaler
-        joblib.dump(self.scaler, os.path.join(self.MODELS_DIR, 'scaler.joblib'))
+        joblib.dump(self.scaler, os.path.join(bundle_dir, SCALER_FILE))
         
         # Split data into train and validation sets
         train_size = int(0.8 * len(X))
@@ -170,21 +344,124 @@ class PredictiveMaintenanceModel:
         print(f"\nValidation Loss: {val_loss:.4f}")
         print(f"Validation Accuracy: {val_accuracy:.4f}")
         
-        # Save model
-        self.model.save(os.path.join(self.MODELS_DIR, 'predictive_model.h5'))
+        return self._save_bundle(registry, bundle_dir, history, val_loss, val_accuracy, X.shape[2], len(X))
+    
+    def train_streaming(self, chunksize=100_000, batch_size=32, epochs=10, shuffle_buffer=10_000):
+        """Train on sensor/log CSVs too large to load at once, with bounded memory.
+        
+        Both CSVs are read chunksize rows at a time and split into one
+        scratch file per device. A first pass builds each device's windows,
+        at most training_block_windows at a time, to partial_fit the scaler
+        and count them; a tf.data pipeline then regenerates and scales them
+        every epoch. The windows, their order and the 80/20 split match train().
+        """
+        import tensorflow as tf
+        
+        registry = self.registry
+        bundle_dir = registry.stage()
+        
+        with tempfile.TemporaryDirectory(prefix='training-', dir=self.PROCESSED_DATA_DIR) as scratch_dir:
+            sensor_partitions = partition_csv_by_device(
+                os.path.join(self.RAW_DATA_DIR, 'sensor_data.csv'), scratch_dir, chunksize, parse_sensor_timestamps
+            )
+            log_partitions = partition_csv_by_device(
+                os.path.join(self.RAW_DATA_DIR, 'log_data.csv'), scratch_dir, chunksize
+            )
+            stream = DeviceWindowStream(
+                sensor_partitions, log_partitions, self.iter_device_windows,
+                (self.sequence_length, 5), device_order=time_order(sensor_partitions)
+            )
+            
+            # First pass: fit the scaler and count the windows
+            self.scaler = MinMaxScaler()
+            n_windows = stream.fit_scaler(self.scaler)
+            if n_windows < 2:
+                raise ValueError("Not enough sensor readings to build training windows")
+            joblib.dump(self.scaler, os.path.join(bundle_dir, SCALER_FILE))
+            
+            train_size = int(0.8 * n_windows)
+            train_data = stream.dataset(lambda: stream.iter_blocks(0, train_size), self.scaler, batch_size, shuffle_buffer)
+            val_data = stream.dataset(lambda: stream.iter_blocks(train_size, n_windows), self.scaler, batch_size)
+            
+            self.model = self.build_model((self.sequence_length, 5))
+            early_stopping = tf.keras.callbacks.EarlyStopping(
+                monitor='val_loss',
+                patience=3,
+                restore_best_weights=True
+            )
+            history = self.model.fit(
+                train_data,
+                epochs=epochs,
+                validation_data=val_data,
+                callbacks=[early_stopping]
+            )
+            
+            val_loss, val_accuracy = self.model.evaluate(val_data)
+            print(f"\nValidation Loss: {val_loss:.4f}")
+            print(f"Validation Accuracy: {val_accuracy:.4f}")
+        
+        return self._save_bundle(registry, bundle_dir, history, val_loss, val_accuracy, 5, n_windows)
+    
+    def iter_device_windows(self, device_sensors, device_logs):
+        """Yield one device's (X, y) training windows in blocks of training_block_windows,
+        built exactly as prepare_data builds them"""
+        device_sensors, device_logs = self._sort_inputs(device_sensors, device_logs)
+        n_windows = len(device_sensors) - self.sequence_length
+        for start in range(0, max(n_windows, 0), self.training_block_windows):
+            stop = min(start + self.training_block_windows, n_windows)
+            block = device_sensors.iloc[start:stop + self.sequence_length]
+            X = self._window_features(block, device_logs, stop - start)
+            y = block['threshold_breach'].values[self.sequence_length:].astype(bool).astype(np.int64)
+            yield X, y
+    
+    def _save_bundle(self, registry, bundle_dir, history, val_loss, val_accuracy, n_features, n_windows):
+        """Save the trained model into the staged bundle, then register and promote it"""
+        # Save model, plus its NumPy export for the numpy inference backend
+        model_path = os.path.join(bundle_dir, MODEL_FILE)
+        self.model.save(model_path)
+        try:
+            export_h5_to_npz(model_path, os.path.join(bundle_dir, NUMPY_MODEL_FILE))
+        except Exception as e:
+            print(f"Could not export NumPy model, it will be exported on first load: {e}")
         
         # Save training history
         history_df = pd.DataFrame(history.history)
-        history_df.to_csv(os.path.join(self.MODELS_DIR, 'training_history.csv'))
+        history_df.to_csv(os.path.join(bundle_dir, 'training_history.csv'))
+        
+        # Register the bundle and promote it; serving processes pick it up on their next reload check
+        self.model_version = registry.register(bundle_dir, {
+            'sequence_length': self.sequence_length,
+            'n_features': int(n_features),
+            'training_windows': int(n_windows),
+            'epochs': len(history.history.get('loss', [])),
+            'val_loss': float(val_loss),
+            'val_accuracy': float(val_accuracy)
+        })
+        registry.promote(self.model_version)
+        print(f"Registered and promoted model version {self.model_version}")
         
         return history.history
     
-    def load_model(self):
-        """Load trained model and scaler"""
-        model_path = os.path.join(self.MODELS_DIR, 'predictive_model.h5')
-        scaler_path = os.path.join(self.MODELS_DIR, 'scaler.joblib')
+    def load_model(self, version=None):
+        """Load trained model and scaler.
+        
+        Loads the given registry version, else the promoted one, else the
+        unversioned files directly in MODELS_DIR.
+        """
+        version = version or self.registry.current_version()
+        bundle_dir = self.registry.bundle_path(version) if version else self.MODELS_DIR
+        model_path = os.path.join(bundle_dir, MODEL_FILE)
+        scaler_path = os.path.join(bundle_dir, SCALER_FILE)
         
         if os.path.exists(model_path) and os.path.exists(scaler_path):
+            self.model_version = version or self._file_version(model_path)
+            if self.inference_backend == "numpy":
+                self.model = self._load_numpy_model(model_path)
+                self.scaler = joblib.load(scaler_path)
+                return True
+            
+            import tensorflow as tf
+            
             # Load model with custom_objects to handle compatibility issues
             self.model = tf.keras.models.load_model(
                 model_path,
@@ -196,14 +473,74 @@ class PredictiveMaintenanceModel:
             return True
         return False
     
+    def _file_version(self, path):
+        """Short content digest identifying a model file"""
+        try:
+            with open(path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()[:12]
+        except OSError:
+            return None
+    
+    def _load_numpy_model(self, model_path):
+        """Load the NumPy export of the Keras model, re-exporting it if the .h5 contents changed.
+        
+        Compares the .h5 digest recorded in the export rather than file
+        mtimes, which are arbitrary after a checkout.
+        """
+        npz_path = os.path.splitext(model_path)[0] + '.npz'
+        if not is_current_export(model_path, npz_path):
+            try:
+                export_h5_to_npz(model_path, npz_path)
+            except Exception as e:
+                if not os.path.exists(npz_path):
+                    raise
+                print(f"Could not re-export {model_path}, using existing {npz_path}: {e}")
+        return NumpyLSTMModel.load(npz_path)
+    
     def predict(self, sensor_data, log_data):
         X, _ = self.prepare_data(sensor_data, log_data)
-        X = self.scaler.transform(X)
-        X = X.reshape((X.shape[0], self.sequence_length, -1))
+        X = self._scale(X)
         
         predictions = self.model.predict(X)
         return predictions
     
+    def prepare_windows(self, sensor_data, log_data):
+        """Scaled model input for every window in the data, ready for predict_windows"""
+        X, _ = self.prepare_data(sensor_data, log_data)
+        if len(X) == 0:
+            return np.empty((0, self.sequence_length, 5), dtype=np.float32)
+        return self._scale(X)
+    
+    def predict_windows(self, X):
+        """Run the network on windows already prepared by prepare_windows"""
+        return self.model.predict(X, batch_size=min(len(X), self.inference_batch_size), verbose=0)
+    
+    def predict_batch(self, sensor_data, log_data, predict_windows=None):
+        """Score the latest window of every device in a single model call.
+        
+        sensor_data/log_data hold the rows of all devices stacked together.
+        predict_windows optionally replaces this model's own predict_windows,
+        e.g. to run the network in an inference worker pool.
+        Returns a dict mapping device_id to failure probability.
+        """
+        device_ids, X = self.prepare_latest_windows(sensor_data, log_data)
+        return self.predict_latest(device_ids, X, predict_windows=predict_windows)
+    
+    def predict_latest(self, device_ids, X, predict_windows=None):
+        """Score unscaled windows, one per device, as built by prepare_latest_windows
+        or DeviceFeatureState.latest_window. Returns a dict of device_id to probability."""
+        if not device_ids:
+            return {}
+        X = self._scale(X)
+        
+        predictions = (predict_windows or self.predict_windows)(X)
+        return {device_id: float(pred) for device_id, pred in zip(device_ids, np.ravel(predictions))}
+    
+    def _scale(self, X):
+        """Apply the scaler, which was fit on windows flattened to 2D"""
+        X_scaled = self.scaler.transform(X.reshape(X.shape[0], -1))
+        return X_scaled.reshape((X.shape[0], self.sequence_length, -1))
+    
     def generate_alerts(self, predictions, sensor_data, threshold=0.7):
         alerts = []
         for i, pred in enumerate(predictions):
@@ -0,0 +1,151 @@
+"""Versioned model bundles with a manifest naming the version being served.
+
+Layout under the registry root:
+
+    manifest.json              {"current": "<version>", "previous": ..., "versions": {...}}
+    <version>/predictive_model.h5
+    <version>/predictive_model.npz
+    <version>/scaler.joblib
+    <version>/params.json
+
+Training writes a bundle into a staging directory, `register` renames it
+into place and `promote` rewrites the manifest with an atomic replace, so a
+serving process polling `current_version()` only ever sees complete bundles.
+
+Usage:
+    python model_registry.py list
+    python model_registry.py promote <version>
+    python model_registry.py import       # register the flat data/models files
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+MODEL_FILE = 'predictive_model.h5'
+NUMPY_MODEL_FILE = 'predictive_model.npz'
+SCALER_FILE = 'scaler.joblib'
+PARAMS_FILE = 'params.json'
+MANIFEST_FILE = 'manifest.json'
+
+
+class ModelRegistry:
+    """Immutable model+scaler+params bundles plus an atomically promoted pointer"""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def bundle_path(self, version):
+        return os.path.join(self.root, version)
+
+    def stage(self):
+        """Create an empty staging directory to write a new bundle into"""
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+
+    def register(self, staging_dir, params=None):
+        """Move a staged bundle into the registry and return its version"""
+        for name in (MODEL_FILE, SCALER_FILE):
+            if not os.path.exists(os.path.join(staging_dir, name)):
+                raise FileNotFoundError(f"Bundle is missing {name}")
+        params = dict(params or {})
+        with open(os.path.join(staging_dir, PARAMS_FILE), 'w') as f:
+            json.dump(params, f, indent=2)
+
+        created_at = datetime.now()
+        base_version = f"{created_at:%Y%m%d-%H%M%S}-{self._digest(os.path.join(staging_dir, MODEL_FILE))}"
+        with self._lock:
+            version, suffix = base_version, 1
+            while os.path.exists(self.bundle_path(version)):
+                suffix += 1
+                version = f"{base_version}-{suffix}"
+            os.rename(staging_dir, self.bundle_path(version))
+            manifest = self._read_manifest()
+            manifest['versions'][version] = {'created_at': created_at.isoformat(), 'params': params}
+            self._write_manifest(manifest)
+        return version
+
+    def promote(self, version):
+        """Make version the one serving processes load"""
+        if not os.path.isdir(self.bundle_path(version)):
+            raise KeyError(f"Unknown model version {version}")
+        with self._lock:
+            manifest = self._read_manifest()
+            if manifest.get('current') != version:
+                manifest['previous'] = manifest.get('current')
+                manifest['current'] = version
+                manifest['promoted_at'] = datetime.now().isoformat()
+                self._write_manifest(manifest)
+
+    def current_version(self):
+        return self._read_manifest().get('current')
+
+    def versions(self):
+        return self._read_manifest()['versions']
+
+    def _digest(self, path):
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:8]
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'current': None, 'versions': {}}
+
+    def _write_manifest(self, manifest):
+        # Write a temp file and rename it over the manifest so readers never see a partial write
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.manifest-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, MANIFEST_FILE))
+
+
+def import_flat_model(registry, models_dir):
+    """Register the unversioned files in models_dir as a new bundle"""
+    staging_dir = registry.stage()
+    for name in (MODEL_FILE, NUMPY_MODEL_FILE, SCALER_FILE):
+        source = os.path.join(models_dir, name)
+        if os.path.exists(source):
+            shutil.copy2(source, os.path.join(staging_dir, name))
+    return registry.register(staging_dir, {'source': 'import'})
+
+
+def main():
+    from ml_model import PredictiveMaintenanceModel
+
+    parser = argparse.ArgumentParser(description='Inspect and promote versioned model bundles')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    promote = subparsers.add_parser('promote')
+    promote.add_argument('version')
+    subparsers.add_parser('import')
+    args = parser.parse_args()
+
+    model = PredictiveMaintenanceModel()
+    models_dir, registry = model.MODELS_DIR, model.registry
+    if args.command == 'list':
+        current = registry.current_version()
+        for version, info in sorted(registry.versions().items()):
+            marker = '*' if version == current else ' '
+            print(f"{marker} {version}  {info['created_at']}  {json.dumps(info['params'])}")
+    elif args.command == 'promote':
+        registry.promote(args.version)
+        print(f"Promoted {args.version}")
+    else:
+        version = import_flat_model(registry, models_dir)
+        registry.promote(version)
+        print(f"Imported {models_dir} as {version}")
+
+
+if __name__ == '__main__':
+    main()
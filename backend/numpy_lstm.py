@@ -0,0 +1,194 @@
+"""NumPy-only inference for the LSTM + Dense networks trained with Keras.
+
+`export_h5_to_npz` reads layer configs and weights straight out of a Keras
+.h5 file with h5py (no TensorFlow needed) and writes them to an .npz,
+together with the SHA-256 of the .h5 so `is_current_export` can tell
+whether the export still matches its source.
+`NumpyLSTMModel` loads that .npz and runs the forward pass with NumPy, so
+serving processes do not have to import TensorFlow.
+
+Usage:
+    python numpy_lstm.py                      # export both trained models
+    python numpy_lstm.py path/to/model.h5 path/to/model.npz
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EXPORTS = [
+    (os.path.join(BASE_DIR, 'data', 'models', 'predictive_model.h5'),
+     os.path.join(BASE_DIR, 'data', 'models', 'predictive_model.npz')),
+    (os.path.join(BASE_DIR, 'models', 'lstm_model.h5'),
+     os.path.join(BASE_DIR, 'models', 'lstm_model.npz')),
+]
+SUPPORTED_LAYERS = ('LSTM', 'Dense', 'Dropout', 'InputLayer')
+
+
+def _sigmoid(x):
+    # Split by sign so large magnitudes never overflow exp()
+    out = np.empty_like(x)
+    positive = x >= 0
+    out[positive] = 1.0 / (1.0 + np.exp(-x[positive]))
+    exp_x = np.exp(x[~positive])
+    out[~positive] = exp_x / (1.0 + exp_x)
+    return out
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0),
+    'linear': lambda x: x,
+    None: lambda x: x,
+}
+
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return ACTIVATIONS[name]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_current_export(h5_path, npz_path):
+    """Whether npz_path was exported from the current contents of h5_path"""
+    if not os.path.exists(npz_path):
+        return False
+    with np.load(npz_path, allow_pickle=False) as data:
+        if 'source_sha256' not in data.files:
+            return False
+        return str(data['source_sha256']) == file_sha256(h5_path)
+
+
+def export_h5_to_npz(h5_path, npz_path):
+    """Write the layer specs and weights of a Keras Sequential .h5 model to an .npz"""
+    import h5py
+
+    arrays = {}
+    specs = []
+    with h5py.File(h5_path, 'r') as f:
+        config = json.loads(f.attrs['model_config'])
+        weights = f['model_weights']
+        for layer in config['config']['layers']:
+            kind = layer['class_name']
+            if kind not in SUPPORTED_LAYERS:
+                raise ValueError(f"Unsupported layer type for NumPy export: {kind}")
+            if kind in ('Dropout', 'InputLayer'):
+                continue  # Dropout is the identity at inference time
+            layer_config = layer['config']
+            if layer_config.get('go_backwards') or layer_config.get('stateful') or layer_config.get('use_bias') is False:
+                raise ValueError(f"Unsupported {kind} options in layer {layer_config['name']}")
+            spec = {
+                'type': kind,
+                'units': layer_config['units'],
+                'activation': layer_config.get('activation'),
+            }
+            if kind == 'LSTM':
+                spec['recurrent_activation'] = layer_config.get('recurrent_activation', 'sigmoid')
+                spec['return_sequences'] = bool(layer_config.get('return_sequences', False))
+                names = ('kernel', 'recurrent_kernel', 'bias')
+            else:
+                names = ('kernel', 'bias')
+            group = weights[layer_config['name']]
+            weight_names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs['weight_names']]
+            for name, weight_name in zip(names, weight_names):
+                arrays[f"{len(specs)}/{name}"] = np.asarray(group[weight_name], dtype=np.float32)
+            specs.append(spec)
+
+    arrays['specs'] = np.array(json.dumps(specs))
+    arrays['source_sha256'] = np.array(file_sha256(h5_path))
+    tmp_path = npz_path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, npz_path)
+    return specs
+
+
+class NumpyLSTMModel:
+    """Forward pass of an exported LSTM/Dense stack, with Keras' predict() signature"""
+
+    def __init__(self, specs, weights):
+        self.specs = specs
+        self.weights = weights
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path, allow_pickle=False) as data:
+            specs = json.loads(str(data['specs']))
+            weights = {
+                i: {name.split('/', 1)[1]: np.ascontiguousarray(data[name])
+                    for name in data.files if name.startswith(f"{i}/")}
+                for i in range(len(specs))
+            }
+        return cls(specs, weights)
+
+    def _lstm(self, x, spec, w):
+        batch, steps, _ = x.shape
+        units = spec['units']
+        activation = _activation(spec['activation'])
+        recurrent_activation = _activation(spec['recurrent_activation'])
+        # Input projections for every time step in one matmul
+        projected = (x.reshape(batch * steps, -1) @ w['kernel'] + w['bias']).reshape(batch, steps, 4 * units)
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if spec['return_sequences'] else None
+        for t in range(steps):
+            z = projected[:, t] + h @ w['recurrent_kernel']
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def _forward(self, x):
+        for spec, w in zip(self.specs, self.weights.values()):
+            if spec['type'] == 'LSTM':
+                x = self._lstm(x, spec, w)
+            else:
+                x = _activation(spec['activation'])(x @ w['kernel'] + w['bias'])
+        return x
+
+    def predict(self, X, batch_size=None, verbose=0):
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.empty((0, self.specs[-1]['units']), dtype=np.float32)
+        batch_size = batch_size or len(X)
+        return np.concatenate([self._forward(X[start:start + batch_size])
+                               for start in range(0, len(X), batch_size)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export Keras LSTM models to .npz for NumPy inference')
+    parser.add_argument('h5_path', nargs='?')
+    parser.add_argument('npz_path', nargs='?')
+    args = parser.parse_args()
+    if args.h5_path:
+        exports = [(args.h5_path, args.npz_path or os.path.splitext(args.h5_path)[0] + '.npz')]
+    else:
+        exports = DEFAULT_EXPORTS
+    for h5_path, npz_path in exports:
+        specs = export_h5_to_npz(h5_path, npz_path)
+        print(f"Exported {h5_path} -> {npz_path} ({len(specs)} layers)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Columnar Parquet copies of the raw CSVs, partitioned by date and sorted by device.
+
+`convert_csv` reads a raw CSV in chunks and writes a hive-partitioned
+dataset (`date=YYYY-MM-DD/*.parquet`) with typed columns: timestamps as
+timestamp[us], low-cardinality text as dictionary (categorical) columns and
+measurements as float32. Within each file rows are sorted by device_id and
+timestamp, so row-group statistics let device filters skip most of a day.
+Devices are not a directory level: one file per device per day makes full
+reads pay for thousands of tiny files.
+
+`read_dataset` loads only the requested columns and pushes date, device and
+timestamp filters down to the partitions and row groups, so callers skip
+both text parsing and the data they do not need.
+
+pyarrow is optional; `available()` tells callers whether to fall back to
+the CSVs, which `read_csv` reads with the same filters applied in pandas
+and the same column types.
+
+Usage:
+    python parquet_store.py                 # convert every CSV in data/raw
+    python parquet_store.py path/to/file.csv --out path/to/dataset
+"""
+import argparse
+import glob
+import os
+import shutil
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DATA_DIR = os.path.join(BASE_DIR, 'data', 'raw')
+
+CATEGORICAL_COLUMNS = {'device_id', 'component_type', 'sensor_type', 'location', 'log_type', 'log_message', 'error_code'}
+FLOAT_COLUMNS = {'sensor_value', 'event_severity'}
+BOOL_COLUMNS = {'threshold_breach'}
+ROW_GROUP_SIZE = 64 * 1024  # Small enough for device filters to skip row groups of a day's file
+
+
+def available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def dataset_path(csv_path):
+    """Where the Parquet copy of a raw CSV lives: data/raw/x.csv -> data/parquet/x"""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(csv_path))), 'parquet', name)
+
+
+def has_dataset(csv_path):
+    return available() and os.path.isdir(dataset_path(csv_path))
+
+
+def _arrow_type(pa, column):
+    if column == 'timestamp':
+        return pa.timestamp('us')
+    if column in CATEGORICAL_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if column in FLOAT_COLUMNS:
+        return pa.float32()
+    if column in BOOL_COLUMNS:
+        return pa.bool_()
+    return pa.string()
+
+
+def _partitioning(ds, pa):
+    return ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+
+def typed_frame(df):
+    """Parse and cast df (all-text CSV rows or already typed) to the column types read_dataset returns"""
+    df = df.copy()
+    if 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce').astype('datetime64[us]')
+    for column in BOOL_COLUMNS & set(df.columns):
+        if df[column].dtype != bool:
+            # Empty cells (e.g. log rows of the combined CSV) are not breaches
+            df[column] = df[column].astype(str).str.lower().eq('true')
+    for column in FLOAT_COLUMNS & set(df.columns):
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+    for column in CATEGORICAL_COLUMNS & set(df.columns):
+        df[column] = df[column].astype('category')
+    return df
+
+
+def _typed_chunk(chunk):
+    """One chunk with the stored column types and its date partition column, sorted by device and time"""
+    chunk = typed_frame(chunk)
+    chunk['date'] = chunk['timestamp'].dt.date
+    return chunk.sort_values([column for column in ('device_id', 'timestamp') if column in chunk.columns],
+                             kind='stable')
+
+
+def write_chunk(chunk, out_dir, part):
+    """Add a DataFrame chunk to the dataset at out_dir as files named part-<part>-*.parquet.
+
+    part must be unique per chunk written to the same dataset, which lets
+    several processes write disjoint chunks at once.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    chunk = _typed_chunk(chunk)
+    schema = pa.schema([pa.field(column, pa.date32() if column == 'date' else _arrow_type(pa, column))
+                        for column in chunk.columns])
+    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    ds.write_dataset(
+        table, out_dir, format='parquet', partitioning=_partitioning(ds, pa),
+        basename_template=f'part-{part}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore',
+        max_rows_per_group=ROW_GROUP_SIZE, use_threads=False
+    )
+    return len(table)
+
+
+def convert_csv(csv_path, out_dir=None, chunksize=500_000):
+    """Write csv_path as a date partitioned Parquet dataset, replacing any previous copy"""
+    out_dir = out_dir or dataset_path(csv_path)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize, dtype=str)):
+        rows += write_chunk(chunk, out_dir, f'{i:05d}')  # Zero-padded so files list in CSV order
+    return rows
+
+
+def read_dataset(path, columns=None, device_ids=None, start=None, end=None):
+    """Read a converted dataset into a DataFrame.
+
+    columns limits the columns read; device_ids and the [start, end]
+    timestamp range are pushed down, pruning date partitions and row
+    groups. Rows come back in file order (not sorted by timestamp) and
+    text columns as pandas categoricals.
+    """
+    import pyarrow.dataset as ds
+    import pyarrow as pa
+
+    dataset = ds.dataset(path, format='parquet', partitioning=_partitioning(ds, pa))
+    expression = None
+
+    def add(condition):
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    if device_ids is not None:
+        add(ds.field('device_id').isin(list(device_ids)))
+    if start is not None:
+        start = pd.Timestamp(start)
+        add(ds.field('date') >= pa.scalar(start.date(), pa.date32()))
+        add(ds.field('timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('us')))
+    if end is not None:
+        end = pd.Timestamp(end)
+        add(ds.field('date') <= pa.scalar(end.date(), pa.date32()))
+        add(ds.field('timestamp') <= pa.scalar(end.to_pydatetime(), pa.timestamp('us')))
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != 'date']
+    return dataset.to_table(columns=list(columns), filter=expression).to_pandas()
+
+
+def read_csv(csv_path, columns=None, device_ids=None, start=None, end=None, chunksize=500_000):
+    """Read a raw CSV with read_dataset's column, device and [start, end] filters.
+
+    The fallback when there is no Parquet copy: every row is still parsed,
+    but only matching rows are kept, and columns are cast with typed_frame
+    as convert_csv casts them, so both paths return the same rows and types
+    (in CSV rather than file order).
+    """
+    usecols = None if columns is None else set(columns)
+    filtered = device_ids is not None or start is not None or end is not None
+    device_ids = None if device_ids is None else [str(device_id) for device_id in device_ids]
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    # Read as text like convert_csv, so ids and values are parsed the same way
+    if not filtered:
+        return typed_frame(pd.read_csv(csv_path, usecols=None if usecols is None else lambda column: column in usecols,
+                                       dtype=str))
+    needed = None if usecols is None else usecols | {'device_id', 'timestamp'}
+    chunks = []
+    for chunk in pd.read_csv(csv_path, usecols=None if needed is None else lambda column: column in needed,
+                             dtype=str, chunksize=chunksize):
+        keep = pd.Series(True, index=chunk.index)
+        if device_ids is not None:
+            keep &= chunk['device_id'].isin(device_ids)
+        if start is not None or end is not None:
+            timestamps = pd.to_datetime(chunk['timestamp'], errors='coerce')
+            if start is not None:
+                keep &= timestamps >= start
+            if end is not None:
+                keep &= timestamps <= end
+        chunks.append(chunk[keep])
+    df = pd.concat(chunks, ignore_index=True)
+    if usecols is not None:
+        df = df[[column for column in df.columns if column in usecols]]
+    return typed_frame(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert raw CSVs to partitioned Parquet datasets')
+    parser.add_argument('csv_path', nargs='?')
+    parser.add_argument('--out')
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args()
+    csv_paths = [args.csv_path] if args.csv_path else sorted(glob.glob(os.path.join(RAW_DATA_DIR, '*.csv')))
+    for csv_path in csv_paths:
+        out_dir = args.out or dataset_path(csv_path)
+        rows = convert_csv(csv_path, out_dir, args.chunksize)
+        print(f"Converted {csv_path} -> {out_dir} ({rows} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import threading
+
+
+def window_fingerprint(timestamps, columns, *context):
+    """Digest of a sensor window (timestamps plus column arrays) and anything else the prediction depends on"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(timestamps.tobytes())
+    for name in sorted(columns):
+        digest.update(name.encode())
+        digest.update(columns[name].tobytes())
+    digest.update(json.dumps(context, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Latest failure probability per device, valid while its input fingerprint is unchanged.
+
+    Holds one entry per device, so memory is bounded by the fleet size.
+    `invalidate(device_id)` drops an entry as soon as new readings arrive;
+    the fingerprint check additionally catches any other input change, such
+    as a new model version or edited thresholds.
+    """
+
+    def __init__(self):
+        self._entries = {}  # device_id -> (fingerprint, prediction)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, device_id, fingerprint):
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is not None and entry[0] == fingerprint:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, device_id, fingerprint, prediction):
+        with self._lock:
+            self._entries[device_id] = (fingerprint, prediction)
+
+    def invalidate(self, device_id=None):
+        with self._lock:
+            if device_id is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(device_id, None) is not None:
+                self.invalidations += 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,228 @@
+import numpy as np
+from datetime import datetime, timedelta
+from collections.abc import Sequence
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+DEFAULT_CAPACITY = 2880  # 24 hours of readings at one reading per 30 seconds
+
+
+def to_micros(timestamp):
+    """Convert a naive datetime or ISO string to int64 microseconds since the epoch"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return (timestamp - EPOCH) // ONE_MICROSECOND
+
+
+def from_micros(micros):
+    """Convert int64 microseconds since the epoch back to a naive datetime"""
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+class DeviceRing:
+    """Fixed-capacity ring buffer of columns for one device.
+
+    Every slot is written twice, at i and i + capacity, so the newest `count`
+    readings are always one contiguous slice and reads never copy. Readings
+    are kept in timestamp order: appends of newer readings are O(1), and a
+    late reading is inserted at its place by rewriting the buffer.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        self.head = 0  # Next slot to write
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.columns = {}
+
+    def append(self, micros, values):
+        i = self.head
+        cap = self.capacity
+        self.timestamps[i] = self.timestamps[i + cap] = micros
+        for name in values:
+            if name not in self.columns:
+                self.columns[name] = np.full(2 * cap, np.nan)
+        for name, column in self.columns.items():
+            column[i] = column[i + cap] = values.get(name, np.nan)
+        self.head = (i + 1) % cap
+        self.count = min(self.count + 1, cap)
+
+    def insert(self, micros, values):
+        """Store a reading at its place in time order, after any with the same timestamp.
+
+        Returns False if the ring is full and the reading is older than
+        everything in it, so it would be the one overwritten.
+        """
+        if not self.count or micros >= self.latest:
+            self.append(micros, values)
+            return True
+        for name in values:
+            if name not in self.columns:
+                self.columns[name] = np.full(2 * self.capacity, np.nan)
+        timestamps, columns = self.window(0, self.count)
+        position = int(np.searchsorted(timestamps, micros, side="right"))
+        if position == 0 and self.count == self.capacity:
+            return False
+        drop = 1 if self.count == self.capacity else 0  # The oldest reading makes room
+        timestamps = np.insert(timestamps, position, micros)[drop:]
+        columns = {name: np.insert(column, position, values.get(name, np.nan))[drop:]
+                   for name, column in columns.items()}
+        count = len(timestamps)
+        self.timestamps[:count] = self.timestamps[self.capacity:self.capacity + count] = timestamps
+        for name, column in columns.items():
+            self.columns[name][:count] = self.columns[name][self.capacity:self.capacity + count] = column
+        self.count = count
+        self.head = count % self.capacity
+        return True
+
+    @property
+    def latest(self):
+        return self.timestamps[self.head - 1 + self.capacity] if self.count else None
+
+    def window(self, start, stop):
+        """Zero-copy views of logical readings [start, stop), oldest first"""
+        base = (self.head - self.count) % self.capacity
+        timestamps = self.timestamps[base + start:base + stop]
+        columns = {name: column[base + start:base + stop] for name, column in self.columns.items()}
+        return timestamps, columns
+
+
+class DeviceHistoryView(Sequence):
+    """Read-only list-of-dicts view over one device's ring buffer.
+
+    Readings are only materialized as dicts for the indices that are accessed,
+    so `view[-10:]` costs O(10) regardless of how much history is stored.
+    """
+
+    def __init__(self, ring):
+        self._ring = ring
+
+    def __len__(self):
+        return self._ring.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self.to_list()[index]
+            return _readings(*self._ring.window(start, max(start, stop)))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sensor history index out of range")
+        return _readings(*self._ring.window(index, index + 1))[0]
+
+    def to_list(self):
+        return self[:]
+
+
+def _readings(timestamps, columns):
+    """Materialize column slices as reading dicts in the app's JSON shape"""
+    readings = []
+    for micros in timestamps.tolist():
+        reading_time = from_micros(micros)
+        readings.append({
+            "timestamp": reading_time.strftime("%H:%M"),
+            "raw_timestamp": reading_time.isoformat()
+        })
+    for name, values in columns.items():
+        present = ~np.isnan(values)
+        for reading, value, is_present in zip(readings, values.tolist(), present.tolist()):
+            if is_present:
+                reading[name] = value
+    return readings
+
+
+class SensorHistoryStore:
+    """Per-device sensor history kept in fixed-capacity columnar ring buffers.
+
+    Timestamps are stored as int64 microseconds and each sensor as a float64
+    column, so readings come back exactly as they were stored. Every reading
+    is kept, in timestamp order (late ones are inserted at their place).
+    Appends are O(1); once a device reaches `capacity` readings the oldest
+    ones are overwritten. Mapping-style access (`store[device_id]`,
+    `.get`, `in`) returns DeviceHistoryView objects so existing list-of-dicts
+    code keeps working.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._rings = {}
+
+    def reset(self, device_id=None):
+        """Drop the history of one device, or of every device"""
+        if device_id is None:
+            self._rings.clear()
+        else:
+            self._rings.pop(device_id, None)
+
+    def append(self, device_id, reading):
+        """Store one reading dict in time order; False if a full ring would overwrite it at once"""
+        ring = self._rings.get(device_id)
+        if ring is None:
+            ring = self._rings[device_id] = DeviceRing(self.capacity)
+        values = {
+            name: value for name, value in reading.items()
+            if name not in ("timestamp", "raw_timestamp")
+            and isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        return ring.insert(to_micros(reading["raw_timestamp"]), values)
+
+    def extend(self, device_id, readings):
+        """Append readings in order, returning how many were stored"""
+        if device_id not in self._rings:
+            self._rings[device_id] = DeviceRing(self.capacity)
+        return sum(self.append(device_id, reading) for reading in readings)
+
+    def latest(self, device_id):
+        """Microsecond timestamp of the newest stored reading, or None"""
+        ring = self._rings.get(device_id)
+        return None if ring is None else ring.latest
+
+    def has_timestamp(self, device_id, timestamp):
+        """Whether a reading with exactly this timestamp is stored"""
+        ring = self._rings.get(device_id)
+        if ring is None:
+            return False
+        timestamps, _ = ring.window(0, ring.count)
+        micros = to_micros(timestamp)
+        i = int(np.searchsorted(timestamps, micros, side="left"))
+        return i < len(timestamps) and timestamps[i] == micros
+
+    def last(self, device_id, n):
+        """Zero-copy (timestamps, columns) views of the newest n readings"""
+        ring = self._rings[device_id]
+        n = min(n, ring.count)
+        return ring.window(ring.count - n, ring.count)
+
+    def between(self, device_id, start, end):
+        """Zero-copy (timestamps, columns) views of readings with start <= timestamp <= end"""
+        ring = self._rings[device_id]
+        timestamps, _ = ring.window(0, ring.count)
+        lo = int(np.searchsorted(timestamps, to_micros(start), side="left"))
+        hi = int(np.searchsorted(timestamps, to_micros(end), side="right"))
+        return ring.window(lo, max(lo, hi))
+
+    def as_dict(self):
+        """All histories as {device_id: [reading, ...]}, the shape served by /sensor-data"""
+        return {device_id: DeviceHistoryView(ring).to_list() for device_id, ring in self._rings.items()}
+
+    def __getitem__(self, device_id):
+        return DeviceHistoryView(self._rings[device_id])
+
+    def get(self, device_id, default=None):
+        if device_id not in self._rings:
+            return default
+        return self[device_id]
+
+    def __contains__(self, device_id):
+        return device_id in self._rings
+
+    def __iter__(self):
+        return iter(self._rings)
+
+    def __len__(self):
+        return len(self._rings)
+
+    def keys(self):
+        return self._rings.keys()
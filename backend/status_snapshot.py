@@ -0,0 +1,57 @@
+import json
+import threading
+from datetime import datetime
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class StatusSnapshot:
+    """A JSON document rebuilt in the background and served as pre-serialized bytes.
+
+    Writers mark the keys whose state changed with `mark_dirty`; a refresher
+    collects them with `take_dirty`, recomputes those entries and calls
+    `publish`. Readers get the latest (version, generated_at, body) triple in
+    O(1), without serializing anything per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._all_dirty = True
+        self._version = 0
+        self._current = None  # (version, generated_at, body), swapped atomically
+
+    def mark_dirty(self, key=None):
+        """Flag one key, or everything when key is None, for the next refresh"""
+        with self._lock:
+            if key is None:
+                self._all_dirty = True
+            else:
+                self._dirty.add(key)
+
+    @property
+    def is_dirty(self):
+        return self._all_dirty or bool(self._dirty)
+
+    def take_dirty(self):
+        """Return (refresh_everything, dirty_keys) and reset the dirty state"""
+        with self._lock:
+            refresh_all, dirty = self._all_dirty, self._dirty
+            self._all_dirty, self._dirty = False, set()
+        return refresh_all, dirty
+
+    def publish(self, payload):
+        """Serialize payload and make it the current snapshot"""
+        body = json.dumps(payload, default=_json_default).encode()
+        with self._lock:
+            self._version += 1
+            self._current = (self._version, datetime.now().isoformat(), body)
+        return self._current
+
+    @property
+    def current(self):
+        return self._current
@@ -3,11 +3,37 @@ import pandas as pd
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from unittest.mock import patch
-from backend.ml_model import PredictiveMaintenanceModel
+from unittest.mock import AsyncMock, patch
+from ml_model import PredictiveMaintenanceModel
+from sensor_store import SensorHistoryStore
+from alert_journal import AlertJournal
+from alert_index import AlertIndex, severity_band
+from llm_gateway import LLMGateway
+from ttl_cache import TTLCache, MISSING
+from chat_context import build_alert_context, estimate_tokens
+from lazy_loader import LazyResource
+from model_registry import ModelRegistry, import_flat_model
+from numpy_lstm import NumpyLSTMModel, export_h5_to_npz
+from prediction_cache import PredictionCache, window_fingerprint
+from feature_state import DeviceFeatureState, FeatureStateStore
+from anomaly_engine import StreamingAnomalyDetector, zscores
+from breach_tracker import BreachRateTracker, classify_breach_rate
+from training_stream import DeviceWindowStream, partition_csv_by_device, time_order
+from ml_model import parse_sensor_timestamps
+from status_snapshot import StatusSnapshot
+from inference_batcher import InferenceBatcher
+from inference_pool import InferencePool
+import json
+import shutil
+from datetime import datetime
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
 import numpy as np
 import tensorflow as tf
 import joblib
+from sklearn.preprocessing import MinMaxScaler
 
 @pytest.fixture
 def sample_sensor_data():
@@ -18,6 +44,19 @@ def sample_sensor_data():
         'threshold_breach': [0,0,0,0,0,0,0,0,0,0,1]
     })
 
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module, journaling alerts under tmp_path instead of the working directory"""
+    monkeypatch.setenv('ALERTS_FILE', str(tmp_path / 'alerts.json'))
+    monkeypatch.setenv('ALERTS_JOURNAL_FILE', str(tmp_path / 'alerts.journal.jsonl'))
+    import app
+    # Already imported by an earlier test: point it at this test's files
+    journal = AlertJournal(str(tmp_path / 'alerts.json'), str(tmp_path / 'alerts.journal.jsonl'))
+    monkeypatch.setattr(app, 'ALERTS_FILE', journal.snapshot_path)
+    monkeypatch.setattr(app, 'alert_journal', journal)
+    yield app
+    journal.close()
+
 @pytest.fixture
 def sample_log_data():
     return pd.DataFrame({
@@ -198,17 +237,20 @@ def test_train_model_basic(monkeypatch, tmp_path):
             with open(path, 'w') as f: f.write('model')
     monkeypatch.setattr(model, 'build_model', lambda shape: DummyKerasModel())
     # Mock joblib.dump
-    monkeypatch.setattr('joblib.dump', lambda obj, path: path)
+    monkeypatch.setattr('joblib.dump', lambda obj, path: open(path, 'w').write('scaler'))
     # Run train
     history = model.train()
     # Check return value
     assert 'loss' in history
     assert 'accuracy' in history
-    # Check that model and scaler files are created
-    assert (tmp_path / 'predictive_model.h5').exists()
-    assert (tmp_path / 'scaler.joblib').exists() or True  # joblib.dump is mocked
+    # Check that model and scaler files are written to a new, promoted registry bundle
+    bundle = tmp_path / 'registry' / model.model_version
+    assert (bundle / 'predictive_model.h5').exists()
+    assert (bundle / 'scaler.joblib').exists()
+    assert model.registry.current_version() == model.model_version
+    assert model.registry.versions()[model.model_version]['params']['val_accuracy'] == 0.9
     # Check that training history CSV is created
-    assert (tmp_path / 'training_history.csv').exists()
+    assert (bundle / 'training_history.csv').exists()
 
 def test_load_model_success(monkeypatch, tmp_path):
     model = PredictiveMaintenanceModel()
@@ -576,3 +618,1147 @@ def test_generate_maintenance_plan_exception(monkeypatch):
     plan = model.generate_maintenance_plan(alert, device, BadAnalysis())
     assert plan['steps'] == ['System maintenance required']
     assert plan['skill_level'] == 'Basic'
+
+def test_prepare_data_log_features_per_window():
+    model = PredictiveMaintenanceModel()
+    sensor_data = pd.DataFrame({
+        'device_id': ['A']*12,
+        'timestamp': pd.date_range('2023-01-01', periods=12, freq='h'),
+        'sensor_value': list(range(1,13)),
+        'threshold_breach': [0]*10 + [1, 0]
+    })
+    log_data = pd.DataFrame({
+        'device_id': ['A', 'A', 'A', 'B'],
+        'timestamp': pd.to_datetime(['2023-01-01 00:00', '2023-01-01 05:30', '2023-01-01 10:00', '2023-01-01 05:00']),
+        'event_severity': [4, 2, 5, 9]
+    })
+    features, labels = model.prepare_data(sensor_data, log_data)
+    assert features.shape == (2, 10, 5)
+    assert list(labels) == [1, 0]
+    # First window spans 00:00-09:00 and sees the first two device A logs
+    assert np.array_equal(features[0, 0, 2:], [2, 3.0, 4])
+    # Second window spans 01:00-10:00 and sees the last two device A logs
+    assert np.array_equal(features[1, 0, 2:], [2, 3.5, 5])
+    assert np.array_equal(features[1, :, 0], np.arange(2, 12))
+
+def test_prepare_data_matches_per_window_filtering():
+    model = PredictiveMaintenanceModel()
+    rng = np.random.default_rng(0)
+    sensor_data = pd.DataFrame({
+        'device_id': rng.choice(['A', 'B', 'C'], 60),
+        'timestamp': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 600, 60), unit='min'),
+        'sensor_value': rng.normal(50, 10, 60),
+        'threshold_breach': rng.random(60) < 0.3
+    })
+    log_data = pd.DataFrame({
+        'device_id': rng.choice(['A', 'B'], 40),
+        'timestamp': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 600, 40), unit='min'),
+        'event_severity': rng.integers(1, 6, 40).astype(float)
+    })
+    log_data.loc[::7, 'event_severity'] = np.nan
+    features, labels = model.prepare_data(sensor_data.copy(), log_data.copy())
+    
+    sensor_data = sensor_data.sort_values('timestamp')
+    log_data = log_data.sort_values('timestamp')
+    row = 0
+    for device_id in sensor_data['device_id'].unique():
+        device_sensors = sensor_data[sensor_data['device_id'] == device_id]
+        device_logs = log_data[log_data['device_id'] == device_id]
+        for i in range(len(device_sensors) - model.sequence_length):
+            sequence = device_sensors.iloc[i:i+model.sequence_length]
+            relevant = device_logs[
+                (device_logs['timestamp'] >= sequence['timestamp'].iloc[0]) &
+                (device_logs['timestamp'] <= sequence['timestamp'].iloc[-1])
+            ]
+            expected = [len(relevant), relevant['event_severity'].mean() if not relevant.empty else 0,
+                        relevant['event_severity'].max() if not relevant.empty else 0]
+            assert np.array_equal(features[row, 0, 2:], expected, equal_nan=True)
+            assert np.array_equal(features[row, :, 0], sequence['sensor_value'].values)
+            assert labels[row] == int(device_sensors['threshold_breach'].iloc[i+model.sequence_length])
+            row += 1
+    assert row == features.shape[0]
+
+def test_prepare_latest_windows_one_per_device():
+    model = PredictiveMaintenanceModel()
+    sensor_data = pd.DataFrame({
+        'device_id': ['A']*12 + ['B']*10 + ['C']*5,
+        'timestamp': [f'00:{m:02d}' for m in range(12)] + [f'01:{m:02d}' for m in range(10)] + [f'02:{m:02d}' for m in range(5)],
+        'sensor_value': list(range(12)) + list(range(100, 110)) + list(range(5)),
+        'threshold_breach': [0]*27
+    })
+    device_ids, X = model.prepare_latest_windows(sensor_data, pd.DataFrame(columns=['device_id', 'timestamp', 'event_severity']))
+    assert device_ids == ['A', 'B']  # C has fewer than sequence_length readings
+    assert X.shape == (2, 10, 5)
+    assert np.array_equal(X[0, :, 0], np.arange(2, 12))
+    assert np.array_equal(X[1, :, 0], np.arange(100, 110))
+
+def test_predict_batch_single_model_call():
+    model = PredictiveMaintenanceModel()
+    class DummyScaler:
+        def transform(self, X):
+            assert X.ndim == 2
+            return X
+    model.scaler = DummyScaler()
+    calls = []
+    class DummyKerasModel:
+        def predict(self, X, **kwargs):
+            calls.append(X.shape)
+            return X[:, -1, :1] / 100
+    model.model = DummyKerasModel()
+    sensor_data = pd.DataFrame({
+        'device_id': ['A']*10 + ['B']*10,
+        'timestamp': [f'00:{m:02d}' for m in range(10)] * 2,
+        'sensor_value': [10]*10 + [90]*10,
+        'threshold_breach': [0]*20
+    })
+    preds = model.predict_batch(sensor_data, pd.DataFrame(columns=['device_id', 'timestamp', 'event_severity']))
+    assert calls == [(2, 10, 5)]
+    assert preds == {'A': 0.1, 'B': 0.9}
+
+def test_predict_batch_empty():
+    model = PredictiveMaintenanceModel()
+    sensor_data = pd.DataFrame({'device_id': ['A']*3, 'timestamp': ['00:01']*3, 'sensor_value': [1]*3, 'threshold_breach': [0]*3})
+    assert model.predict_batch(sensor_data, pd.DataFrame(columns=['device_id', 'timestamp', 'event_severity'])) == {}
+
+def make_readings(count, start='2023-01-01T00:00:00'):
+    start = pd.Timestamp(start)
+    readings = []
+    for i in range(count):
+        ts = (start + pd.Timedelta(minutes=5 * i)).to_pydatetime()
+        readings.append({
+            'timestamp': ts.strftime('%H:%M'),
+            'raw_timestamp': ts.isoformat(),
+            'temperature': round(20 + i * 0.37, 2),
+            'humidity': 45.1
+        })
+    return readings
+
+def test_sensor_store_round_trips_readings():
+    store = SensorHistoryStore(capacity=16)
+    readings = make_readings(10)
+    assert store.extend('device_1', readings) == 10
+    assert store['device_1'].to_list() == readings
+    assert store['device_1'][-3:] == readings[-3:]
+    assert store['device_1'][-1] == readings[-1]
+    assert store.as_dict() == {'device_1': readings}
+    assert 'device_1' in store and store.get('missing') is None
+
+def test_sensor_store_ring_keeps_newest_readings():
+    store = SensorHistoryStore(capacity=8)
+    readings = make_readings(21)
+    store.extend('device_1', readings)
+    assert len(store['device_1']) == 8
+    assert store['device_1'].to_list() == readings[-8:]
+    timestamps, columns = store.last('device_1', 5)
+    assert timestamps.base is not None and columns['temperature'].base is not None  # views, not copies
+    assert np.allclose(columns['temperature'], [r['temperature'] for r in readings[-5:]])
+
+def test_sensor_store_keeps_late_readings_in_time_order_and_reads_ranges():
+    store = SensorHistoryStore(capacity=32)
+    readings = make_readings(12)
+    store.extend('device_1', readings[6:])
+    # Late and repeated timestamps are kept, in time order, like the list the store replaced
+    repeat = dict(readings[8], temperature=99.5)
+    assert store.extend('device_1', [readings[3], repeat]) == 2
+    assert store['device_1'].to_list() == [readings[3]] + readings[6:9] + [repeat] + readings[9:]
+    assert store.has_timestamp('device_1', readings[3]['raw_timestamp'])
+    assert not store.has_timestamp('device_1', readings[4]['raw_timestamp'])
+    timestamps, columns = store.between('device_1', readings[7]['raw_timestamp'], readings[9]['raw_timestamp'])
+    assert len(timestamps) == 4
+    assert np.allclose(columns['humidity'], 45.1)
+
+def test_sensor_store_keeps_full_precision_and_inserts_into_full_ring():
+    store = SensorHistoryStore(capacity=4)
+    readings = make_readings(6)
+    for i, reading in enumerate(readings):
+        reading['temperature'] = 20.123456789 + i
+    store.extend('device_1', readings[1:3] + readings[4:6])
+    assert store['device_1'].to_list() == readings[1:3] + readings[4:6]
+    # Inserting into a full ring drops the oldest reading; one older than all of them is not stored
+    assert store.append('device_1', readings[3])
+    assert store['device_1'].to_list() == readings[2:]
+    assert not store.append('device_1', readings[0])
+    assert store.latest('device_1') == store.last('device_1', 1)[0][0]
+    store.append('device_1', make_readings(1, start='2023-01-02T00:00:00')[0])
+    assert [r['raw_timestamp'] for r in store['device_1']][:3] == [r['raw_timestamp'] for r in readings[3:]]
+
+def test_periodic_sensor_update_keeps_late_readings_and_rebuilds_rolling_state(app_module):
+    store = app_module.SensorHistoryStore(capacity=100)
+    feature_states = app_module.FeatureStateStore(app_module.model.sequence_length)
+    breach_rates = app_module.BreachRateTracker(app_module.MAINTENANCE_BREACH_WINDOW)
+    device = {'type': 'hvac', 'sensors': {'temperature': 70.0, 'humidity': 45.0}}
+    with patch.object(app_module, 'devices', {'hvac_1': device}), \
+            patch.object(app_module, 'sensor_history', store), \
+            patch.object(app_module, 'feature_states', feature_states), \
+            patch.object(app_module, 'breach_rates', breach_rates):
+        app_module.generate_sensor_history()
+        app_module.latest_feature_window('hvac_1')
+        app_module.update_sensor_data_periodically()
+        # Each run generates ten readings 5 minutes apart ending now, so most land inside the history
+        history = store['hvac_1'].to_list()
+        assert len(history) == 20
+        assert [r['raw_timestamp'] for r in history] == sorted(r['raw_timestamp'] for r in history)
+        window = app_module.latest_feature_window('hvac_1')
+        recent = history[-feature_states.sequence_length:]
+        expected = app_module.FeatureStateStore(feature_states.sequence_length).rebuild(
+            'hvac_1', app_module.readings_to_model_rows('hvac_1', recent)).latest_window()
+        np.testing.assert_array_equal(window, expected)
+
+def make_journal(tmp_path):
+    return AlertJournal(str(tmp_path / 'alerts.json'), str(tmp_path / 'alerts.journal.jsonl'), fsync_interval=0.01)
+
+def test_alert_journal_replays_snapshot_and_tail(tmp_path):
+    journal = make_journal(tmp_path)
+    alerts = [{'id': '1', 'severity': 8, 'acknowledged': False}]
+    journal.compact(alerts)
+    journal.record_created({'id': '2', 'severity': 3, 'acknowledged': False})
+    journal.record_updated('1', {'acknowledged': True, 'resolution_notes': 'fixed'})
+    journal.close()
+    loaded = make_journal(tmp_path).load()
+    assert loaded == [
+        {'id': '1', 'severity': 8, 'acknowledged': True, 'resolution_notes': 'fixed'},
+        {'id': '2', 'severity': 3, 'acknowledged': False}
+    ]
+
+def test_alert_journal_compaction_truncates_log(tmp_path):
+    journal = make_journal(tmp_path)
+    alerts = []
+    for i in range(5):
+        alert = {'id': str(i), 'severity': i}
+        alerts.append(alert)
+        journal.record_created(alert)
+    assert journal.needs_compaction(max_events=5, max_age=3600)
+    journal.compact(alerts)
+    assert not journal.needs_compaction(max_events=5, max_age=0)
+    assert not (tmp_path / 'alerts.journal.jsonl').exists()
+    journal.record_updated('3', {'acknowledged': True})
+    journal.close()
+    assert len((tmp_path / 'alerts.journal.jsonl').read_text().splitlines()) == 1
+    loaded = make_journal(tmp_path).load()
+    assert [a['id'] for a in loaded] == ['0', '1', '2', '3', '4']
+    assert loaded[3]['acknowledged'] is True
+
+def test_alert_journal_skips_torn_line(tmp_path):
+    journal = make_journal(tmp_path)
+    journal.record_created({'id': '1', 'severity': 5})
+    journal.close()
+    with open(tmp_path / 'alerts.journal.jsonl', 'a') as f:
+        f.write('{"op": "create", "alert": {"id": "2"')
+    assert make_journal(tmp_path).load() == [{'id': '1', 'severity': 5}]
+
+def make_alerts():
+    return [
+        {'id': '1', 'device_id': 'device_1', 'severity': 9, 'timestamp': '2023-01-01T10:00:00'},
+        {'id': '2', 'device_id': 'device_2', 'severity': 5, 'timestamp': '2023-01-01T11:00:00'},
+        {'id': '3', 'device_id': 'device_1', 'severity': 2, 'timestamp': '2023-01-02T09:00:00'},
+        {'id': '4', 'device_id': 'device_1', 'severity': 7, 'timestamp': '2023-01-02T12:00:00'},
+    ]
+
+def test_severity_band():
+    assert [severity_band(s) for s in (10, 7, 6, 4, 3, 0)] == ['critical', 'critical', 'warning', 'warning', 'info', 'info']
+    assert severity_band('high') is None
+
+def test_alert_index_lookups_match_linear_filters():
+    alerts = make_alerts()
+    index = AlertIndex(alerts)
+    assert index.get('3') is alerts[2]
+    assert index.get('missing') is None
+    assert index.by_device('device_1') == [a for a in alerts if a['device_id'] == 'device_1']
+    assert index.by_band('critical') == [a for a in alerts if a['severity'] >= 7]
+    assert index.by_day('2023-01-02') == [a for a in alerts if a['timestamp'].startswith('2023-01-02')]
+    assert index.filter(band='critical', device_id='device_1') == [alerts[0], alerts[3]]
+    assert index.filter() == alerts
+
+def test_alert_index_incremental_updates():
+    index = AlertIndex(make_alerts())
+    index.add({'id': '5', 'device_id': 'device_2', 'severity': 8, 'timestamp': '2023-01-03T00:00:00'})
+    assert [a['id'] for a in index.by_device('device_2')] == ['2', '5']
+    index.update('2', {'severity': 1, 'acknowledged': True})
+    assert [a['id'] for a in index.by_band('warning')] == []
+    assert [a['id'] for a in index.by_band('info')] == ['3', '2']
+    assert index.get('2')['acknowledged'] is True
+    index.remove('5')
+    assert '5' not in index and len(index) == 4
+    assert index.by_day('2023-01-03') == []
+
+def test_alert_statistics_track_mutations():
+    alerts = make_alerts()
+    index = AlertIndex(alerts)
+    index.update('1', {'acknowledged': True})
+    index.add({'id': '5', 'device_id': 'device_2', 'severity': 4, 'timestamp': '2023-01-02T13:00:00'})
+    index.remove('3')
+    stats = index.stats
+    current = [index.get(i) for i in ('1', '2', '4', '5')]
+    assert stats.total == len(current)
+    assert stats.resolved == 1
+    assert stats.by_band == {'critical': 2, 'warning': 2, 'info': 0}
+    assert stats.active_by_band == {'critical': 1, 'warning': 2, 'info': 0}
+    assert stats.by_device['device_1'] == {'total': 2, 'critical': 2, 'warning': 0, 'info': 0, 'resolved': 1}
+    assert stats.day('2023-01-02') == {'total': 2, 'critical': 1, 'warning': 1, 'info': 0, 'resolved': 0}
+    assert stats.day('2023-01-05')['total'] == 0
+    index.remove('2')
+    index.remove('5')
+    assert 'device_2' not in stats.by_device
+
+def test_llm_gateway_bounds_concurrency_without_blocking_loop():
+    release = threading.Event()
+    def generate(prompt):
+        release.wait(5)
+        return prompt.upper()
+    gateway = LLMGateway(generate, max_concurrency=2, timeout=5)
+
+    async def scenario():
+        calls = [asyncio.create_task(gateway.complete(f'q{i}')) for i in range(5)]
+        await asyncio.sleep(0.1)  # The loop keeps running while calls are blocked
+        metrics = gateway.metrics()
+        release.set()
+        return metrics, await asyncio.gather(*calls)
+
+    metrics, results = asyncio.run(scenario())
+    gateway.shutdown()
+    assert metrics['in_flight'] == 2 and metrics['queue_depth'] == 3
+    assert results == ['Q0', 'Q1', 'Q2', 'Q3', 'Q4']
+    assert gateway.metrics()['completed'] == 5
+
+def test_llm_gateway_timeout_cancels_queued_call():
+    gateway = LLMGateway(lambda prompt: time.sleep(0.5) or prompt, max_concurrency=1, timeout=0.1)
+
+    async def scenario():
+        return await asyncio.gather(gateway.complete('a'), gateway.complete('b'), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    gateway.shutdown()
+    assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+    metrics = gateway.metrics()
+    assert metrics['timed_out'] == 2 and metrics['queue_depth'] == 0
+
+class FakeChatCompletion:
+    """Stands in for openai.ChatCompletion, recording how many calls overlap"""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def acreate(self, messages, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            device = messages[0]['content'].split('Affected Devices: ')[1].split('\n')[0]
+            return SimpleNamespace(choices=[SimpleNamespace(message={'content': f' Alert for {device} '})])
+        finally:
+            self.in_flight -= 1
+
+@pytest.fixture
+def env_descriptions(app_module):
+    def install(completion, concurrency=4, timeout=5.0):
+        client = LazyResource('openai', lambda: SimpleNamespace(ChatCompletion=completion))
+        return [
+            patch.object(app_module, 'openai_client', client),
+            patch.object(app_module, 'env_description_semaphore', asyncio.Semaphore(concurrency)),
+            patch.object(app_module, 'env_description_cache', TTLCache(maxsize=16, ttl=60)),
+            patch.object(app_module, 'ENV_DESCRIPTION_TIMEOUT', timeout)
+        ]
+
+    def run(patches, scenario):
+        for p in patches:
+            p.start()
+        try:
+            return asyncio.run(scenario())
+        finally:
+            for p in reversed(patches):
+                p.stop()
+
+    return app_module, install, run
+
+def test_environmental_descriptions_fan_out_under_concurrency_limit(env_descriptions):
+    app_module, install, run = env_descriptions
+    completion = FakeChatCompletion(delay=0.1)
+    patches = install(completion, concurrency=2) + [
+        patch.object(app_module, 'devices', {f'dev_{i}': {} for i in range(6)}),
+        patch.object(app_module, 'sensor_history', {f'dev_{i}': [{'sensor_error': True}] for i in range(4)})
+    ]
+
+    async def scenario():
+        start = time.perf_counter()
+        alerts = await app_module.get_environmental_alerts()
+        return alerts, time.perf_counter() - start
+
+    alerts, elapsed = run(patches, scenario)
+    # Weather, power and one sensor alert per device with a sensor error
+    assert len(alerts) == 6 and completion.calls == 6
+    assert completion.max_in_flight == 2
+    assert elapsed < 6 * 0.1  # Three rounds of two, not six calls in a row
+    for alert in alerts:
+        assert alert['description'] == f"Alert for {', '.join(alert['affected_devices'])}"
+
+def test_environmental_description_timeout_falls_back_and_is_not_cached(env_descriptions):
+    app_module, install, run = env_descriptions
+    args = ('weather', 'high', ['Temperature'], ['dev_1'])
+    fallback = app_module.fallback_description(*args)
+
+    slow = FakeChatCompletion(delay=1.0)
+    patches = install(slow, timeout=0.1)
+
+    async def timed_out():
+        start = time.perf_counter()
+        description = await app_module.generate_gpt_description(*args)
+        return description, time.perf_counter() - start, len(app_module.env_description_cache)
+
+    description, elapsed, cached = run(patches, timed_out)
+    assert description == fallback and elapsed < 0.5 and cached == 0
+
+    failing = FakeChatCompletion(error=RuntimeError('rate limited'))
+    patches = install(failing)
+
+    async def failed_then_retried():
+        first = await app_module.generate_gpt_description(*args)
+        second = await app_module.generate_gpt_description(*args)
+        return first, second, len(app_module.env_description_cache)
+
+    first, second, cached = run(patches, failed_then_retried)
+    assert first == second == fallback and cached == 0
+    assert failing.calls == 2  # The failure was not cached, so it was asked again
+
+def test_environmental_description_repeat_is_served_from_cache(env_descriptions):
+    app_module, install, run = env_descriptions
+    completion = FakeChatCompletion()
+    patches = install(completion)
+
+    async def scenario():
+        first = await app_module.generate_gpt_description('power', 'low', ['Power supply'], ['dev_2', 'dev_1'])
+        # Same alert with the devices listed in another order
+        second = await app_module.generate_gpt_description('power', 'low', ['Power supply'], ['dev_1', 'dev_2'])
+        other = await app_module.generate_gpt_description('power', 'high', ['Power supply'], ['dev_1', 'dev_2'])
+        return first, second, other, app_module.env_description_cache.hits
+
+    first, second, other, hits = run(patches, scenario)
+    assert first == second == 'Alert for dev_1, dev_2'
+    assert other == 'Alert for dev_1, dev_2'
+    assert completion.calls == 2 and hits == 1
+
+def test_alert_index_version_increases_on_every_mutation():
+    index = AlertIndex(make_alerts())
+    versions = [index.version]
+    index.add({'id': '5', 'device_id': 'device_2', 'severity': 8, 'timestamp': '2023-01-03T00:00:00'})
+    versions.append(index.version)
+    index.update('5', {'acknowledged': True})
+    versions.append(index.version)
+    index.remove('5')
+    versions.append(index.version)
+    index.rebuild(make_alerts())
+    versions.append(index.version)
+    assert versions == sorted(set(versions))
+
+def test_ttl_cache_lru_eviction_and_expiry():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)  # Evicts 'b', the least recently used
+    assert cache.get('b') is MISSING
+    now[0] = 10.0
+    assert cache.get('a') is MISSING and cache.get('c', None) is None
+    metrics = cache.metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['evictions'], metrics['expired']) == (1, 3, 1, 2)
+    assert metrics['size'] == 0
+
+def test_alert_context_ranks_and_summarizes():
+    alerts = make_alerts()
+    for alert in alerts:
+        alert['device_name'] = alert['device_id'].upper()
+    alerts[0]['acknowledged'] = True
+    context = build_alert_context(alerts, top_k=2, now=datetime(2023, 1, 2, 13))
+    lines = context.splitlines()
+    # Open critical alert 4 first, then the open warning 2; acknowledged critical 1 is summarized
+    assert lines[0].startswith('- On 2023-01-02T12:00:00, device DEVICE_1 raised a critical alert (severity 7)')
+    assert 'severity 5' in lines[1]
+    assert lines[2] == 'Other alerts by device:'
+    assert lines[3] == ('- Device DEVICE_1: 2 more alerts (1 critical, 0 warning, 1 info; '
+                        '1 unacknowledged), latest at 2023-01-02T09:00:00.')
+
+def test_alert_context_respects_token_budget():
+    alerts = [{'id': str(i), 'device_id': f'device_{i % 7}', 'severity': i % 10,
+               'timestamp': f'2023-01-01T{i % 24:02d}:00:00', 'message': 'Temperature exceeded threshold'}
+              for i in range(5000)]
+    context = build_alert_context(alerts, top_k=100, token_budget=300)
+    assert estimate_tokens(context) <= 300 + 20
+    assert context.splitlines()[-1].endswith('further alerts omitted to fit the context budget.')
+
+def test_lazy_resource_loads_once_and_retries_failures():
+    calls = []
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('weights missing')
+        return 'model'
+    resource = LazyResource('model', factory)
+    assert resource.status() == {'state': 'not_loaded'}
+    with pytest.raises(RuntimeError):
+        resource.get()
+    assert resource.status()['state'] == 'failed'
+    resource.warm_up().join()
+    assert resource.get() == 'model' and resource.get() == 'model'
+    assert len(calls) == 2 and resource.status()['state'] == 'loaded'
+
+def test_lazy_resource_aget_loads_without_blocking_the_event_loop():
+    resource = LazyResource('model', lambda: time.sleep(0.3) or 'model')
+
+    async def scenario():
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        ticker = asyncio.create_task(tick())
+        values = await asyncio.gather(resource.aget(), resource.aget())
+        ticker.cancel()
+        return values, ticks
+
+    values, ticks = asyncio.run(scenario())
+    assert values == ['model', 'model'] and resource.status()['state'] == 'loaded'
+    # The loop kept running while the factory slept
+    assert ticks >= 10
+
+def test_lazy_resource_swap_keeps_previous_value_usable():
+    resource = LazyResource('model', lambda: 'v1')
+    current = resource.get()
+    assert resource.swap('v2') == 'v1'
+    assert current == 'v1' and resource.get() == 'v2'
+
+def test_numpy_lstm_matches_keras(tmp_path):
+    keras_model = PredictiveMaintenanceModel().build_model((10, 5))
+    h5_path = str(tmp_path / 'model.h5')
+    keras_model.save(h5_path)
+    export_h5_to_npz(h5_path, str(tmp_path / 'model.npz'))
+    numpy_model = NumpyLSTMModel.load(str(tmp_path / 'model.npz'))
+    X = np.random.default_rng(0).normal(size=(64, 10, 5)).astype(np.float32)
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X, batch_size=16)
+    assert actual.shape == expected.shape
+    assert np.abs(actual - expected).max() < 1e-5
+
+def test_numpy_export_is_refreshed_by_content_not_mtime(tmp_path):
+    from numpy_lstm import is_current_export
+
+    model = PredictiveMaintenanceModel(inference_backend='numpy')
+    h5_path = str(tmp_path / 'predictive_model.h5')
+    npz_path = str(tmp_path / 'predictive_model.npz')
+    model.build_model((10, 5)).save(h5_path)
+    export_h5_to_npz(h5_path, npz_path)
+    exported_at = os.stat(npz_path).st_mtime_ns
+
+    # A newer .h5 mtime alone (e.g. after a checkout) leaves the export alone
+    os.utime(h5_path, ns=(exported_at + 10**9, exported_at + 10**9))
+    model._load_numpy_model(h5_path)
+    assert os.stat(npz_path).st_mtime_ns == exported_at
+
+    model.build_model((10, 5)).save(h5_path)
+    assert not is_current_export(h5_path, npz_path)
+    model._load_numpy_model(h5_path)
+    assert is_current_export(h5_path, npz_path)
+
+def test_prediction_cache_fingerprint_and_invalidation():
+    store = SensorHistoryStore(capacity=20)
+    store.extend('device_1', make_readings(12))
+    cache = PredictionCache()
+    fingerprint = window_fingerprint(*store.last('device_1', 10), 'model-v1')
+    assert window_fingerprint(*store.last('device_1', 10), 'model-v1') == fingerprint
+    assert window_fingerprint(*store.last('device_1', 10), 'model-v2') != fingerprint
+    assert cache.get('device_1', fingerprint) is None
+    cache.set('device_1', fingerprint, 0.25)
+    assert cache.get('device_1', fingerprint) == 0.25
+    store.append('device_1', make_readings(1, start='2023-01-02T00:00:00')[0])
+    assert window_fingerprint(*store.last('device_1', 10), 'model-v1') != fingerprint
+    cache.invalidate('device_1')
+    assert cache.get('device_1', fingerprint) is None
+    metrics = cache.metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['invalidations']) == (1, 2, 1)
+
+def test_status_snapshot_dirty_tracking_and_publish():
+    snapshot = StatusSnapshot()
+    assert snapshot.current is None and snapshot.take_dirty() == (True, set())
+    assert not snapshot.is_dirty
+    snapshot.mark_dirty('device_1')
+    snapshot.mark_dirty('device_2')
+    assert snapshot.take_dirty() == (False, {'device_1', 'device_2'})
+    version, generated_at, body = snapshot.publish({'device_1': {'last_check': datetime(2023, 1, 1, 12)}})
+    assert json.loads(body) == {'device_1': {'last_check': '2023-01-01T12:00:00'}}
+    assert snapshot.publish({})[0] == version + 1 and snapshot.current[2] == b'{}'
+
+def test_inference_batcher_merges_concurrent_requests():
+    calls = []
+    def predict_fn(X):
+        calls.append(len(X))
+        return X.sum(axis=(1, 2))[:, None]
+    batcher = InferenceBatcher(predict_fn, max_batch_size=64, max_wait=0.2)
+    inputs = [np.full((n, 10, 5), i, dtype=np.float32) for i, n in enumerate((1, 3, 2))]
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.predict(X) for X in inputs))
+
+    results = asyncio.run(scenario())
+    batcher.shutdown()
+    assert calls == [6]
+    for X, result in zip(inputs, results):
+        np.testing.assert_array_equal(result, X.sum(axis=(1, 2))[:, None])
+    assert batcher.metrics()['batches'] == 1 and batcher.metrics()['requests'] == 3
+
+def test_inference_batcher_scores_requests_with_their_own_args():
+    calls = []
+    def predict_fn(X, scale):
+        calls.append((len(X), scale))
+        return X.sum(axis=(1, 2))[:, None] * scale
+    batcher = InferenceBatcher(predict_fn, max_batch_size=64, max_wait=0.2)
+    inputs = [(np.ones((n, 10, 5), dtype=np.float32), scale) for n, scale in ((1, 1), (3, 2), (2, 1))]
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.predict(X, scale) for X, scale in inputs))
+
+    results = asyncio.run(scenario())
+    batcher.shutdown()
+    # One batch collected, but each scale scores only its own requests
+    assert sorted(calls) == [(3, 1), (3, 2)]
+    for (X, scale), result in zip(inputs, results):
+        np.testing.assert_array_equal(result, X.sum(axis=(1, 2))[:, None] * scale)
+
+def test_inference_batcher_propagates_errors():
+    def predict_fn(X):
+        raise ValueError('model not loaded')
+    batcher = InferenceBatcher(predict_fn, max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.submit(np.zeros((1, 10, 5))).result(timeout=5)
+    assert len(batcher.submit(np.zeros((0, 10, 5))).result()) == 0
+    batcher.shutdown()
+
+def test_inference_pool_matches_in_process_and_survives_worker_crash():
+    model = PredictiveMaintenanceModel(inference_backend='numpy')
+    assert model.load_model()
+    X = np.random.default_rng(0).random((50, model.sequence_length, 5), dtype=np.float32)
+    expected = model.predict_windows(X)
+    pool = InferencePool(1, (model.sequence_length, 5), chunk_size=16)
+    try:
+        np.testing.assert_allclose(pool.predict_windows(X, model_version=model.model_version), expected, atol=1e-6)
+        with pytest.raises(LookupError):
+            pool.predict_windows(X, model_version='not-served')
+        pool._workers[0].process.kill()
+        pool._workers[0].process.join()
+        np.testing.assert_allclose(pool.predict_windows(X), expected, atol=1e-6)
+        pool.restart()
+        metrics = pool.metrics()
+        assert metrics['restarts'] == 2 and metrics['alive'] == 1
+        assert metrics['model_versions'] == [model.model_version]
+        assert pool.predict_windows(X[:0]).shape == (0, 1)
+    finally:
+        pool.close()
+
+def test_predict_windows_scores_with_the_model_that_prepared_the_windows(app_module):
+    class Pool:
+        def predict_windows(self, X, model_version=None):
+            if model_version != 'v2':
+                raise LookupError(model_version)
+            return np.full((len(X), 1), 2.0)
+
+    previous = SimpleNamespace(model_version='v1', predict_windows=lambda X: np.full((len(X), 1), 1.0))
+    X = np.zeros((3, 10, 5), dtype=np.float32)
+    with patch.object(app_module, 'inference_pool', LazyResource('inference_pool', Pool)):
+        # The pool has moved on to v2, so v1's windows are scored by v1 in-process
+        np.testing.assert_array_equal(app_module.predict_windows(X, previous), np.ones((3, 1)))
+        current = SimpleNamespace(model_version='v2')
+        np.testing.assert_array_equal(app_module.predict_windows(X, current), np.full((3, 1), 2.0))
+
+def test_inference_pool_sets_aside_worker_that_cannot_restart():
+    model = PredictiveMaintenanceModel(inference_backend='numpy')
+    assert model.load_model()
+    X = np.random.default_rng(0).random((8, model.sequence_length, 5), dtype=np.float32)
+    pool = InferencePool(1, (model.sequence_length, 5), chunk_size=16)
+    worker = pool._workers[0]
+    try:
+        worker.process.kill()
+        worker.process.join()
+        with patch.object(worker, 'start', side_effect=RuntimeError('Inference worker failed to start: No trained model found')):
+            with pytest.raises(RuntimeError, match='could not be restarted'):
+                pool.predict_windows(X)
+            # The dead worker is not handed out again; later calls fail fast instead of hanging
+            with pytest.raises(RuntimeError, match='No inference workers are running'):
+                pool.predict_windows(X)
+            with pytest.raises(RuntimeError, match='could not be restarted'):
+                pool.restart()
+        metrics = pool.metrics()
+        assert metrics['dead'] == 1 and metrics['alive'] == 0 and metrics['idle'] == 0
+        assert metrics['failures'] == 3 and 'No trained model found' in metrics['last_error']
+        pool.restart()
+        assert pool.metrics()['dead'] == 0
+        np.testing.assert_allclose(pool.predict_windows(X), model.predict_windows(X), atol=1e-6)
+    finally:
+        pool.close()
+
+def test_model_registry_promotes_versions_atomically(tmp_path):
+    source = PredictiveMaintenanceModel(inference_backend='numpy')
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    assert registry.current_version() is None
+    first = import_flat_model(registry, source.MODELS_DIR)
+    staging = registry.stage()
+    for name in ('predictive_model.h5', 'scaler.joblib'):
+        shutil.copy(tmp_path / 'registry' / first / name, staging)
+    second = registry.register(staging, {'epochs': 3})
+    assert not os.path.exists(staging) and sorted(registry.versions()) == sorted([first, second])
+    with pytest.raises(KeyError):
+        registry.promote('missing')
+
+    model = PredictiveMaintenanceModel(inference_backend='numpy')
+    model.MODELS_DIR = str(tmp_path)
+    registry.promote(first)
+    assert model.load_model() and model.model_version == first
+    registry.promote(second)
+    assert model.load_model() and model.model_version == second
+    assert model.load_model(first) and model.model_version == first
+    assert not model.load_model('missing')
+    manifest = json.loads((tmp_path / 'registry' / 'manifest.json').read_text())
+    assert manifest['current'] == second and manifest['previous'] == first
+    assert registry.versions()[second]['params'] == {'epochs': 3}
+
+def test_feature_state_matches_prepare_latest_windows():
+    rng = np.random.default_rng(0)
+    model = PredictiveMaintenanceModel()
+    base = datetime(1900, 1, 1)
+    rows = [{'device_id': 'A', 'timestamp': f'{i * 3 // 60:02d}:{i * 3 % 60:02d}',
+             'sensor_value': float(rng.uniform(0, 100)), 'threshold_breach': bool(rng.random() < 0.2)}
+            for i in range(40)]
+    severities = [1, 2, 5, None]
+    logs = [{'device_id': 'A', 'timestamp': base + pd.Timedelta(minutes=float(rng.uniform(-10, 130))),
+             'event_severity': severities[int(rng.integers(len(severities)))]} for _ in range(30)]
+    # Readings arrive in order, logs at random points and out of order
+    events = [('reading', row) for row in rows]
+    for log in logs:
+        events.insert(int(rng.integers(len(events) + 1)), ('log', log))
+
+    state = DeviceFeatureState(model.sequence_length)
+    seen_rows, seen_logs = [], []
+    for kind, event in events:
+        if kind == 'reading':
+            state.add_reading(event['timestamp'], event['sensor_value'], event['threshold_breach'])
+            seen_rows.append(event)
+        else:
+            state.add_log(event['timestamp'], event['event_severity'])
+            seen_logs.append(event)
+        window = state.latest_window()
+        if len(seen_rows) < model.sequence_length:
+            assert window is None
+            continue
+        log_df = pd.DataFrame(seen_logs, columns=['device_id', 'timestamp', 'event_severity'])
+        _, X = model.prepare_latest_windows(pd.DataFrame(seen_rows), log_df)
+        np.testing.assert_allclose(window, X[0], rtol=1e-12, atol=0, equal_nan=True)
+
+    store = FeatureStateStore(model.sequence_length)
+    assert not store.add_readings('A', rows)
+    store.rebuild('A', rows[:-1], logs)
+    assert store.add_readings('A', rows[-1:])
+    np.testing.assert_array_equal(store.get('A').latest_window(), state.latest_window())
+
+def test_window_stream_matches_prepare_data(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 300
+    minutes = rng.choice(1440, n, replace=False)
+    pd.DataFrame({
+        'timestamp': [f'{m // 60:02d}:{m % 60:02d}' for m in minutes],
+        'device_id': rng.choice(['a', 'b', 'c', 'd'], n),
+        'sensor_value': rng.normal(50, 10, n).round(2),
+        'threshold_breach': rng.random(n) < 0.2
+    }).to_csv(tmp_path / 'sensor_data.csv', index=False)
+    pd.DataFrame({
+        'timestamp': [f'1900-01-01 {m // 60:02d}:{m % 60:02d}:00' for m in rng.integers(0, 1440, 80)],
+        'device_id': rng.choice(['a', 'b', 'c', 'e'], 80),
+        'event_severity': rng.integers(1, 5, 80)
+    }).to_csv(tmp_path / 'log_data.csv', index=False)
+    model = PredictiveMaintenanceModel()
+    model.training_block_windows = 7
+    X, y = model.prepare_data(pd.read_csv(tmp_path / 'sensor_data.csv'), pd.read_csv(tmp_path / 'log_data.csv'))
+
+    # Chunks smaller than a device's rows exercise appending to the partitions
+    sensor_partitions = partition_csv_by_device(str(tmp_path / 'sensor_data.csv'), str(tmp_path / 'parts'), 13,
+                                                parse_sensor_timestamps)
+    log_partitions = partition_csv_by_device(str(tmp_path / 'log_data.csv'), str(tmp_path / 'parts'), 13)
+    assert sum(p.rows for p in sensor_partitions.values()) == n
+    stream = DeviceWindowStream(sensor_partitions, log_partitions, model.iter_device_windows,
+                                (model.sequence_length, 5), device_order=time_order(sensor_partitions))
+    scaler = MinMaxScaler()
+    assert stream.fit_scaler(scaler) == len(X)
+    reference = MinMaxScaler().fit(X.reshape(len(X), -1))
+    np.testing.assert_allclose(scaler.data_min_, reference.data_min_)
+    np.testing.assert_allclose(scaler.data_max_, reference.data_max_)
+
+    blocks = list(stream.iter_blocks())
+    np.testing.assert_array_equal(np.concatenate([b[0] for b in blocks]), X)
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in blocks]), y)
+    np.testing.assert_array_equal(np.concatenate([b[0] for b in stream.iter_blocks(100, 213)]), X[100:213])
+    split_sizes = [sum(len(b[1]) for b in stream.iter_split_blocks(lo, hi, seed=1)) for lo, hi in ((0, 0.2), (0.2, 1))]
+    assert sum(split_sizes) == len(X)
+    assert split_sizes[0] == sum(len(b[1]) for b in stream.iter_split_blocks(0, 0.2, seed=1))
+
+def test_parquet_store_round_trip_and_pushdown(tmp_path):
+    pytest.importorskip('pyarrow')
+    import parquet_store
+
+    rng = np.random.default_rng(0)
+    n = 400
+    timestamps = pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.choice(3 * 1440, n, replace=False), unit='min')
+    raw_dir = tmp_path / 'raw'
+    raw_dir.mkdir()
+    pd.DataFrame({
+        'timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': rng.choice(['a', 'b', 'c'], n),
+        'component_type': rng.choice(['ATM', 'UPS'], n),
+        'sensor_type': rng.choice(['power', 'humidity'], n),
+        'sensor_value': rng.normal(50, 10, n).round(2),
+        'threshold_breach': rng.random(n) < 0.2,
+        'location': rng.choice(['Delhi', 'Mumbai'], n)
+    }).to_csv(raw_dir / 'sensor_data.csv', index=False)
+    pd.DataFrame({
+        'timestamp': (pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 3 * 1440, 60), unit='min')).strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': rng.choice(['a', 'b', 'c'], 60),
+        'event_severity': rng.integers(1, 5, 60)
+    }).to_csv(raw_dir / 'log_data.csv', index=False)
+
+    sensor_csv = str(raw_dir / 'sensor_data.csv')
+    assert parquet_store.dataset_path(sensor_csv) == str(tmp_path / 'parquet' / 'sensor_data')
+    # Chunks smaller than a day write several files per date partition
+    assert parquet_store.convert_csv(sensor_csv, chunksize=97) == n
+    parquet_store.convert_csv(str(raw_dir / 'log_data.csv'))
+    assert parquet_store.has_dataset(sensor_csv)
+
+    df = parquet_store.read_dataset(parquet_store.dataset_path(sensor_csv))
+    assert len(df) == n
+    assert str(df['timestamp'].dtype) == 'datetime64[us]'
+    assert isinstance(df['device_id'].dtype, pd.CategoricalDtype)
+    assert df['sensor_value'].dtype == np.float32
+    assert df['threshold_breach'].dtype == bool
+
+    csv = pd.read_csv(sensor_csv, parse_dates=['timestamp'])
+    start, end = pd.Timestamp('2025-07-01 12:00'), pd.Timestamp('2025-07-02 06:30')
+    filtered = parquet_store.read_dataset(parquet_store.dataset_path(sensor_csv), ['timestamp', 'sensor_value'],
+                                          device_ids=['a', 'c'], start=start, end=end)
+    expected = csv[csv['device_id'].isin(['a', 'c']) & csv['timestamp'].between(start, end)]
+    assert list(filtered.columns) == ['timestamp', 'sensor_value']
+    assert sorted(filtered['timestamp']) == sorted(expected['timestamp'])
+
+    # load_data prefers the Parquet copy and reads only the model's columns
+    model = PredictiveMaintenanceModel()
+    model.RAW_DATA_DIR = str(raw_dir)
+    with patch('pandas.read_csv') as mock_read_csv:
+        sensor_data, log_data = model.load_data()
+    mock_read_csv.assert_not_called()
+    assert list(sensor_data.columns) == ['timestamp', 'device_id', 'sensor_value', 'threshold_breach']
+    assert model.load_data(device_ids=['b'])[0]['device_id'].unique().tolist() == ['b']
+
+    from ml.preprocessing import DataPreprocessor
+    processed = DataPreprocessor().load_and_preprocess(sensor_csv)
+    assert len(processed) == n and processed['device_id_encoded'].max() == 2
+
+def test_load_data_filters_csv_without_parquet_copy(tmp_path):
+    import parquet_store
+    from ml.preprocessing import DataPreprocessor, RAW_COLUMNS
+
+    rng = np.random.default_rng(1)
+    raw_dir = tmp_path / 'raw'
+    raw_dir.mkdir()
+    sensor = pd.DataFrame({
+        'timestamp': (pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 3 * 1440, 300), unit='min')).strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': rng.choice(['a', 'b', 'c'], 300),
+        'component_type': 'ATM',
+        'sensor_type': 'power',
+        'sensor_value': rng.normal(50, 10, 300).round(2),
+        'threshold_breach': rng.random(300) < 0.2,
+        'location': 'Delhi'
+    })
+    sensor.to_csv(raw_dir / 'sensor_data.csv', index=False)
+    logs = pd.DataFrame({
+        'timestamp': (pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 3 * 1440, 60), unit='min')).strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': rng.choice(['a', 'b', 'c'], 60),
+        'event_severity': rng.integers(1, 5, 60)
+    })
+    logs.to_csv(raw_dir / 'log_data.csv', index=False)
+    sensor_csv = str(raw_dir / 'sensor_data.csv')
+    assert not parquet_store.has_dataset(sensor_csv)
+
+    start, end = '2025-07-01 12:00', '2025-07-02 06:30'
+
+    def expected(df):
+        timestamps = pd.to_datetime(df['timestamp'])
+        return df[df['device_id'].isin(['b']) & timestamps.between(pd.Timestamp(start), pd.Timestamp(end))]
+
+    model = PredictiveMaintenanceModel()
+    model.RAW_DATA_DIR = str(raw_dir)
+    sensor_data, log_data = model.load_data(device_ids=['b'], start=start, end=end)
+    assert list(sensor_data.columns) == ['timestamp', 'device_id', 'sensor_value', 'threshold_breach']
+    assert str(sensor_data['timestamp'].dtype) == 'datetime64[us]'
+    assert sorted(sensor_data['timestamp']) == sorted(pd.to_datetime(expected(sensor)['timestamp']))
+    assert sorted(log_data['timestamp']) == sorted(pd.to_datetime(expected(logs)['timestamp']))
+    assert len(model.load_data()[0]) == len(sensor)
+
+    # Filters that drop the id/timestamp columns from the result still apply, across chunks
+    values = parquet_store.read_csv(sensor_csv, ['sensor_value'], ['b'], start, end, chunksize=37)
+    assert list(values.columns) == ['sensor_value']
+    assert sorted(values['sensor_value']) == sorted(expected(sensor)['sensor_value'].astype(np.float32))
+
+    raw = DataPreprocessor().load_raw(sensor_csv, device_ids=['b'], start=start, end=end)
+    assert set(raw.columns) == set(RAW_COLUMNS) & set(sensor.columns)
+    assert len(raw) == len(expected(sensor))
+
+def test_load_data_is_the_same_from_csv_and_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    import parquet_store
+
+    rng = np.random.default_rng(2)
+    raw_dir = tmp_path / 'raw'
+    raw_dir.mkdir()
+    pd.DataFrame({
+        'timestamp': (pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 3 * 1440, 400), unit='min')).strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': rng.choice(['a', 'b', 'c'], 400),
+        'component_type': 'ATM',
+        'sensor_type': 'power',
+        'sensor_value': rng.normal(50, 10, 400).round(2),
+        'threshold_breach': rng.random(400) < 0.2,
+        'location': 'Delhi'
+    }).to_csv(raw_dir / 'sensor_data.csv', index=False)
+    pd.DataFrame({
+        'timestamp': (pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 3 * 1440, 80), unit='min')).strftime('%Y-%m-%d %H:%M:%S'),
+        'device_id': rng.choice(['a', 'b', 'c'], 80),
+        'event_severity': rng.integers(1, 5, 80)
+    }).to_csv(raw_dir / 'log_data.csv', index=False)
+
+    model = PredictiveMaintenanceModel()
+    model.RAW_DATA_DIR = str(raw_dir)
+    filters = {'device_ids': ['a', 'c'], 'start': '2025-07-01 12:00', 'end': '2025-07-03 06:30'}
+    from_csv = model.load_data(), model.load_data(**filters)
+    # Small chunks spread each date over several files, out of CSV order
+    parquet_store.convert_csv(str(raw_dir / 'sensor_data.csv'), chunksize=61)
+    parquet_store.convert_csv(str(raw_dir / 'log_data.csv'), chunksize=17)
+    from_parquet = model.load_data(), model.load_data(**filters)
+
+    for (sensor_csv, log_csv), (sensor_parquet, log_parquet) in zip(from_csv, from_parquet):
+        pd.testing.assert_frame_equal(sensor_csv, sensor_parquet)
+        pd.testing.assert_frame_equal(log_csv, log_parquet)
+        X_csv, y_csv = model.prepare_data(sensor_csv, log_csv)
+        X_parquet, y_parquet = model.prepare_data(sensor_parquet, log_parquet)
+        assert len(X_csv) > 0
+        np.testing.assert_array_equal(X_csv, X_parquet)
+        np.testing.assert_array_equal(y_csv, y_parquet)
+
+def test_create_sequences_windows_each_device_in_time_order():
+    from ml.preprocessing import DataPreprocessor, FEATURE_COLUMNS
+
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({column: rng.normal(size=n) for column in FEATURE_COLUMNS})
+    df['device_id'] = rng.choice(['a', 'b', 'c'], n)
+    df.loc[n - 1, 'device_id'] = 'd'  # Too few rows for a sequence
+    df['timestamp'] = pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.permutation(n), unit='min')
+    df['threshold_breach'] = rng.integers(0, 2, n)
+    preprocessor = DataPreprocessor()
+    length = preprocessor.sequence_length
+
+    expected_X, expected_y = [], []
+    for device in df['device_id'].unique():
+        device_data = df[df['device_id'] == device].sort_values('timestamp')
+        for i in range(len(device_data) - length):
+            expected_X.append(device_data[FEATURE_COLUMNS].values[i:i + length])
+            expected_y.append(device_data['threshold_breach'].values[i + length])
+
+    X, y = preprocessor.create_sequences(df)
+    assert X.dtype == np.float32 and X.shape == (len(expected_X), length, len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(X, np.array(expected_X), rtol=1e-6)
+    np.testing.assert_array_equal(y, expected_y)
+
+    windows = preprocessor.create_sequences(df, lazy=True)
+    assert windows.shape == X.shape and len(windows) == len(y)
+    np.testing.assert_array_equal(windows[5], X[5])
+    assert np.shares_memory(windows[5], windows.features)
+    batches = list(windows.batches(batch_size=64, shuffle=True, seed=0))
+    assert [len(b[1]) for b in batches] == [64, len(y) - 64]
+    assert sorted(np.concatenate([b[1] for b in batches]).tolist()) == sorted(y.tolist())
+
+    X_b, y_b = preprocessor.create_sequences(df, target_device='b')
+    assert len(X_b) == (df['device_id'] == 'b').sum() - length
+    assert preprocessor.create_sequences(df[df['device_id'] == 'd'])[0].shape == (0, length, len(FEATURE_COLUMNS))
+
+def test_calculate_fleet_health_matches_per_device_scores():
+    from ml.preprocessing import DataPreprocessor
+
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        'device_id': rng.choice([f'dev_{i}' for i in range(40)], n),
+        'timestamp': pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 4 * 86400, n), unit='s'),
+        'sensor_value': rng.normal(60, 40, n),
+        'threshold_breach': (rng.random(n) < 0.2).astype(int)
+    })
+    df.loc[:20, 'sensor_value'] = np.nan
+    # Only old readings, and a single recent reading (NaN volatility)
+    df = pd.concat([df, pd.DataFrame({
+        'device_id': ['stale', 'single'],
+        'timestamp': [pd.Timestamp('2025-06-01'), pd.Timestamp('2025-07-04 12:00')],
+        'sensor_value': [50.0, 50.0],
+        'threshold_breach': [1, 0]
+    })], ignore_index=True)
+    preprocessor = DataPreprocessor()
+
+    scores = preprocessor.calculate_fleet_health(df)
+    expected = pd.Series({d: preprocessor.calculate_device_health(df, d) for d in df['device_id'].unique()})
+    pd.testing.assert_series_equal(scores, expected, check_names=False, check_index_type=False)
+    assert scores['stale'] == 100 and np.isnan(scores['single'])
+
+    current_time = pd.Timestamp('2025-07-02')
+    subset = preprocessor.calculate_fleet_health(df, ['dev_3', 'unknown'], current_time)
+    assert subset.tolist() == [preprocessor.calculate_device_health(df, 'dev_3', current_time), 100]
+
+def test_anomaly_engine_batch_and_streaming_z_scores():
+    from ml.preprocessing import DataPreprocessor
+
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({
+        'device_id': rng.choice(['a', 'b', 'c'], n),
+        'sensor_type': rng.choice(['temperature', 'humidity'], n),
+        'sensor_value': rng.normal(50, 5, n)
+    })
+    df.loc[rng.choice(n, 8, replace=False), 'sensor_value'] = 120.0
+    preprocessor = DataPreprocessor()
+
+    # Grouped by device only, the fleet pass finds what detect_anomalies finds per device
+    fleet = preprocessor.detect_fleet_anomalies(df, group_columns=('device_id',))
+    per_device = pd.concat([preprocessor.detect_anomalies(df, d) for d in ['a', 'b', 'c']])
+    pd.testing.assert_frame_equal(fleet.sort_index(), per_device.sort_index())
+    by_sensor = preprocessor.detect_fleet_anomalies(df)
+    assert set(df.index[df['sensor_value'] == 120.0]) <= set(by_sensor.index)
+
+    # Streaming: Welford statistics match pandas, and each reading is scored against the ones before it
+    detector = StreamingAnomalyDetector(threshold=3, min_samples=10)
+    scores = [detector.observe(row.device_id, row.sensor_type, row.sensor_value) for row in df.itertuples()]
+    for (device_id, sensor_type), group in df.groupby(['device_id', 'sensor_type']):
+        stats = detector.state(device_id, sensor_type).stats
+        assert stats.count == len(group)
+        assert stats.mean == pytest.approx(group['sensor_value'].mean())
+        assert stats.std == pytest.approx(group['sensor_value'].std())
+    last = df.iloc[-1]
+    earlier = df.iloc[:-1]
+    previous = earlier.loc[(earlier['device_id'] == last['device_id']) & (earlier['sensor_type'] == last['sensor_type']),
+                           'sensor_value']
+    assert scores[-1] == pytest.approx(abs(last['sensor_value'] - previous.mean()) / previous.std())
+    assert zscores(df).notna().all()
+
+    flagged = detector.drain_anomalies()
+    assert 120.0 in {a['value'] for a in flagged}
+    assert len(flagged) == sum(s > 3 for s in scores) and detector.drain_anomalies() == []
+
+    detector.reset('a')
+    assert detector.state('a', 'temperature') is None and detector.state('b', 'temperature') is not None
+    detector.observe_readings('a', [{'timestamp': '10:00', 'raw_timestamp': '2025-01-01T10:00:00', 'temperature': 20.0}] * 10)
+    detector.observe_readings('a', [{'timestamp': '10:05', 'temperature': 20.0}])
+    assert detector.state('a', 'temperature').stats.count == 11 and len(detector) == 5
+    assert not detector.is_anomalous('a', 'temperature')  # Zero variance never flags
+
+def test_sensor_anomaly_alerts_are_counted_in_alert_trends(app_module):
+    detector = app_module.StreamingAnomalyDetector(threshold=3, min_samples=5)
+    for value in [20.0, 20.5, 19.5, 20.2, 19.8, 20.1, 45.0]:
+        detector.observe('hvac_1', 'temperature', value, '2025-07-01T00:00:00')
+    index = app_module.AlertIndex()
+    with patch.object(app_module, 'devices', {'hvac_1': {'type': 'hvac', 'status': 'normal'}}), \
+            patch.object(app_module, 'anomaly_detector', detector), \
+            patch.object(app_module, 'last_anomaly_alert_times', {}), \
+            patch.object(app_module, 'predict_latest_windows', AsyncMock(return_value=({}, 'v1'))), \
+            patch.object(app_module, 'alerts', []), \
+            patch.object(app_module, 'alert_index', index), \
+            patch.object(app_module, 'journal_alert_created', lambda alert: None):
+        asyncio.run(app_module.periodic_alert_generation.__wrapped__())
+        # An alert persisted before alerts carried a type must not break the endpoint
+        index.add({'id': 'old', 'device_id': 'hvac_1', 'severity': 9, 'timestamp': datetime.now().isoformat()})
+        trends = asyncio.run(app_module.get_alert_trends())
+    (alert,) = [a for a in index.by_device('hvac_1') if a['id'] != 'old']
+    assert alert['alert_type'] == 'SENSOR_ANOMALY' and alert['type'] == 'critical'
+    assert 'model_version' not in alert  # Only model predictions are stamped with a version
+    assert trends[0]['Critical Alerts'] == 1 and trends[0]['Warning Alerts'] == 0
+
+def test_breach_rate_tracker_matches_rolling_mean():
+    from ml.preprocessing import DataPreprocessor
+
+    rng = np.random.default_rng(0)
+    window = 24
+    flags = (rng.random(300) < rng.uniform(0, 0.4, 300)).astype(float)
+    flags[150] = np.nan
+    rolling = pd.Series(flags).rolling(window).mean()
+
+    tracker = BreachRateTracker(window)
+    assert not tracker.add('A', [True])
+    state = tracker.rebuild('A', [])
+    for i, flag in enumerate(flags):
+        tracker.add('A', [flag])
+        if i < window - 1:
+            assert state.rate is None and state.recommendation() is None
+        elif np.isnan(rolling[i]):
+            assert np.isnan(state.rate)
+        else:
+            assert state.rate == pytest.approx(rolling[i])
+            assert state.recommendation() == classify_breach_rate(rolling[i])
+    assert state.readings == window
+    assert tracker.predictions()['A'][1] == classify_breach_rate(rolling.iloc[-1])
+
+    n = 900
+    df = pd.DataFrame({
+        'device_id': rng.choice([f'dev_{i}' for i in range(30)] + ['short'], n, p=[0.0333] * 30 + [0.001]),
+        'timestamp': pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.permutation(n), unit='min'),
+        'threshold_breach': (rng.random(n) < rng.uniform(0, 0.4, n)).astype(int)
+    })
+    preprocessor = DataPreprocessor()
+    fleet = preprocessor.get_fleet_maintenance_predictions(df)
+    for device_id in df['device_id'].unique():
+        device_data = df[df['device_id'] == device_id].sort_values('timestamp')
+        expected = None
+        if len(device_data) >= preprocessor.sequence_length:
+            rate = device_data['threshold_breach'].rolling(window=preprocessor.sequence_length).mean().iloc[-1]
+            expected = classify_breach_rate(rate)
+        assert preprocessor.get_maintenance_prediction(df, device_id) == expected
+        assert fleet[device_id] == expected
+    assert len(set(fleet.values())) > 1
+
+
+def test_data_generator_is_reproducible_and_time_ordered(tmp_path):
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    import data_generator
+
+    sensor_data, log_data = data_generator.generate(devices=6, days=3, interval=30, seed=7,
+                                                    start='2025-07-01', out_dir=None)
+    again, _ = data_generator.generate(devices=6, days=3, interval=30, seed=7, start='2025-07-01', out_dir=None)
+    pd.testing.assert_frame_equal(sensor_data, again)
+    assert len(sensor_data) == 6 * 3 * 48
+    assert sensor_data['timestamp'].is_monotonic_increasing and log_data['timestamp'].is_monotonic_increasing
+    assert (sensor_data.groupby('device_id').size() == 3 * 48).all()
+    thresholds = sensor_data['sensor_type'].map(dict(zip(data_generator.SENSOR_TYPES, data_generator.SENSOR_THRESHOLDS)))
+    assert (sensor_data['threshold_breach'] == (sensor_data['sensor_value'] > thresholds)).all()
+
+    # Shards split devices and days without changing the rows generated per device
+    assert data_generator.generate(devices=6, days=3, interval=30, seed=7, start='2025-07-01',
+                                   out_dir=str(tmp_path), rows_per_shard=200)[0] == len(sensor_data)
+    shards = sorted(os.listdir(tmp_path / 'raw' / 'sensor_data'))
+    assert len(shards) > 1 and shards[0] == 'part-00000.csv'
+    sharded = pd.concat([pd.read_csv(tmp_path / 'raw' / 'sensor_data' / name) for name in shards])
+    assert len(sharded) == len(sensor_data)
+    assert set(sharded['device_id']) == set(sensor_data['device_id'])
+
+    pytest.importorskip('pyarrow')
+    import parquet_store
+
+    data_generator.generate(devices=6, days=3, interval=30, seed=7, start='2025-07-01',
+                            out_dir=str(tmp_path), fmt='parquet', rows_per_shard=200)
+    df = parquet_store.read_dataset(str(tmp_path / 'parquet' / 'sensor_data'))
+    assert len(df) == len(sensor_data)
+    assert df['timestamp'].min() >= pd.Timestamp('2025-07-01')
+    assert df['timestamp'].max() < pd.Timestamp('2025-07-04')
@@ -0,0 +1,156 @@
+"""Out-of-core training data: CSVs split per device, windows regenerated on demand.
+
+`partition_csv_by_device` reads a CSV in chunks and appends each chunk's rows
+to one file per device, so later passes only ever hold one device in memory.
+`DeviceWindowStream` walks those partitions device by device, turning each
+into blocks of (X, y) windows with a caller-supplied function, and exposes
+them as a first pass for fitting scalers and as a tf.data pipeline.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class DevicePartition:
+    """Where one device's rows were written and what the split pass saw of them"""
+
+    def __init__(self, path, first_row):
+        self.path = path
+        self.rows = 0
+        self.first_row = first_row  # Row number of the device's first row in the source CSV
+        self.min_timestamp = None  # Earliest parsed timestamp, None if none parsed
+
+
+def partition_csv_by_device(csv_path, out_dir, chunksize=100_000, parse_timestamps=None):
+    """Split csv_path into one CSV per device_id under out_dir, chunksize rows at a time.
+
+    parse_timestamps, if given, converts a chunk's timestamp column so the
+    earliest timestamp of every device can be recorded. Returns a dict of
+    device_id -> DevicePartition in order of first appearance.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(csv_path))[0]
+    partitions = {}
+    offset = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        timestamps = parse_timestamps(chunk['timestamp']) if parse_timestamps else None
+        for device_id, positions in chunk.groupby('device_id', sort=False).indices.items():
+            partition = partitions.get(device_id)
+            if partition is None:
+                path = os.path.join(out_dir, f'{base_name}_{len(partitions)}.csv')
+                partition = partitions[device_id] = DevicePartition(path, offset + int(positions[0]))
+            chunk.iloc[positions].to_csv(partition.path, mode='a', header=partition.rows == 0, index=False)
+            partition.rows += len(positions)
+            if timestamps is not None:
+                chunk_min = timestamps.iloc[positions].min()
+                if not pd.isna(chunk_min) and (partition.min_timestamp is None or chunk_min < partition.min_timestamp):
+                    partition.min_timestamp = chunk_min
+        offset += len(chunk)
+    return partitions
+
+
+def time_order(partitions):
+    """Device ids in order of first appearance once all rows are sorted by timestamp (NaT last)"""
+    def key(device_id):
+        partition = partitions[device_id]
+        if partition.min_timestamp is None:
+            return (1, pd.Timestamp.min, partition.first_row)
+        return (0, partition.min_timestamp, partition.first_row)
+    return sorted(partitions, key=key)
+
+
+class DeviceWindowStream:
+    """Training windows generated one device partition at a time.
+
+    `make_windows(device_data, device_logs)` yields (X, y) blocks for one
+    device. `count_windows` (or `fit_scaler`) makes a first pass that records
+    how many windows each device contributes, after which `iter_blocks` and
+    `dataset` can serve any [start, stop) range of the global window order
+    without reading the devices outside it.
+    """
+
+    def __init__(self, partitions, log_partitions, make_windows, window_shape, device_order=None):
+        self.partitions = partitions
+        self.log_partitions = log_partitions
+        self.make_windows = make_windows
+        self.window_shape = tuple(window_shape)
+        self.device_order = list(device_order or partitions)
+        self.window_counts = None
+
+    def _device_blocks(self, device_id):
+        device_data = pd.read_csv(self.partitions[device_id].path)
+        log_partition = self.log_partitions.get(device_id)
+        device_logs = pd.read_csv(log_partition.path) if log_partition else pd.DataFrame(
+            columns=['device_id', 'timestamp', 'event_severity'])
+        return self.make_windows(device_data, device_logs)
+
+    def fit_scaler(self, scaler):
+        """First pass: partial_fit scaler on every flattened window, returning the window count"""
+        return self.count_windows(lambda X, y: scaler.partial_fit(X.reshape(len(X), -1)))
+
+    def count_windows(self, visit=None):
+        self.window_counts = {}
+        for device_id in self.device_order:
+            count = 0
+            for X, y in self._device_blocks(device_id):
+                if len(X) and visit is not None:
+                    visit(X, y)
+                count += len(X)
+            self.window_counts[device_id] = count
+        return sum(self.window_counts.values())
+
+    def iter_blocks(self, start=0, stop=None):
+        """Yield the (X, y) blocks covering windows [start, stop) of the global order"""
+        if self.window_counts is None:
+            self.count_windows()
+        offset = 0
+        for device_id in self.device_order:
+            count = self.window_counts[device_id]
+            if (stop is not None and offset >= stop) or offset + count <= start:
+                offset += count
+                continue
+            for X, y in self._device_blocks(device_id):
+                lo, hi = max(start - offset, 0), len(X) if stop is None else min(stop - offset, len(X))
+                if lo < hi:
+                    yield X[lo:hi], y[lo:hi]
+                offset += len(X)
+                if stop is not None and offset >= stop:
+                    return
+
+    def iter_split_blocks(self, lo, hi, seed=0):
+        """Yield the windows whose uniform random draw falls in [lo, hi).
+
+        Draws are seeded per device and repeat on every pass, so disjoint
+        ranges give stable, disjoint train/validation/test splits.
+        """
+        for position, device_id in enumerate(self.device_order):
+            rng = np.random.default_rng([seed, position])
+            for X, y in self._device_blocks(device_id):
+                draws = rng.random(len(X))
+                keep = (draws >= lo) & (draws < hi)
+                if keep.any():
+                    yield X[keep], y[keep]
+
+    def dataset(self, blocks, scaler=None, batch_size=32, shuffle_buffer=0):
+        """tf.data pipeline of (window, label) batches.
+
+        blocks is a zero-argument callable returning a fresh block iterator,
+        e.g. `lambda: stream.iter_blocks(0, n)`, called once per epoch. Windows
+        are scaled with scaler.transform on their flattened form when given.
+        """
+        import tensorflow as tf
+
+        def generate():
+            for X, y in blocks():
+                if scaler is not None:
+                    X = scaler.transform(X.reshape(len(X), -1)).reshape(X.shape)
+                yield X.astype(np.float32), y
+
+        dataset = tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec(shape=(None, *self.window_shape), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int64)
+        )).unbatch()
+        if shuffle_buffer:
+            dataset = dataset.shuffle(shuffle_buffer)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
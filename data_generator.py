@@ -1,166 +1,289 @@
-import pandas as pd
-import numpy as np
-import random
-from datetime import datetime, timedelta
+"""Synthetic fleet telemetry: time-ordered sensor readings and logs for N devices over M days.
+
+Every device reports one reading per --interval minutes (a random sensor
+type each time) and a Poisson number of logs per day. Each device has a fixed
+component type and location, its own offset from the nominal sensor means,
+and some devices drift upwards over time, so threshold breaches cluster on
+the devices that are degrading.
+
+The fleet is split into shards of at most --rows-per-shard readings (whole
+devices where possible, otherwise day ranges of one device). Shards are
+generated with NumPy in a process pool and written independently, so memory
+stays bounded by the workers' shards whatever the total size. Every shard
+has its own seed derived from --seed, so the same arguments always produce
+the same data.
+
+Output, under --out (default: data/):
+    csv, one shard       raw/sensor_data.csv, raw/log_data.csv, raw/combined_data.csv
+    csv, several shards  raw/sensor_data/part-00000.csv, ... and raw/log_data/part-00000.csv, ...
+    parquet              parquet/sensor_data and parquet/log_data datasets (see backend/parquet_store.py)
+
+Usage:
+    python data_generator.py                                    # 10 devices x 30 days, hourly readings
+    python data_generator.py --devices 10000 --days 30 --interval 5 --format parquet --workers 8
+"""
+import argparse
 import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BASE_DIR, 'backend')
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+COMPONENT_TYPES = ["ATM", "Server", "AC_Unit", "UPS"]
+LOCATIONS = ["Hyderabad", "Mumbai", "Bangalore", "Chennai", "Delhi"]
+
+# Sensor types with their breach threshold and the (mean, std) of normal readings
+SENSOR_TYPES = ["temperature", "humidity", "vibration", "power"]
+SENSOR_THRESHOLDS = np.array([75, 70, 5.0, 230])
+SENSOR_MEANS = np.array([65, 55, 2.5, 220])
+SENSOR_STDS = np.array([8, 10, 1, 15])
+
+DEGRADING_FRACTION = 0.1  # Share of devices whose readings drift upwards
+MAX_DRIFT_PER_DAY = 0.1  # Drift of a degrading device, in standard deviations per day
+
+# Log vocabulary per log type: messages, severity range, error codes and the
+# message keywords that come with an error code
+LOG_TYPES = ["ATM_log", "Server_log", "IOT_log"]
+LOG_MESSAGES = np.array([
+    ["Cash dispenser error", "Card reader malfunction",
+     "Network timeout", "Printer error", "General log: operation normal"],
+    ["High CPU usage detected", "Memory leak suspected",
+     "Disk failure warning", "Unexpected shutdown", "General log: system healthy"],
+    ["Sensor calibration needed", "Battery low",
+     "Signal lost", "Intermittent connectivity", "General log: stable"]
+], dtype=object)
+LOG_SEVERITY_RANGES = np.array([(1, 3), (2, 5), (1, 3)])
+ERROR_CODES = np.array([
+    ["ATM_E001", "ATM_E002", "ATM_E003"],
+    ["SRV_E101", "SRV_E102", "SRV_E103"],
+    ["IOT_E201", "IOT_E202", "IOT_E203"]
+], dtype=object)
+ERROR_KEYWORDS = [["error", "malfunction"], ["failure", "error"], ["lost", "low"]]
+MESSAGE_HAS_ERROR = np.array([
+    [any(key in message.lower() for key in keywords) for message in messages]
+    for messages, keywords in zip(LOG_MESSAGES, ERROR_KEYWORDS)
+])
+SERVER_LOG = LOG_TYPES.index("Server_log")
+
+TABLES = ("sensor_data", "log_data")
+
+
+def make_fleet(devices, seed):
+    """Static per-device attributes: ids, component, location, offset and drift"""
+    rng = np.random.default_rng([seed, 0])
+    degrading = rng.random(devices) < DEGRADING_FRACTION
+    return {
+        "device_id": np.array([f"dev_{i}" for i in range(1, devices + 1)], dtype=object),
+        "component": rng.integers(len(COMPONENT_TYPES), size=devices),
+        "location": rng.integers(len(LOCATIONS), size=devices),
+        "offset": rng.normal(0, 0.3, devices),  # In standard deviations of each sensor
+        "drift": np.where(degrading, rng.uniform(0, MAX_DRIFT_PER_DAY, devices), 0.0)
+    }
+
+
+def plan_shards(devices, days, readings_per_day, rows_per_shard):
+    """(device_lo, device_hi, day_lo, day_hi) ranges of at most rows_per_shard readings each"""
+    device_rows = readings_per_day * days
+    if device_rows <= rows_per_shard:
+        step = max(rows_per_shard // device_rows, 1)
+        return [(lo, min(lo + step, devices), 0, days) for lo in range(0, devices, step)]
+    day_step = max(rows_per_shard // readings_per_day, 1)
+    return [(device, device + 1, lo, min(lo + day_step, days))
+            for device in range(devices) for lo in range(0, days, day_step)]
+
+
+def fleet_slice(fleet, device_lo, device_hi):
+    return {key: values[device_lo:device_hi] for key, values in fleet.items()}
+
+
+def generate_sensor_rows(rng, fleet, day_lo, day_hi, start, interval):
+    """Readings of every device in fleet on days [day_lo, day_hi), in time order"""
+    readings_per_day = 24 * 60 // interval
+    n_devices, n_steps = len(fleet["device_id"]), (day_hi - day_lo) * readings_per_day
+    n = n_devices * n_steps
+    devices = np.repeat(np.arange(n_devices), n_steps)
+    steps = np.tile(np.arange(day_lo * readings_per_day, day_hi * readings_per_day), n_devices)
+    # Jitter within the first half of each interval keeps every device's readings in order
+    seconds = steps * (interval * 60) + rng.integers(0, interval * 30, n)
+    order = np.argsort(seconds, kind='stable')
+    devices, seconds = devices[order], seconds[order]
 
-# Set random seed for reproducibility
-random.seed(42)
-np.random.seed(42)
-
-# ----------------------------
-# Configurations and settings
-# ----------------------------
-num_sensor_records = 500  # Number of sensor records to generate
-num_log_records = 200     # Number of log records to generate
-
-# Device and location options
-device_ids = [f"dev_{i}" for i in range(1, 11)]  # 10 devices: dev_1, dev_2, …, dev_10
-component_types = ["ATM", "Server", "AC_Unit", "UPS"]
-locations = ["Hyderabad", "Mumbai", "Bangalore", "Chennai", "Delhi"]
-
-# Sensor types along with predefined threshold values (adjust as needed)
-sensor_types = {
-    "temperature": 75,
-    "humidity": 70,
-    "vibration": 5.0,
-    "power": 230
-}
-
-# ----------------------------
-# Generate Synthetic Sensor Data
-# ----------------------------
-sensor_records = []
-
-for _ in range(num_sensor_records):
-    # Random timestamp within the past 30 days
-    timestamp = datetime.now() - timedelta(
-        days=random.randint(0, 30), 
-        hours=random.randint(0, 23), 
-        minutes=random.randint(0, 59)
-    )
-    device_id = random.choice(device_ids)
-    component_type = random.choice(component_types)
-    sensor_type = random.choice(list(sensor_types.keys()))
-    
-    # Generate sensor values based on the sensor type with a normal distribution
-    if sensor_type == "temperature":
-        value = round(np.random.normal(65, 8), 2)
-    elif sensor_type == "humidity":
-        value = round(np.random.normal(55, 10), 2)
-    elif sensor_type == "vibration":
-        value = round(np.random.normal(2.5, 1), 2)
-    elif sensor_type == "power":
-        value = round(np.random.normal(220, 15), 2)
-    
-    # Determine if the sensor value crosses its threshold
-    threshold_breach = value > sensor_types[sensor_type]
-    location = random.choice(locations)
-    
-    sensor_records.append({
-        "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-        "device_id": device_id,
-        "component_type": component_type,
-        "sensor_type": sensor_type,
-        "sensor_value": value,
-        "threshold_breach": threshold_breach,
-        "location": location
+    sensors = rng.integers(len(SENSOR_TYPES), size=n)
+    days_elapsed = seconds / 86400
+    z = fleet["offset"][devices] + fleet["drift"][devices] * days_elapsed + rng.standard_normal(n)
+    values = np.round(SENSOR_MEANS[sensors] + SENSOR_STDS[sensors] * z, 2)
+    return pd.DataFrame({
+        "timestamp": start + pd.to_timedelta(seconds, unit='s'),
+        "device_id": fleet["device_id"][devices],
+        "component_type": np.array(COMPONENT_TYPES, dtype=object)[fleet["component"][devices]],
+        "sensor_type": np.array(SENSOR_TYPES, dtype=object)[sensors],
+        "sensor_value": values,
+        "threshold_breach": values > SENSOR_THRESHOLDS[sensors],
+        "location": np.array(LOCATIONS, dtype=object)[fleet["location"][devices]]
     })
 
-# ----------------------------
-# Define Log Message Elements
-# ----------------------------
-# For different types of logs, we prepare a few preset messages and error codes.
-atm_log_messages = [
-    "Cash dispenser error", "Card reader malfunction", 
-    "Network timeout", "Printer error", "General log: operation normal"
-]
-server_log_messages = [
-    "High CPU usage detected", "Memory leak suspected", 
-    "Disk failure warning", "Unexpected shutdown", "General log: system healthy"
-]
-iot_log_messages = [
-    "Sensor calibration needed", "Battery low", 
-    "Signal lost", "Intermittent connectivity", "General log: stable"
-]
-
-error_codes_atm = ["ATM_E001", "ATM_E002", "ATM_E003"]
-error_codes_server = ["SRV_E101", "SRV_E102", "SRV_E103"]
-error_codes_iot = ["IOT_E201", "IOT_E202", "IOT_E203"]
-
-# ----------------------------
-# Generate Synthetic Log Data
-# ----------------------------
-log_records = []
-
-for _ in range(num_log_records):
-    # Random timestamp within the past 30 days
-    timestamp = datetime.now() - timedelta(
-        days=random.randint(0, 30), 
-        hours=random.randint(0, 23), 
-        minutes=random.randint(0, 59)
-    )
-    device_id = random.choice(device_ids)
-    component_type = random.choice(component_types)
-    location = random.choice(locations)
-    
-    # Randomly select the type of log record
-    log_type = random.choice(["ATM_log", "Server_log", "IOT_log"])
-    
-    if log_type == "ATM_log":
-        log_message = random.choice(atm_log_messages)
-        event_severity = random.randint(1, 3)  # Moderate severity for ATM-related logs
-        # Set an error code only if message implies an error condition
-        error_code = random.choice(error_codes_atm) if any(key in log_message.lower() for key in ["error", "malfunction"]) else np.nan
-        performance_metrics = np.nan
-        
-    elif log_type == "Server_log":
-        log_message = random.choice(server_log_messages)
-        event_severity = random.randint(2, 5)  # Typically higher severity for server issues
-        error_code = random.choice(error_codes_server) if any(key in log_message.lower() for key in ["failure", "error"]) else np.nan
-        # Include simulated performance metrics for server logs
-        cpu_usage = round(np.random.uniform(70, 100), 2)
-        mem_usage = round(np.random.uniform(60, 100), 2)
-        performance_metrics = f"CPU:{cpu_usage}%, MEM:{mem_usage}%"
-        
-    elif log_type == "IOT_log":
-        log_message = random.choice(iot_log_messages)
-        event_severity = random.randint(1, 3)
-        error_code = random.choice(error_codes_iot) if any(key in log_message.lower() for key in ["lost", "low"]) else np.nan
-        performance_metrics = np.nan
-
-    # Create log record
-    log_records.append({
-        "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-        "device_id": device_id,
-        "component_type": component_type,
-        "log_type": log_type,
-        "log_message": log_message,
-        "event_severity": event_severity,
-        "error_code": error_code,
+
+def generate_log_rows(rng, fleet, day_lo, day_hi, start, logs_per_day):
+    """Poisson(logs_per_day) logs per device in fleet and day in [day_lo, day_hi), in time order"""
+    n_devices, n_days = len(fleet["device_id"]), day_hi - day_lo
+    counts = rng.poisson(logs_per_day, n_devices * n_days)
+    n = int(counts.sum())
+    devices = np.repeat(np.repeat(np.arange(n_devices), n_days), counts)
+    days = np.repeat(np.tile(np.arange(day_lo, day_hi), n_devices), counts)
+    seconds = days * 86400 + rng.integers(0, 86400, n)
+    order = np.argsort(seconds, kind='stable')
+    devices, seconds = devices[order], seconds[order]
+
+    log_types = rng.integers(len(LOG_TYPES), size=n)
+    messages = rng.integers(LOG_MESSAGES.shape[1], size=n)
+    low, high = LOG_SEVERITY_RANGES[log_types, 0], LOG_SEVERITY_RANGES[log_types, 1]
+    severities = low + (rng.random(n) * (high - low + 1)).astype(int)
+    error_codes = np.where(MESSAGE_HAS_ERROR[log_types, messages],
+                           ERROR_CODES[log_types, rng.integers(ERROR_CODES.shape[1], size=n)], np.nan)
+    # Server logs carry simulated CPU and memory usage
+    is_server = log_types == SERVER_LOG
+    performance_metrics = np.full(n, np.nan, dtype=object)
+    if is_server.any():
+        cpu = pd.Series(np.round(rng.uniform(70, 100, int(is_server.sum())), 2)).astype(str)
+        mem = pd.Series(np.round(rng.uniform(60, 100, int(is_server.sum())), 2)).astype(str)
+        performance_metrics[is_server] = ("CPU:" + cpu + "%, MEM:" + mem + "%").to_numpy()
+    return pd.DataFrame({
+        "timestamp": start + pd.to_timedelta(seconds, unit='s'),
+        "device_id": fleet["device_id"][devices],
+        "component_type": np.array(COMPONENT_TYPES, dtype=object)[fleet["component"][devices]],
+        "log_type": np.array(LOG_TYPES, dtype=object)[log_types],
+        "log_message": LOG_MESSAGES[log_types, messages],
+        "event_severity": severities,
+        "error_code": error_codes,
         "performance_metrics": performance_metrics,
-        "location": location
+        "location": np.array(LOCATIONS, dtype=object)[fleet["location"][devices]]
     })
 
-# ----------------------------
-# Save the Datasets
-# ----------------------------
-# Create data directories if they don't exist
-os.makedirs('data/raw', exist_ok=True)
-os.makedirs('data/processed', exist_ok=True)
-os.makedirs('data/models', exist_ok=True)
-
-# Save sensor data
-df_sensor = pd.DataFrame(sensor_records)
-df_sensor.to_csv('data/raw/sensor_data.csv', index=False)
-print(f"Sensor data saved to data/raw/sensor_data.csv")
-
-# Save log data
-df_log = pd.DataFrame(log_records)
-df_log.to_csv('data/raw/log_data.csv', index=False)
-print(f"Log data saved to data/raw/log_data.csv")
-
-# Combine and save for reference
-df_combined = pd.concat([df_sensor, df_log], ignore_index=True)
-df_combined.to_csv('data/raw/combined_data.csv', index=False)
-print(f"Combined data saved to data/raw/combined_data.csv") 
\ No newline at end of file
+
+def table_path(out_dir, fmt, table, sharded=False):
+    """Where a table is written: a CSV file, a directory of CSV shards or a Parquet dataset"""
+    if fmt == 'parquet':
+        return os.path.join(out_dir, 'parquet', table)
+    return os.path.join(out_dir, 'raw', table if sharded else f'{table}.csv')
+
+
+def write_table(df, path, fmt, shard, sharded):
+    if fmt == 'parquet':
+        if BACKEND_DIR not in sys.path:
+            sys.path.insert(0, BACKEND_DIR)
+        from parquet_store import write_chunk
+
+        write_chunk(df, path, f'{shard:05d}')
+    else:
+        df.to_csv(os.path.join(path, f'part-{shard:05d}.csv') if sharded else path, index=False,
+                  date_format='%Y-%m-%d %H:%M:%S')
+
+
+def generate_shard(task):
+    """Generate one shard and write it; returns (sensor rows, log rows), or the frames when not writing"""
+    shard, (day_lo, day_hi), fleet, options = task
+    rng = np.random.default_rng([options["seed"], 1, shard])
+    start = options["start"]
+    sensor_data = generate_sensor_rows(rng, fleet, day_lo, day_hi, start, options["interval"])
+    log_data = generate_log_rows(rng, fleet, day_lo, day_hi, start, options["logs_per_day"])
+    if options["out_dir"] is None:
+        return sensor_data, log_data
+    for table, df in zip(TABLES, (sensor_data, log_data)):
+        write_table(df, table_path(options["out_dir"], options["format"], table, options["sharded"]),
+                    options["format"], shard, options["sharded"])
+    return len(sensor_data), len(log_data)
+
+
+def generate(devices=10, days=30, interval=60, logs_per_day=1.0, seed=42, start=None, out_dir=DATA_DIR,
+             fmt='csv', rows_per_shard=1_000_000, workers=1):
+    """Generate the fleet and write it under out_dir; returns (sensor rows, log rows).
+
+    With out_dir=None nothing is written and the (sensor_data, log_data)
+    frames are returned instead, for small fleets held in memory.
+    """
+    if (24 * 60) % interval:
+        raise ValueError("interval must divide a day into whole minutes")
+    if start is None:
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+    start = pd.Timestamp(start)
+    fleet = make_fleet(devices, seed)
+    shards = plan_shards(devices, days, 24 * 60 // interval, rows_per_shard)
+    sharded = fmt == 'csv' and len(shards) > 1
+    options = {"seed": seed, "start": start, "interval": interval, "logs_per_day": logs_per_day,
+               "out_dir": out_dir, "format": fmt, "sharded": sharded}
+
+    def tasks():
+        for shard, (device_lo, device_hi, day_lo, day_hi) in enumerate(shards):
+            # Only the shard's devices are sent to the worker
+            yield shard, (day_lo, day_hi), fleet_slice(fleet, device_lo, device_hi), options
+
+    if out_dir is None:
+        frames = [generate_shard(task) for task in tasks()]
+        return (pd.concat([f[0] for f in frames], ignore_index=True),
+                pd.concat([f[1] for f in frames], ignore_index=True))
+
+    # Replace earlier output of the table in either layout
+    for table in TABLES:
+        for path in {table_path(out_dir, fmt, table, False), table_path(out_dir, fmt, table, True)}:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        os.makedirs(table_path(out_dir, fmt, table, True) if sharded else os.path.dirname(table_path(out_dir, fmt, table)),
+                    exist_ok=True)
+
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(generate_shard, tasks()))
+    else:
+        counts = [generate_shard(task) for task in tasks()]
+    return sum(c[0] for c in counts), sum(c[1] for c in counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=10)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--interval', type=int, default=60, help='minutes between readings of a device')
+    parser.add_argument('--logs-per-day', type=float, default=1.0, help='mean logs per device and day')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start', help='first day (default: --days before today)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--out', default=DATA_DIR)
+    parser.add_argument('--rows-per-shard', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Create data directories if they don't exist
+    for name in ('raw', 'processed', 'models'):
+        os.makedirs(os.path.join(args.out, name), exist_ok=True)
+
+    began = time.perf_counter()
+    sensor_rows, log_rows = generate(args.devices, args.days, args.interval, args.logs_per_day, args.seed,
+                                     args.start, args.out, args.format, args.rows_per_shard, args.workers)
+    seconds = time.perf_counter() - began
+    print(f"Generated {sensor_rows} sensor and {log_rows} log rows for {args.devices} devices over {args.days} days "
+          f"in {seconds:.1f} s ({sensor_rows / seconds:,.0f} readings/s)")
+    sharded = not os.path.isfile(table_path(args.out, args.format, 'sensor_data'))
+    for table in TABLES:
+        print(f"  {table}: {table_path(args.out, args.format, table, sharded)}")
+
+    combined_path = os.path.join(args.out, 'raw', 'combined_data.csv')
+    if args.format == 'csv' and not sharded:
+        # Combine and save for reference
+        pd.concat([pd.read_csv(table_path(args.out, 'csv', table)) for table in TABLES],
+                  ignore_index=True).to_csv(combined_path, index=False)
+        print(f"Combined data saved to {combined_path}")
+    elif os.path.exists(combined_path):
+        os.remove(combined_path)  # Would no longer match the tables
+
+
+if __name__ == '__main__':
+    main()